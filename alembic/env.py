@@ -8,6 +8,7 @@ import os
 from src.core.models import Base
 from src.core.models.good import Good
 from src.core.models.message import Message
+from src.core.models.stats import StatCounter
 from src.config.base import BaseConfig
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,99 @@
+"""add PhoneNormalized to register
+
+Revision ID: c4e1a7b2d9f3
+Revises: 3f89e62aa116
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+import logging
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e1a7b2d9f3'
+down_revision = '3f89e62aa116'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 1000
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+register_table = sa.table(
+    'register',
+    sa.column('RegisterID', sa.Integer),
+    sa.column('Phone', sa.String),
+    sa.column('PhoneNormalized', sa.String),
+)
+
+
+def _normalize_phone(phone):
+    # Frozen copy of src.core.util.normalize_phone at the time of this migration
+    if not isinstance(phone, str):
+        return None
+    value = phone.translate(str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')).strip()
+    has_plus = value.startswith('+')
+    digits = re.sub(r'[^0-9]', '', value)
+    if not digits:
+        return None
+    if digits.startswith('0098'):
+        return '0' + digits[4:]
+    if digits.startswith('98') and (has_plus or len(digits) == 12):
+        return '0' + digits[2:]
+    if has_plus:
+        return '+' + digits
+    if len(digits) == 10 and digits.startswith('9'):
+        return '0' + digits
+    return digits
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('register') as batch_op:
+        batch_op.add_column(sa.Column('PhoneNormalized', sa.String(), nullable=True))
+
+    # Backfill in primary-key chunks so memory stays bounded on large tables.
+    # The oldest register keeps a duplicated phone; later duplicates stay NULL
+    # so the unique index can be built, and are logged for manual cleanup.
+    bind = op.get_bind()
+    seen = set()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(register_table.c.RegisterID, register_table.c.Phone)
+            .where(register_table.c.RegisterID > last_id)
+            .order_by(register_table.c.RegisterID)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].RegisterID
+
+        updates = []
+        for row in rows:
+            normalized = _normalize_phone(row.Phone)
+            if normalized is None:
+                continue
+            if normalized in seen:
+                logger.warning("register %s has duplicate phone %s, PhoneNormalized left empty", row.RegisterID, normalized)
+                continue
+            seen.add(normalized)
+            updates.append({'rid': row.RegisterID, 'normalized': normalized})
+
+        if updates:
+            bind.execute(
+                register_table.update()
+                .where(register_table.c.RegisterID == sa.bindparam('rid'))
+                .values(PhoneNormalized=sa.bindparam('normalized')),
+                updates,
+            )
+
+    op.create_index(op.f('ix_register_PhoneNormalized'), 'register', ['PhoneNormalized'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_register_PhoneNormalized'), table_name='register')
+    with op.batch_alter_table('register') as batch_op:
+        batch_op.drop_column('PhoneNormalized')
@@ -0,0 +1,79 @@
+"""add normalized label columns and indexes for register stats
+
+Revision ID: d8f2b3c6e1a4
+Revises: c4e1a7b2d9f3
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b3c6e1a4'
+down_revision = 'c4e1a7b2d9f3'
+branch_labels = None
+depends_on = None
+
+
+def _normalize_label(s):
+    # Frozen copy of src.core.util.normalize_label at the time of this migration
+    if not s:
+        return None
+    s = unicodedata.normalize('NFKC', s)
+    s = s.replace('ي', 'ی').replace('ك', 'ک')
+    s = s.replace('\u00A0', ' ').replace('\u200c', ' ')
+    s = re.sub(r'[,،\-\u2010-\u2015]+', ' ', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    return s or None
+
+
+def _backfill(table_name, source, target):
+    # Labels repeat a lot, so normalize each distinct raw value once and
+    # update all of its rows with one statement
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column(source, sa.String), sa.column(target, sa.String))
+    raw_values = bind.execute(
+        sa.select(table.c[source]).where(table.c[source].isnot(None)).distinct()
+    ).scalars().all()
+    updates = [{'raw': raw, 'normalized': _normalize_label(raw)} for raw in raw_values]
+    updates = [u for u in updates if u['normalized'] is not None]
+    if updates:
+        bind.execute(
+            table.update()
+            .where(table.c[source] == sa.bindparam('raw'))
+            .values({target: sa.bindparam('normalized')}),
+            updates,
+        )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('register') as batch_op:
+        batch_op.add_column(sa.Column('ProvinceNormalized', sa.String(), nullable=True))
+    with op.batch_alter_table('good') as batch_op:
+        batch_op.add_column(sa.Column('TypeGoodNormalized', sa.String(), nullable=True))
+
+    _backfill('register', 'Province', 'ProvinceNormalized')
+    _backfill('good', 'TypeGood', 'TypeGoodNormalized')
+
+    op.create_index(op.f('ix_register_ProvinceNormalized'), 'register', ['ProvinceNormalized'], unique=False)
+    op.create_index(op.f('ix_register_EducationLevel'), 'register', ['EducationLevel'], unique=False)
+    op.create_index(op.f('ix_register_UnderWhichAdmin'), 'register', ['UnderWhichAdmin'], unique=False)
+    op.create_index(op.f('ix_children_of_register_RegisterID'), 'children_of_register', ['RegisterID'], unique=False)
+    op.create_index(op.f('ix_good_TypeGoodNormalized'), 'good', ['TypeGoodNormalized'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_good_TypeGoodNormalized'), table_name='good')
+    op.drop_index(op.f('ix_children_of_register_RegisterID'), table_name='children_of_register')
+    op.drop_index(op.f('ix_register_UnderWhichAdmin'), table_name='register')
+    op.drop_index(op.f('ix_register_EducationLevel'), table_name='register')
+    op.drop_index(op.f('ix_register_ProvinceNormalized'), table_name='register')
+
+    with op.batch_alter_table('good') as batch_op:
+        batch_op.drop_column('TypeGoodNormalized')
+    with op.batch_alter_table('register') as batch_op:
+        batch_op.drop_column('ProvinceNormalized')
@@ -0,0 +1,82 @@
+"""add stat_counter table for incrementally maintained dashboard counters
+
+Revision ID: e5a9c1d7f2b8
+Revises: d8f2b3c6e1a4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c1d7f2b8'
+down_revision = 'd8f2b3c6e1a4'
+branch_labels = None
+depends_on = None
+
+KEY_LENGTH = 200
+
+
+def _seed(bind, counter, dimension, query):
+    # Frozen copy of src.core.stats.compute_counters for one dimension
+    rows = [
+        {'Dimension': dimension, 'Key': str(key)[:KEY_LENGTH], 'Count': count}
+        for key, count in bind.execute(query)
+        if key is not None and key != '' and count
+    ]
+    if rows:
+        bind.execute(counter.insert(), rows)
+
+
+def upgrade() -> None:
+    counter = op.create_table(
+        'stat_counter',
+        sa.Column('Dimension', sa.String(length=50), nullable=False),
+        sa.Column('Key', sa.String(length=KEY_LENGTH), nullable=False),
+        sa.Column('Count', sa.Integer(), nullable=False),
+        sa.Column('UpdatedDate', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('Dimension', 'Key'),
+    )
+    op.create_index(op.f('ix_register_CreatedDate'), 'register', ['CreatedDate'], unique=False)
+    op.create_index(op.f('ix_good_CreatedDate'), 'good', ['CreatedDate'], unique=False)
+
+    bind = op.get_bind()
+    register = sa.table(
+        'register',
+        sa.column('RegisterID', sa.Integer),
+        sa.column('ProvinceNormalized', sa.String),
+        sa.column('EducationLevel', sa.String),
+        sa.column('UnderWhichAdmin', sa.Integer),
+    )
+    child = sa.table('children_of_register', sa.column('ChildrenOfRegisterID', sa.Integer), sa.column('RegisterID', sa.Integer))
+    good = sa.table('good', sa.column('GoodID', sa.Integer), sa.column('GivenToWhome', sa.Integer),
+                    sa.column('TypeGoodNormalized', sa.String))
+    admin = sa.table('admin', sa.column('AdminID', sa.Integer), sa.column('UserRole', sa.String))
+
+    _seed(bind, counter, 'register_total',
+          sa.select(sa.literal('all'), sa.func.count(register.c.RegisterID)))
+    for dimension, column in (('register_province', register.c.ProvinceNormalized),
+                              ('register_education', register.c.EducationLevel),
+                              ('register_admin', register.c.UnderWhichAdmin)):
+        _seed(bind, counter, dimension, sa.select(column, sa.func.count(register.c.RegisterID)).group_by(column))
+    child_counts = (
+        sa.select(register.c.RegisterID, sa.func.count(child.c.ChildrenOfRegisterID).label('child_count'))
+        .select_from(register.outerjoin(child, child.c.RegisterID == register.c.RegisterID))
+        .group_by(register.c.RegisterID)
+        .subquery()
+    )
+    _seed(bind, counter, 'register_children',
+          sa.select(child_counts.c.child_count, sa.func.count()).group_by(child_counts.c.child_count))
+    _seed(bind, counter, 'good_type',
+          sa.select(good.c.TypeGoodNormalized, sa.func.count(good.c.GoodID))
+          .join(register, good.c.GivenToWhome == register.c.RegisterID)
+          .group_by(good.c.TypeGoodNormalized))
+    _seed(bind, counter, 'admin_role',
+          sa.select(admin.c.UserRole, sa.func.count(admin.c.AdminID)).group_by(admin.c.UserRole))
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_good_CreatedDate'), table_name='good')
+    op.drop_index(op.f('ix_register_CreatedDate'), table_name='register')
+    op.drop_table('stat_counter')
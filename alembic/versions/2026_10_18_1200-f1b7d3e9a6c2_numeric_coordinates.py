@@ -0,0 +1,89 @@
+"""add numeric coordinate columns and map position indexes
+
+Revision ID: f1b7d3e9a6c2
+Revises: e5a9c1d7f2b8
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b7d3e9a6c2'
+down_revision = 'e5a9c1d7f2b8'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def _parse_coordinate(value):
+    # Frozen copy of src.core.util.parse_coordinate at the time of this migration
+    if not isinstance(value, str):
+        return None
+    value = value.translate(str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')).strip()
+    if not re.match(r'^[+-]?\d+(\.\d+)?$', value):
+        return None
+    return float(value)
+
+
+def _backfill(table_name, pk):
+    # Primary-key chunks keep memory bounded on large tables
+    table = sa.table(
+        table_name,
+        sa.column(pk, sa.Integer),
+        sa.column('Latitude', sa.Text),
+        sa.column('Longitude', sa.Text),
+        sa.column('LatitudeValue', sa.Float),
+        sa.column('LongitudeValue', sa.Float),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c[pk], table.c.Latitude, table.c.Longitude)
+            .where(table.c[pk] > last_id)
+            .order_by(table.c[pk])
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        updates = []
+        for row_id, latitude, longitude in rows:
+            lat, lng = _parse_coordinate(latitude), _parse_coordinate(longitude)
+            if lat is not None or lng is not None:
+                updates.append({'rid': row_id, 'lat': lat, 'lng': lng})
+        if updates:
+            bind.execute(
+                table.update()
+                .where(table.c[pk] == sa.bindparam('rid'))
+                .values(LatitudeValue=sa.bindparam('lat'), LongitudeValue=sa.bindparam('lng')),
+                updates,
+            )
+
+
+def upgrade() -> None:
+    for table_name in ('register', 'admin'):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.add_column(sa.Column('LatitudeValue', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('LongitudeValue', sa.Float(), nullable=True))
+
+    _backfill('register', 'RegisterID')
+    _backfill('admin', 'AdminID')
+
+    op.create_index('ix_register_map_position', 'register', ['is_disconnected', 'LatitudeValue', 'LongitudeValue'], unique=False)
+    op.create_index('ix_admin_map_position', 'admin', ['LatitudeValue', 'LongitudeValue'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_admin_map_position', table_name='admin')
+    op.drop_index('ix_register_map_position', table_name='register')
+    for table_name in ('admin', 'register'):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('LongitudeValue')
+            batch_op.drop_column('LatitudeValue')
@@ -0,0 +1,23 @@
+"""add good(GivenToWhome, CreatedDate) index for recent delivery checks
+
+Revision ID: a3c8e2f5b7d1
+Revises: f1b7d3e9a6c2
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c8e2f5b7d1'
+down_revision = 'f1b7d3e9a6c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_good_GivenToWhome_CreatedDate', 'good', ['GivenToWhome', 'CreatedDate'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_good_GivenToWhome_CreatedDate', table_name='good')
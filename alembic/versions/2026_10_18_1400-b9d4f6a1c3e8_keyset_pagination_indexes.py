@@ -0,0 +1,25 @@
+"""add indexes for keyset pagination of goods and needy map lists
+
+Revision ID: b9d4f6a1c3e8
+Revises: a3c8e2f5b7d1
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4f6a1c3e8'
+down_revision = 'a3c8e2f5b7d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_good_GivenToWhome_GoodID', 'good', ['GivenToWhome', 'GoodID'], unique=False)
+    op.create_index('ix_register_is_disconnected_RegisterID', 'register', ['is_disconnected', 'RegisterID'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_register_is_disconnected_RegisterID', table_name='register')
+    op.drop_index('ix_good_GivenToWhome_GoodID', table_name='good')
@@ -0,0 +1,57 @@
+"""
+Shared setup for the benchmark scripts.
+
+The app reads DATABASE_URL when src.config is first imported, so
+`use_database` must run before anything from src is imported.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+
+def parse_args(description: str, **extra) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to benchmark against (default: a fresh SQLite file)")
+    for name, (type_, default, help_) in extra.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type_, default=default, help=help_)
+    return parser.parse_args()
+
+
+def use_database(database_url: str | None) -> str:
+    if not database_url:
+        database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    return database_url
+
+
+def make_client():
+    """TestClient over the real app with all tables created."""
+    from fastapi.testclient import TestClient
+    from src.main import app
+    from src.config.database import engine
+    from src.core.models import Base
+    import src.core.models.message  # noqa: F401  (registers the table)
+
+    Base.metadata.create_all(engine)
+    return TestClient(app)
+
+
+def timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Wall-clock seconds of `repeat` calls to fn."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(label: str, samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"{label:<32} n={len(samples):<5} median={statistics.median(samples) * 1000:8.2f}ms "
+            f"p95={p95 * 1000:8.2f}ms")
@@ -0,0 +1,66 @@
+"""
+Per-request cost of authentication with the /login access tokens:
+
+- verify: token_issuer.verify on a token not seen before (signature
+  check) and on one in the LRU of verified tokens
+- lookup: what a per-request credential lookup would cost instead, one
+  primary-key read of the admin row in a fresh session
+- request: GET /cache-stats through the app with the router's
+  authenticate dependency off (AUTH_ENABLED=false) and on
+
+    python -m benchmarks.bench_auth --repeat 2000
+"""
+import os
+import statistics
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+
+
+def summarize_us(label: str, samples) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"{label:<32} n={len(samples):<5} median={statistics.median(samples) * 1e6:8.1f}us p95={p95 * 1e6:8.1f}us"
+
+
+def main():
+    args = parse_args(__doc__, repeat=(int, 2000, "calls per measurement"))
+    use_database(args.database_url)
+    os.environ["PASSWORD_HASH_ROUNDS"] = "4"  # /login is not what is measured
+    client = make_client()
+
+    from src.config import authentication
+    from src.config.database import SessionLocal
+    from src.core.models.admin import Admin
+    from src.core.token_generator import TokenIssuer, token_issuer
+
+    client.post("/signup-admin", json={"FirstName": "نماینده", "LastName": "تست", "Phone": "09350000000",
+                                       "Password": "x", "UserRole": "Admin"}).raise_for_status()
+    login = client.post("/login", json={"Username": "09350000000", "Password": "x"}).json()
+    token = login["accessToken"]
+
+    # no LRU: every call checks the signature
+    uncached = TokenIssuer(token_issuer.keys, token_issuer.active_key, token_issuer.algorithm, token_issuer.ttl,
+                           cache_size=0)
+    print(summarize_us("verify, not cached", timed(lambda: uncached.verify(token), args.repeat)))
+    token_issuer.verify(token)
+    print(summarize_us("verify, LRU hit", timed(lambda: token_issuer.verify(token), args.repeat)))
+
+    def lookup():
+        db = SessionLocal()
+        try:
+            db.get(Admin, login["adminID"])
+        finally:
+            db.close()
+
+    print(summarize("lookup, admin row", timed(lookup, args.repeat)))
+
+    headers = {"Authorization": f"Bearer {token}"}
+    for enabled in (False, True):
+        authentication.auth_enabled = enabled
+        assert client.get("/cache-stats", headers=headers).status_code == 200
+        print(summarize(f"request, auth {'on' if enabled else 'off'}",
+                        timed(lambda: client.get("/cache-stats", headers=headers), args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Throughput under concurrent clients against a real uvicorn server.
+
+`--clients` connections each send requests back to back for `--duration`
+seconds, per endpoint. Without --url a fresh SQLite database is seeded and
+`uvicorn src.main:app` is started on it with the response cache and map
+snapshots off, so every request reaches the database.
+
+    python -m benchmarks.bench_load --clients 200 --duration 10 --rows 2000
+
+The load generator is a single asyncio process; compare runs made on the
+same machine rather than reading the numbers as the server's ceiling.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks._common import parse_args, use_database
+
+ENDPOINTS = ("/find-needy", "/register-stats", "/get-needy/{id}", "/admins")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(rows: int) -> int:
+    """Seed needy households and a few admins; returns a RegisterID for /get-needy."""
+    from benchmarks._common import make_client
+    from benchmarks.bench_map_viewport import seed as seed_map
+
+    client = make_client()
+    for i in range(20):
+        client.post("/signup-admin", json={"FirstName": f"نماینده {i}", "LastName": "تست",
+                                           "Phone": f"0935{i:07d}", "Password": "x", "UserRole": "Admin"})
+    seed_map(rows)
+    return client.get("/find-needy?limit=1").json()["items"][0]["id"]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+           "CACHE_ENABLED": "false", "SNAPSHOTS_ENABLED": "false"}
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+                               "--log-level", "warning", "--no-access-log"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+async def load(base_url: str, path: str, clients: int, duration: float) -> Dict[str, object]:
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    await response.aread()
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(ordered),
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "errors": errors,
+    }
+
+
+def main():
+    args = parse_args(__doc__, clients=(int, 200, "concurrent connections"),
+                      duration=(float, 10, "seconds per endpoint"),
+                      rows=(int, 2000, "needy rows to seed (without --url)"),
+                      url=(str, None, "benchmark a running server instead of starting one"),
+                      register_id=(int, None, "RegisterID for /get-needy (with --url)"))
+    server = None
+    register_id = args.register_id
+    base_url = args.url
+    if base_url is None:
+        use_database(args.database_url)
+        register_id = seed(args.rows)
+        port = _free_port()
+        server = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        print(f"{args.clients} clients, {args.duration:.0f}s per endpoint")
+        for path in ENDPOINTS:
+            path = path.format(id=register_id or 1)
+            result = asyncio.run(load(base_url, path, args.clients, args.duration))
+            print(f"{path:<20} {result['rps']:8.1f} req/s  p50={result['p50'] * 1000:7.1f}ms "
+                  f"p99={result['p99'] * 1000:7.1f}ms errors={result['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()  # e.g. threads still stuck waiting for a pool connection
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-request overhead of LoggingMiddleware: a small ASGI app returning a
+JSON body is called directly with and without the middleware in front of
+it. Log output goes to /dev/null so terminal speed is not measured.
+
+    python -m benchmarks.bench_logging --requests 20000 --body-kib 64
+"""
+import asyncio
+import json
+import os
+import time
+
+from benchmarks._common import parse_args, use_database
+
+
+def json_app(body: bytes):
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+async def run(app, requests: int, payload: bytes) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/bench", "raw_path": b"/bench", "query_string": b"page=1",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("bench", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args(__doc__, requests=(int, 20000, "requests per case"),
+                      body_kib=(int, 64, "response body size in KiB"))
+    use_database(args.database_url)
+    from src.core import logging_middleware
+
+    logging_middleware.handler.setStream(open(os.devnull, "w"))
+    body = json.dumps([{"name": "نام خانواده", "id": i} for i in range(args.body_kib * 1024 // 40)],
+                      ensure_ascii=False).encode()
+    payload = json.dumps({"FirstName": "مریم", "LastName": "احمدی"}, ensure_ascii=False).encode()
+    bare = json_app(body)
+
+    baseline = asyncio.run(run(bare, args.requests, payload))
+    logged = asyncio.run(run(logging_middleware.LoggingMiddleware(bare), args.requests, payload))
+    listener = getattr(logging_middleware, "listener", None)
+    if listener is not None:
+        listener.stop()  # wait until the queued records are written
+        listener.start()
+    print(f"body {len(body) / 1024:.0f} KiB, {args.requests} requests")
+    print(f"without middleware  {baseline / args.requests * 1e6:8.1f} us/request")
+    print(f"with middleware     {logged / args.requests * 1e6:8.1f} us/request")
+    print(f"overhead            {(logged - baseline) / args.requests * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
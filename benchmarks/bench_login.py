@@ -0,0 +1,106 @@
+"""
+/login throughput under concurrent clients against a real uvicorn
+server, per bcrypt cost (PASSWORD_HASH_ROUNDS), and the latency of a
+cheap GET / sent alongside, which shows whether password checks hold up
+the rest of the server.
+
+Each cost gets a fresh server; its admins sign up through it, so their
+hashes have that cost. `--workers` sets PASSWORD_HASH_WORKERS (default:
+one per CPU).
+
+    python -m benchmarks.bench_login --clients 50 --duration 10 --rounds 10,12
+
+The load generator shares the machine with the server; compare runs made
+on the same machine rather than reading the numbers as a ceiling.
+"""
+import asyncio
+import os
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks._common import parse_args, use_database
+from benchmarks.bench_load import _free_port, start_server
+
+ADMINS = 20
+PASSWORD = "رمز-عبور-آزمایشی"
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {"p50": statistics.median(ordered), "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]}
+
+
+async def load(base_url: str, phones: List[str], clients: int, duration: float) -> Dict[str, object]:
+    logins: List[float] = []
+    probes: List[float] = []
+    statuses: Dict[int, int] = {}
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        stop = time.perf_counter() + duration
+
+        async def login(number: int):
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                response = await client.post("/login", json={"Username": phones[number % len(phones)],
+                                                              "Password": PASSWORD})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 200:
+                    logins.append(time.perf_counter() - start)
+
+        async def probe():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                (await client.get("/")).raise_for_status()
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(login(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+    return {"rps": len(logins) / elapsed, "login": _percentiles(logins), "probe": _percentiles(probes),
+            "statuses": statuses}
+
+
+def signup_admins(base_url: str, prefix: str) -> List[str]:
+    phones = [f"09{prefix}{i:07d}" for i in range(ADMINS)]
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        for i, phone in enumerate(phones):
+            client.post("/signup-admin", json={"FirstName": f"نماینده {i}", "LastName": "تست", "Phone": phone,
+                                               "Password": PASSWORD, "UserRole": "Admin"}).raise_for_status()
+    return phones
+
+
+def main():
+    args = parse_args(__doc__, clients=(int, 50, "concurrent login connections"),
+                      duration=(float, 10, "seconds per cost"),
+                      rounds=(str, "10,12", "comma-separated bcrypt costs"),
+                      workers=(int, None, "PASSWORD_HASH_WORKERS of the server"))
+    use_database(args.database_url)
+    from benchmarks._common import make_client
+    make_client()  # creates the tables
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+    print(f"{args.clients} clients, {args.duration:.0f}s per cost, {ADMINS} admins")
+    for rounds in (int(r) for r in args.rounds.split(",")):
+        os.environ["PASSWORD_HASH_ROUNDS"] = str(rounds)
+        port = _free_port()
+        server = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            phones = signup_admins(base_url, f"{rounds:02d}")
+            result = asyncio.run(load(base_url, phones, args.clients, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"cost {rounds:<3} {result['rps']:7.1f} logins/s  "
+              f"login p50={result['login']['p50'] * 1000:7.1f}ms p99={result['login']['p99'] * 1000:7.1f}ms  "
+              f"GET / p50={result['probe']['p50'] * 1000:6.1f}ms p99={result['probe']['p99'] * 1000:6.1f}ms  "
+              f"statuses={result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
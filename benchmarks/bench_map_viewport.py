@@ -0,0 +1,65 @@
+"""
+Payload size and latency of /find-needy for the whole country versus a
+city-sized viewport, with the response cache turned off, and of the
+clustered /find-needy-clusters for the same views with warm cluster
+aggregates.
+
+    python -m benchmarks.bench_map_viewport --registers 50000
+"""
+import os
+import random
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+
+# Roughly Iran, and Tehran inside it
+COUNTRY = dict(min_lat=25.0, max_lat=39.8, min_lng=44.0, max_lng=63.3)
+CITY = dict(min_lat=35.55, max_lat=35.85, min_lng=51.2, max_lng=51.6)
+
+
+def seed(count: int) -> None:
+    from src.config.database import SessionLocal
+    from src.core.households import insert_households
+
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        for start in range(0, count, 1000):
+            insert_households(db, [{
+                "FirstName": "نام",
+                "LastName": "خانواده",
+                "Phone": f"0912{i:07d}",
+                "Latitude": str(round(rng.uniform(COUNTRY["min_lat"], COUNTRY["max_lat"]), 6)),
+                "Longitude": str(round(rng.uniform(COUNTRY["min_lng"], COUNTRY["max_lng"]), 6)),
+            } for i in range(start, min(start + 1000, count))])
+            db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    args = parse_args(__doc__, registers=(int, 50000, "geolocated registers to seed"),
+                      requests=(int, 30, "requests per case"))
+    use_database(args.database_url)
+    os.environ["CACHE_ENABLED"] = "false"
+    os.environ["SNAPSHOTS_ENABLED"] = "false"
+    client = make_client()
+    seed(args.registers)
+
+    for label, params in (("whole map", {}), ("city viewport", CITY)):
+        response = client.get("/find-needy", params=params)
+        assert response.status_code == 200, response.text
+        print(f"{label}: {len(response.json())} points, {len(response.content) / 1024:.1f} KiB")
+        print(summarize(label, timed(lambda: client.get("/find-needy", params=params), args.requests)))
+
+    from src.core.cache import response_cache
+    response_cache.enabled = True  # cluster aggregates live in the cache
+    for label, params in (("clusters zoom=5", {"zoom": 5}), ("clusters zoom=11 city", {"zoom": 11, **CITY})):
+        response = client.get("/find-needy-clusters", params=params)  # computes the zoom's aggregate
+        assert response.status_code == 200, response.text
+        body = response.json()
+        print(f"{label}: {len(body['clusters'])} clusters, {len(response.content) / 1024:.1f} KiB")
+        print(summarize(label, timed(lambda: client.get("/find-needy-clusters", params=params), args.requests)))
+
+
+if __name__ == "__main__":
+    main()
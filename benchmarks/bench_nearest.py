@@ -0,0 +1,52 @@
+"""
+Latency of /nearest-needy against a full scan that ranks every geolocated
+register by haversine distance, which is what clients did with /find-needy.
+
+    python -m benchmarks.bench_nearest --registers 50000
+"""
+import os
+import random
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+from benchmarks.bench_map_viewport import seed
+
+TEHRAN = (35.6892, 51.3890)
+
+
+def main():
+    args = parse_args(__doc__, registers=(int, 50000, "geolocated registers to seed"),
+                      requests=(int, 50, "requests per case"), k=(int, 10, "neighbours to return"))
+    use_database(args.database_url)
+    os.environ["CACHE_ENABLED"] = "false"
+    client = make_client()
+    seed(args.registers)
+
+    from src.config.database import SessionLocal
+    from src.core.geo import haversine_km
+    from src.core.models.register import Register
+
+    rng = random.Random(11)
+    points = [(TEHRAN[0] + rng.uniform(-0.1, 0.1), TEHRAN[1] + rng.uniform(-0.1, 0.1)) for _ in range(args.requests)]
+
+    def full_scan():
+        lat, lng = points[rng.randrange(len(points))]
+        db = SessionLocal()
+        try:
+            rows = db.query(Register.RegisterID, Register.LatitudeValue, Register.LongitudeValue) \
+                .filter(Register.LatitudeValue.isnot(None), Register.is_disconnected == False).all()  # noqa: E712
+            return sorted(rows, key=lambda r: haversine_km(lat, lng, r.LatitudeValue, r.LongitudeValue))[:args.k]
+        finally:
+            db.close()
+
+    def nearest(params=None):
+        lat, lng = points[rng.randrange(len(points))]
+        response = client.get("/nearest-needy", params={"lat": lat, "lng": lng, "k": args.k, **(params or {})})
+        assert response.status_code == 200, response.text
+
+    print(summarize("full scan + haversine", timed(full_scan, args.requests)))
+    print(summarize("nearest-needy", timed(nearest, args.requests)))
+    print(summarize("nearest-needy not_given_days=30", timed(lambda: nearest({"not_given_days": 30}), args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Latency of the first and of a deep keyset page of /find-needy, next to the
+unpaginated list, with the response cache turned off.
+
+    python -m benchmarks.bench_pagination --registers 50000
+"""
+import os
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+from benchmarks.bench_map_viewport import seed
+
+
+def main():
+    args = parse_args(__doc__, registers=(int, 50000, "geolocated registers to seed"),
+                      requests=(int, 30, "requests per case"), limit=(int, 100, "page size"))
+    use_database(args.database_url)
+    os.environ["CACHE_ENABLED"] = "false"
+    os.environ["SNAPSHOTS_ENABLED"] = "false"
+    client = make_client()
+    seed(args.registers)
+
+    # walk to a page ~90% deep
+    from src.core.pagination import encode_cursor
+    deep_cursor = encode_cursor(int(args.registers * 0.9))
+
+    cases = (
+        ("first page", {"limit": args.limit}),
+        ("page at 90% depth", {"limit": args.limit, "cursor": deep_cursor}),
+        ("unpaginated", {}),
+    )
+    for label, params in cases:
+        response = client.get("/find-needy", params=params)
+        assert response.status_code == 200, response.text
+        print(summarize(label, timed(lambda: client.get("/find-needy", params=params), args.requests)))
+
+
+if __name__ == "__main__":
+    main()
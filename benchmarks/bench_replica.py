@@ -0,0 +1,109 @@
+"""
+Read/write routing with a read replica (DATABASE_REPLICA_URL), locally
+on two SQLite files: the replica is a copy of the seeded primary taken
+with SQLite's backup API and never updated afterwards, so it behaves
+like a replica whose lag never ends and shows which database served
+each read.
+
+- routing: a write on the primary, then the new household as seen by a
+  GET from another client (replica: 404), by the writing client (its
+  read_primary_until cookie: 200) and with the X-Read-Primary header
+- mixed load: `--requests` GETs with a write every `--write-every`,
+  and the statements each database ran
+
+Caches are off so every GET reaches a database. With --database-url and
+--replica-url pointing at a primary and its replica (e.g. two local
+Postgres instances), the copy step is skipped.
+
+    python -m benchmarks.bench_replica --rows 5000 --requests 500 --write-every 10
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks._common import parse_args, use_database
+
+
+def copy_sqlite(primary_url: str, replica_url: str) -> None:
+    from sqlalchemy import make_url
+
+    source = sqlite3.connect(make_url(primary_url).database)
+    target = sqlite3.connect(make_url(replica_url).database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def signup(client, number: int):
+    response = client.post("/signup-register", json={"FirstName": "نام", "LastName": "خانواده",
+                                                      "Phone": f"0935{number:07d}",
+                                                      "Latitude": "35.7", "Longitude": "51.4"})
+    assert response.status_code == 201, response.text
+    return response
+
+
+def main():
+    args = parse_args(__doc__, replica_url=(str, None, "Replica of --database-url (default: a copy of it)"),
+                      rows=(int, 5000, "households to seed"), requests=(int, 500, "GET requests of the mixed load"),
+                      write_every=(int, 10, "one signup per this many GETs"))
+    primary_url = use_database(args.database_url)
+    replica_url = args.replica_url or f"sqlite:///{tempfile.mkdtemp()}/replica.db"
+    os.environ.update(DATABASE_REPLICA_URL=replica_url, CACHE_ENABLED="false", SNAPSHOTS_ENABLED="false",
+                      WARM_ON_STARTUP="false")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from benchmarks._common import make_client
+    from benchmarks.bench_map_viewport import seed
+    from src.config.database import (ENGINES, READ_PRIMARY_COOKIE, READ_PRIMARY_HEADER, async_replica_engine,
+                                     replica_engine)
+    from src.main import app
+
+    make_client()  # creates the tables on the primary
+    seed(args.rows)
+    if args.replica_url is None:
+        copy_sqlite(primary_url, replica_url)
+
+    statements = Counter()
+    for engine in ENGINES:
+        database = "replica" if engine in (replica_engine, async_replica_engine.sync_engine) else "primary"
+        event.listen(engine, "after_cursor_execute",
+                     lambda *_, database=database: statements.update([database]))
+
+    writer, reader = TestClient(app), TestClient(app)
+    new_id = signup(writer, 0).json()["RegisterID"]
+    cookie = writer.cookies.get(READ_PRIMARY_COOKIE)
+    print(f"signup -> household {new_id}, {READ_PRIMARY_COOKIE} cookie {'set' if cookie else 'NOT set'}")
+    for label, client, headers in (("other client (replica)", reader, {}),
+                                   ("writing client (cookie)", writer, {}),
+                                   ("other client + header", reader, {READ_PRIMARY_HEADER: "1"})):
+        status = client.get(f"/get-needy/{new_id}", headers=headers).status_code
+        print(f"  GET /get-needy/{new_id:<8} {label:<26} {status}")
+
+    rng = random.Random(7)
+    statements.clear()
+    latencies = []
+    written = 0
+    for number in range(args.requests):
+        if number % args.write_every == 0:
+            written += 1
+            signup(writer, written)
+        path = rng.choice(["/find-needy", "/register-stats", f"/get-needy/{rng.randint(1, args.rows)}"])
+        start = time.perf_counter()
+        reader.get(path).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    print(f"\nmixed load: {args.requests} GETs, {written} signups; "
+          f"median GET {statistics.median(latencies) * 1000:.1f}ms")
+    for database in ("primary", "replica"):
+        print(f"  {database:<8} {statements[database]:6d} statements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Bytes and time per response of the JSON-heavy read endpoints. The response
+cache stays on and snapshots off, so after the first request the query is
+skipped and what is measured is validation, encoding and transport.
+
+    python -m benchmarks.bench_serialization --registers 20000
+"""
+import os
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+from benchmarks.bench_map_viewport import seed
+
+CHILDREN = [{"FirstName": "فرزند", "LastName": "خانواده", "Age": age, "Gender": "دختر"} for age in range(1, 7)]
+
+
+def main():
+    args = parse_args(__doc__, registers=(int, 20000, "geolocated registers to seed"),
+                      admins=(int, 500, "admins to seed"),
+                      requests=(int, 30, "requests per case"))
+    use_database(args.database_url)
+    os.environ["SNAPSHOTS_ENABLED"] = "false"
+    client = make_client()
+    seed(args.registers)
+    for i in range(args.admins):
+        client.post("/signup-admin", json={"FirstName": "نماینده", "LastName": f"شماره {i}", "Phone": f"0935{i:07d}",
+                                            "Password": "secret", "City": "تهران", "Street": "خیابان آزادی",
+                                            "Latitude": "35.7", "Longitude": "51.4"})
+    needy = client.post("/signup-register", json={
+        "FirstName": "مریم", "LastName": "احمدی", "Phone": "09130000001", "City": "تهران",
+        "Street": "خیابان انقلاب", "children_of_registre": CHILDREN,
+    }).json()["RegisterID"]
+    client.post(f"/edit-good/{needy}", json=[{"TypeGood": "سبد غذایی", "NumberGood": n, "GivenBy": 1}
+                                             for n in range(1, 51)])
+
+    for path in ("/find-needy", "/find-admin", "/admins", f"/get-needy/{needy}", f"/get-goods/{needy}"):
+        response = client.get(path)
+        assert response.status_code < 300, response.text
+        print(f"{path}: {len(response.content) / 1024:.1f} KiB")
+        print(summarize(path, timed(lambda: client.get(path), args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Latency of /signup-register for households with 0, 5 and 20 children.
+
+    python -m benchmarks.bench_signup --requests 200
+"""
+import itertools
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+
+
+def main():
+    args = parse_args(__doc__, requests=(int, 200, "signups per household size"))
+    use_database(args.database_url)
+    client = make_client()
+    client.post("/signup-admin", json={"FirstName": "bench", "LastName": "admin", "Password": "x"})
+    phones = (f"0913{i:07d}" for i in itertools.count())
+
+    for children in (0, 5, 20):
+        def signup():
+            response = client.post("/signup-register", json={
+                "FirstName": "نام",
+                "LastName": "خانواده",
+                "Phone": next(phones),
+                "children_of_registre": [{"FirstName": "فرزند", "Age": "۷"}] * children,
+                "goods_of_registre": [{"TypeGood": "برنج", "NumberGood": 1}],
+            })
+            assert response.status_code == 201, response.text
+
+        print(summarize(f"signup children={children}", timed(signup, args.requests)))
+
+
+if __name__ == "__main__":
+    main()
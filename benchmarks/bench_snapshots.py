@@ -0,0 +1,43 @@
+"""
+Latency and transfer size of the whole-map /find-needy served from the
+precompressed snapshot, per Accept-Encoding, next to the same request
+rebuilt from the database every time (response cache off in both).
+
+    python -m benchmarks.bench_snapshots --registers 50000
+"""
+import os
+
+from benchmarks._common import make_client, parse_args, summarize, timed, use_database
+from benchmarks.bench_map_viewport import seed
+
+ENCODINGS = ("identity", "gzip")
+
+
+def main():
+    args = parse_args(__doc__, registers=(int, 50000, "geolocated registers to seed"),
+                      requests=(int, 30, "requests per case"))
+    use_database(args.database_url)
+    os.environ["CACHE_ENABLED"] = "false"
+    client = make_client()
+    seed(args.registers)
+
+    from src.core.snapshots import snapshot_store
+
+    snapshot_store.enabled = False
+    headers = {"Accept-Encoding": "identity"}
+    print(summarize("query + encode", timed(lambda: client.get("/find-needy", headers=headers), args.requests)))
+
+    snapshot_store.enabled = True
+    client.get("/find-needy")  # builds the snapshot
+    sizes = snapshot_store.stats()["snapshots"]["needy"]
+    for coding in ENCODINGS:
+        headers = {"Accept-Encoding": coding}
+        response = client.get("/find-needy", headers=headers)
+        assert response.headers.get("content-encoding", "identity") == coding, response.headers
+        print(f"snapshot {coding}: {sizes[coding] / 1024:.1f} KiB on the wire")
+        print(summarize(f"snapshot {coding}", timed(lambda: client.get("/find-needy", headers=headers),
+                                                    args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Read/write throughput on a SQLite file with SQLite's default settings
+versus the connection PRAGMAs of src.config.database (WAL,
+synchronous=NORMAL, mmap, cache size, in-memory temp store).
+
+Each configuration runs in a fresh interpreter on a fresh database file:
+`--readers` threads look up random households and read the stats
+counters while `--writers` threads insert households one commit at a
+time, for `--duration` seconds.
+
+    python -m benchmarks.bench_sqlite_concurrency --readers 8 --writers 2 --duration 10
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks._common import parse_args
+
+CONFIGURATIONS = {
+    "sqlite defaults": {"SQLITE_PRAGMAS": "false"},
+    "pragmas": {"SQLITE_PRAGMAS": "true"},
+}
+
+
+def run_workload(readers: int, writers: int, duration: float, rows: int) -> dict:
+    from sqlalchemy import select
+    from sqlalchemy.exc import OperationalError
+
+    from benchmarks.bench_map_viewport import seed
+    from src.config.database import SessionLocal, engine
+    from src.core import stats
+    from src.core.households import insert_households
+    from src.core.models import Base
+    from src.core.models.register import Register
+    from src.core.models.stats import StatDimension
+
+    Base.metadata.create_all(engine)
+    seed(rows)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def count(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def reader(number: int) -> None:
+        rng = random.Random(number)
+        db = SessionLocal()
+        try:
+            while time.perf_counter() < stop:
+                try:
+                    db.execute(select(Register).where(Register.RegisterID == rng.randint(1, rows))).first()
+                    stats.read_counters(db, StatDimension.RegisterProvince)
+                    db.commit()  # end the read transaction, as a request does
+                    count("reads")
+                except OperationalError:
+                    db.rollback()
+                    count("errors")
+        finally:
+            db.close()
+
+    def writer(number: int) -> None:
+        rng = random.Random(number)
+        db = SessionLocal()
+        written = 0
+        try:
+            while time.perf_counter() < stop:
+                written += 1
+                try:
+                    insert_households(db, [{"FirstName": "نام", "LastName": "خانواده",
+                                            "Phone": f"099{number}{written:07d}",
+                                            "Province": rng.choice(["تهران", "فارس", "گیلان"])}])
+                    db.commit()
+                    count("writes")
+                except OperationalError:
+                    db.rollback()
+                    count("errors")
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {key: value / elapsed if key != "errors" else value for key, value in counts.items()}
+
+
+def main():
+    args = parse_args(__doc__, readers=(int, 8, "reader threads"), writers=(int, 2, "writer threads"),
+                      duration=(float, 10, "seconds per configuration"), rows=(int, 5000, "households to seed"),
+                      child=(str, None, "internal: run one configuration in this process"))
+    if args.child is not None:
+        print(json.dumps(run_workload(args.readers, args.writers, args.duration, args.rows)))
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.duration:.0f}s")
+    for name, overrides in CONFIGURATIONS.items():
+        database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+        env = {**os.environ, **overrides, "DATABASE_URL": database_url, "CACHE_ENABLED": "false",
+               "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_sqlite_concurrency", "--child", name,
+                              "--readers", str(args.readers), "--writers", str(args.writers),
+                              "--duration", str(args.duration), "--rows", str(args.rows)],
+                             env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{name:<16} reads={result['reads']:9.1f}/s writes={result['writes']:8.1f}/s "
+              f"errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Cold start of the app, each sample in a fresh interpreter:
+
+- import: wall time of `import src.main`, and the modules it pulls in
+  that cost the most according to `python -X importtime`
+- openapi: the first /openapi.json request
+- ready: from spawning `uvicorn src.main:app` until GET / returns 200,
+  with and without the startup warm-up (WARM_ON_STARTUP)
+- first map: the first /find-needy request once the server is ready
+
+    python -m benchmarks.bench_startup --runs 10 --top 15 --rows 20000
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+from benchmarks._common import parse_args, use_database
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(src.main.app)
+t = time.perf_counter()
+assert client.get("/openapi.json").status_code == 200
+print(json.dumps({"import": imported - start, "openapi": time.perf_counter() - t}))
+"""
+
+
+def probe(env) -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE], env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def import_times(env) -> dict:
+    """Cumulative import time in seconds of each top-level package imported by `import src.main`."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.main"], env=env, check=True,
+                         capture_output=True, text=True).stderr
+    totals = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        # direct children of the interpreter's import: two spaces of indent at most
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            totals[name.strip()] = totals.get(name.strip(), 0) + int(cumulative) / 1e6
+    return totals
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_probe(env, timeout: float = 60) -> dict:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+                               "--log-level", "warning"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        ready = time.perf_counter() - start
+                        break
+            except OSError:
+                time.sleep(0.005)
+        else:
+            raise RuntimeError("server did not answer within %ss" % timeout)
+        t = time.perf_counter()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/find-needy", timeout=timeout) as response:
+            response.read()
+        return {"ready": ready, "first map": time.perf_counter() - t}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _report(label: str, values) -> None:
+    print(f"{label:<24} median={statistics.median(values) * 1000:8.1f}ms min={min(values) * 1000:8.1f}ms")
+
+
+def main():
+    args = parse_args(__doc__, runs=(int, 10, "fresh interpreters to start"),
+                      top=(int, 15, "most expensive imports to list"),
+                      rows=(int, 0, "needy households to seed first"))
+    use_database(args.database_url)
+    from benchmarks._common import make_client
+    from benchmarks.bench_map_viewport import seed
+    make_client()  # creates the tables
+    if args.rows:
+        seed(args.rows)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+
+    samples = [probe(env) for _ in range(args.runs)]
+    for key in ("import", "openapi"):
+        _report(key, [sample[key] for sample in samples])
+    for warm in ("true", "false"):
+        served = [serve_probe({**env, "WARM_ON_STARTUP": warm}) for _ in range(args.runs)]
+        for key in ("ready", "first map"):
+            _report(f"{key} (warm-up {'on' if warm == 'true' else 'off'})", [sample[key] for sample in served])
+
+    by_module = defaultdict(list)
+    for _ in range(args.runs):
+        for name, seconds in import_times(env).items():
+            by_module[name].append(seconds)
+    medians = {name: statistics.median(values) for name, values in by_module.items()}
+    print(f"\n-X importtime, median cumulative ms (src.main total {medians.get('src.main', 0) * 1000:.1f}ms)")
+    for name, seconds in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+        if name != "src.main":
+            print(f"  {name:<32} {seconds * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Peak Python memory, time to first byte and total time of /find-needy as one
+JSON array versus NDJSON streaming. The app is driven directly over ASGI
+and body chunks are discarded as they arrive, so only server-side memory
+is measured.
+
+    python -m benchmarks.bench_streaming --registers 50000
+"""
+import asyncio
+import os
+import time
+import tracemalloc
+
+from benchmarks._common import make_client, parse_args, use_database
+from benchmarks.bench_map_viewport import seed
+
+
+async def measure(app, path: str, headers=()):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(k.encode(), v.encode()) for k, v in headers],
+        "client": ("bench", 1), "server": ("bench", 80),
+    }
+    received = {"bytes": 0, "first": None}
+    requested = False
+    done = asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        # Like a server: the empty body once, then nothing until the response ends
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if received["first"] is None:
+                received["first"] = time.perf_counter() - start
+            received["bytes"] += len(message["body"])
+
+    tracemalloc.start()
+    await app(scope, receive, send)
+    done.set()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return received["first"], time.perf_counter() - start, peak, received["bytes"]
+
+
+def main():
+    args = parse_args(__doc__, registers=(int, 50000, "geolocated registers to seed"))
+    use_database(args.database_url)
+    os.environ["CACHE_ENABLED"] = "false"
+    os.environ["SNAPSHOTS_ENABLED"] = "false"
+    client = make_client()
+    seed(args.registers)
+
+    for label, headers in (("json array", ()), ("ndjson", (("accept", "application/x-ndjson"),))):
+        first, total, peak, size = asyncio.run(measure(client.app, "/find-needy", headers))
+        print(f"{label:<12} ttfb={first * 1000:8.1f}ms total={total * 1000:8.1f}ms "
+              f"peak={peak / 2 ** 20:7.1f}MiB body={size / 2 ** 20:6.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 
 from ..config.authentication import authenticate
 
-router = APIRouter(dependencies=[Depends(authenticate)])
+# orjson writes UTF-8 directly; with a response_model FastAPI also skips jsonable_encoder
+router = APIRouter(dependencies=[Depends(authenticate)], default_response_class=ORJSONResponse)
 
-from . import admin, register, good, message
+from . import admin, register, good, message, system
 
 
 
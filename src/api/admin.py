@@ -1,42 +1,74 @@
-import bcrypt
-from fastapi import Body, Depends, HTTPException
+from fastapi import Body, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from sqlalchemy import func, literal, case, cast, Float
+from typing import Optional, List, Union
+from sqlalchemy import func, literal, select
 
 from src.api import router
-from src.config.database import create_session
+from src.config.database import create_async_session, create_session, reads_replica
 from src.core.models.admin import Admin, AdminCreate, AdminOut, UserRoleEnum
 from src.core.models.good import Good
 from src.core.models.register import Register, RegisterCreate
+from src.core.models.stats import StatDimension
+from src.core import stats
+from src.core.cache import response_cache
+from src.core.geo import BoundingBox, viewport
+from src.core.pagination import PageParams, page, page_params, paginate
+from src.core.streaming import ndjson_response, wants_ndjson
+from src.core.clusters import ADMINS, CLUSTER_MAX_ZOOM, MAX_ZOOM, clusters, point_page_params, points_page
+from src.core.passwords import PasswordPoolFull, needs_rehash, password_hasher
+from src.core.token_generator import token_issuer
 
 
+class AdminPage(BaseModel):
+    items: List[AdminOut]
+    next_cursor: Optional[str] = None
+
 class AdminLogin(BaseModel):
     Username: Optional[str] = None
     Password: Optional[str] = None
 
-# Map point response model for location endpoints
+# Map point response model for location endpoints; admins without a position are listed too
 class MapPoint(BaseModel):
-    id: str
-    lat: float
-    lng: float
+    id: int
+    lat: Optional[float] = None
+    lng: Optional[float] = None
     name: Optional[str] = None
     info: Optional[str] = None
+    phone: Optional[str] = None
+    role: Optional[UserRoleEnum] = None
+
+
+class MapPointPage(BaseModel):
+    items: List[MapPoint]
+    next_cursor: Optional[str] = None
+
+
+async def _password_pool(call):
+    """Await a password_hasher call; 503 while the pool is saturated."""
+    try:
+        return await call
+    except PasswordPoolFull:
+        raise HTTPException(status_code=503, detail="سرور مشغول است، لطفا دوباره تلاش کنید",
+                            headers={"Retry-After": "1"})
 
 
+# async: waiting for the password hash holds neither the event loop nor a threadpool slot
 @router.post("/signup-admin", status_code=201, response_model=AdminOut)
-def signup_admin(
+async def signup_admin(
         user_data: AdminCreate | None = Body(None),
-        db: Session = Depends(create_session)
+        db: AsyncSession = Depends(create_async_session)
 ):
     if user_data.Phone is not None and user_data.Phone != "":
-        radmin: Admin = db.query(Admin).filter(Admin.Phone == user_data.Phone).first()
+        radmin: Admin = await db.scalar(select(Admin).where(Admin.Phone == user_data.Phone).limit(1))
         if radmin is not None:
             raise HTTPException(status_code=409, detail="نماینده با این شماره تلفن قبلا ثبت نام کرده است")
     payload = user_data.dict() if user_data else {}
+    if payload.get("Password") is not None:
+        payload["Password"] = await _password_pool(password_hasher.hash(payload["Password"]))
     admin: Admin = Admin(**payload)
-    return admin.create_admin(db)
+    return await db.run_sync(admin.create_admin)
 
 ## delete admin
 @router.delete("/delete-admin/{admin_id}", status_code=200, response_model=AdminOut)
@@ -57,53 +89,55 @@ def delete_admin(
     return admin.delete_admin(db)
 
 @router.post("/edit-admin/{admin_id}", response_model=AdminOut)
-def edit_admin(
+async def edit_admin(
         admin_id: int,
         user_data: AdminCreate | None = Body(None),
-        db: Session = Depends(create_session)
+        db: AsyncSession = Depends(create_async_session)
 ):
-    admin :Admin = db.query(Admin).filter(Admin.AdminID == admin_id).first()
+    admin: Admin = await db.scalar(select(Admin).where(Admin.AdminID == admin_id))
     if not admin:
         raise HTTPException(status_code=404, detail="نماینده پیدا نشد")
-    else:
-        return admin.edit_admin(db_session=db, user_data=user_data or AdminCreate())
+    user_data = user_data or AdminCreate()
+    if user_data.Password is not None:
+        user_data = user_data.model_copy(
+            update={"Password": await _password_pool(password_hasher.hash(user_data.Password))})
+    return await db.run_sync(lambda session: admin.edit_admin(db_session=session, user_data=user_data))
 
 @router.post("/login", status_code=200)
-def login_admin(
+async def login_admin(
         user_data: AdminLogin | None = Body(None),
-        db: Session = Depends(create_session)
+        db: AsyncSession = Depends(create_async_session)
 ):
     if not user_data or not user_data.Username:
         raise HTTPException(status_code=401, detail="شماره همراه اشتباه است")
-    admin: Admin = db.query(Admin).filter(Admin.Phone == user_data.Username).first()
+    admin: Admin = await db.scalar(select(Admin).where(Admin.Phone == user_data.Username).limit(1))
     if not admin:
         ## error in farsi
         raise HTTPException(status_code=401, detail="شماره همراه اشتباه است")
-    if not user_data.Password or user_data.Password != admin.Password:
+    if not await _password_pool(password_hasher.verify(user_data.Password, admin.Password)):
         raise HTTPException(status_code=401, detail="رمز عبور اشتباه است")
+    if needs_rehash(admin.Password):
+        # plain-text password from before hashing, or a hash with an old cost
+        admin.Password = await _password_pool(password_hasher.hash(user_data.Password))
+        await db.commit()
     name = f"{admin.FirstName or ''} {admin.LastName or ''}".strip() or None
     return {
         "adminID": admin.AdminID,
         "name": name,
         "userRole": admin.UserRole,
+        # send as `Authorization: Bearer <accessToken>`
+        "accessToken": token_issuer.issue(admin.AdminID, admin.UserRole),
+        "tokenType": "bearer",
+        "expiresIn": token_issuer.ttl,
     }
 
 
 @router.get("/info-admin")
+@response_cache.cached("admin")
 def info_admin_stats(
         db: Session = Depends(create_session)
 ):
-    counts = (
-        db.query(
-            func.coalesce(
-                func.sum(case((Admin.UserRole == UserRoleEnum.GroupAdmin, 1), else_=0)), 0
-            ).label("numberGroupAdminPersons"),
-            func.coalesce(
-                func.sum(case((Admin.UserRole == UserRoleEnum.Admin, 1), else_=0)), 0
-            ).label("numberAdminPersons"),
-        )
-        .one()
-    )
+    roles = stats.read_counters(db, StatDimension.AdminRole)[StatDimension.AdminRole]
 
     last_admin = (
         db.query(Admin.FirstName, Admin.LastName, Admin.CreatedDate)
@@ -130,27 +164,51 @@ def info_admin_stats(
     )
 
     return {
-        "numberGroupAdminPersons": counts.numberGroupAdminPersons or 0,
-        "numberAdminPersons": counts.numberAdminPersons or 0,
+        "numberGroupAdminPersons": roles.get(UserRoleEnum.GroupAdmin, 0),
+        "numberAdminPersons": roles.get(UserRoleEnum.Admin, 0),
         "LastAdminCreatedTime": last_admin.CreatedDate if last_admin else None,
         "LastAdminNameCreated": last_name_admin or None,
         "LastGroupAdminCreatedTime": last_group_admin.CreatedDate if last_group_admin else None,
         "LastGroupAdminNameCreated": last_name_group_admin or None,
     }
 
-@router.get("/admins", status_code=200, response_model=List[AdminOut])
-def list_admins(
-        db: Session = Depends(create_session)
+@router.get("/admins", status_code=200, response_model=Union[List[AdminOut], AdminPage])
+@response_cache.cached("admin")
+async def list_admins(
+        params: PageParams = Depends(page_params),
+        db: AsyncSession = Depends(create_async_session)
 ):
-    return db.query(Admin).all()
+    # cache plain models, not session-bound ORM instances
+    admins = [AdminOut.model_validate(admin) for admin in await db.scalars(paginate(select(Admin), Admin.AdminID, params))]
+    return page(admins, "AdminID", params) if params.paginated else admins
 
-@router.get("/find-admin")
-def find_admin(
-        db: Session = Depends(create_session)
+@router.get("/find-admin", response_model=Union[List[MapPoint], MapPointPage])
+@response_cache.cached("admin")
+async def find_admin(
+        bbox: BoundingBox = Depends(viewport),
+        params: PageParams = Depends(page_params),
+        ndjson: bool = Depends(wants_ndjson),
+        db: AsyncSession = Depends(create_async_session)
+):
+    if ndjson:
+        return ndjson_response(_admin_map_statement(bbox, params), replica=reads_replica(db), params=params)
+    rows = await _admin_map_points(db, bbox, params)
+    return page(rows, "id", params) if params.paginated else rows
+
+@router.get("/find-admin-clusters")
+async def find_admin_clusters(
+        zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+        bbox: BoundingBox = Depends(viewport),
+        params: PageParams = Depends(page_params),
+        db: AsyncSession = Depends(create_async_session)
 ):
-    bind = db.get_bind()
-    is_pg = bind.dialect.name == "postgresql"
+    if zoom >= CLUSTER_MAX_ZOOM:
+        params = point_page_params(bbox, params)
+        return points_page(zoom, await _admin_map_points(db, bbox, params), params)
+    # the cell grid helpers are sync; run_sync runs them on this session's async connection
+    return await db.run_sync(clusters, ADMINS, zoom, bbox)
 
+def _admin_map_statement(bbox: BoundingBox, params: PageParams = PageParams()):
     name_expr = func.nullif(
         func.trim(
             func.concat(
@@ -172,30 +230,31 @@ def find_admin(
         ),
         "",
     ).label("info")
-    lat_expr = cast(func.trim(Admin.Latitude), Float).label("lat")
-    lng_expr = cast(func.trim(Admin.Longitude), Float).label("lng")
-
     query = (
-        db.query(
+        select(
             Admin.AdminID.label("id"),
-            lat_expr,
-            lng_expr,
+            Admin.LatitudeValue.label("lat"),
+            Admin.LongitudeValue.label("lng"),
             name_expr,
             info_expr,
             Admin.Phone.label("phone"),
             Admin.UserRole.label("role"),
         )
     )
+    if not bbox.is_unbounded:
+        query = bbox.apply(query.filter(Admin.LatitudeValue.isnot(None), Admin.LongitudeValue.isnot(None)),
+                           Admin.LatitudeValue, Admin.LongitudeValue)
+    return paginate(query, Admin.AdminID, params)
 
-    rows = db.execute(query.statement).mappings().all()
-    return rows
+async def _admin_map_points(db: AsyncSession, bbox: BoundingBox, params: PageParams = PageParams()):
+    return (await db.execute(_admin_map_statement(bbox, params))).mappings().all()
 
-@ router.get("/get-admin/{admin_id}")
-def get_admin(
+@ router.get("/get-admin/{admin_id}", response_model=Optional[AdminOut])
+async def get_admin(
         admin_id: int,
-        db: Session = Depends(create_session)
+        db: AsyncSession = Depends(create_async_session)
 ):
-    admin: Admin = db.query(Admin).filter(Admin.AdminID == admin_id).first()
+    admin: Admin = await db.scalar(select(Admin).where(Admin.AdminID == admin_id).limit(1))
     return admin
 
 
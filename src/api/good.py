@@ -2,15 +2,20 @@ from datetime import datetime, timezone
 import random
 from warnings import catch_warnings
 
-import requests
 import json
 from fastapi import Body, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import BaseModel, field_validator
 from src.api import router
 from src.config.database import create_session
-from src.core.models.good import Good
+from src.core.conditional import conditional
+from src.core.models.good import Good, GoodOut
+from src.core.pagination import PageParams, page, page_params, paginate
+
+class GoodPage(BaseModel):
+    items: List[GoodOut]
+    next_cursor: Optional[str] = None
 
 # Strict input models enforcing required NumberGood as integer
 class _GoodNumberMixin(BaseModel):
@@ -48,16 +53,18 @@ class GoodEditItem(_GoodNumberMixin):
 class GoodCreateStrict(_GoodNumberMixin):
     pass
 
-@router.get("/get-goods/{register_id}", status_code=201)
+@router.get("/get-goods/{register_id}", status_code=201, response_model=Union[List[GoodOut], GoodPage],
+            dependencies=[conditional("good")])
 def get_good(
         register_id: int,
+        params: PageParams = Depends(page_params),
         db: Session = Depends(create_session)
 ):
-    goods = db.query(Good).filter(Good.GivenToWhome == register_id).all()
-    return goods
+    goods = paginate(db.query(Good).filter(Good.GivenToWhome == register_id), Good.GoodID, params).all()
+    return page(goods, "GoodID", params) if params.paginated else goods
 
 
-@router.post("/edit-good/{register_id}")
+@router.post("/edit-good/{register_id}", response_model=List[GoodOut])
 def edit_good(
         register_id: int,
         user_data: Union[GoodEditItem, List[GoodEditItem]] | None = Body(None),
@@ -113,7 +120,7 @@ def edit_good(
     return updated_goods
 
 
-@router.post("/add-good")
+@router.post("/add-good", response_model=GoodOut)
 def add_good(
         user_data: GoodCreateStrict | None = Body(None),
         db: Session = Depends(create_session)
@@ -149,6 +156,8 @@ def send_sms_service(phone_number, sms_code):
         'destination': phone_number,
         'message': message
     }
+    import requests  # only needed here; kept off the startup import path
+
     try:
         # ارسال درخواست POST
         response = requests.post(url, data=data, timeout=30)
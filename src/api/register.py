@@ -1,26 +1,76 @@
-from datetime import datetime, timezone
-import re
-import unicodedata
-from fastapi import Body, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional, List, Counter
-from pydantic import BaseModel
-from sqlalchemy import func, literal, cast, Float
+import logging
+
+from fastapi import Body, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Optional, List, Union
+from pydantic import BaseModel, Field
+from sqlalchemy import func, literal, insert, select
+from sqlalchemy.exc import IntegrityError
 from src.api import router
-from src.config.database import create_session
+from src.config.database import create_async_session, create_session, reads_replica
+from src.core import register_stats as register_stats_queries, stats
+from src.core.households import child_rows, good_rows
+from src.core.cache import response_cache
+from src.core.conditional import aconditional
+from src.core.snapshots import snapshot_store
+from src.core.geo import BoundingBox, viewport
+from src.core.pagination import PageParams, page, page_params, paginate
+from src.core.streaming import ndjson_response, wants_ndjson
+from src.core.nearest import nearest_registers
+from src.core.clusters import CLUSTER_MAX_ZOOM, DISCONNECTED_NEEDY, MAX_ZOOM, NEEDY, clusters, point_page_params, \
+    points_page
+from src.core.bulk_import import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, ImportReport, import_chunk, iter_csv_records, \
+    iter_jsonl_records, iter_lines
 from src.core.models.good import Good
-from src.core.models.register import Register, RegisterCreate, ChildrenOfRegister, \
-    ChildrenOfRegisterCreate
-from src.core.models.admin import Admin
+from src.core.models.register import Register, RegisterCreate, RegisterOut, ChildrenOfRegister, \
+    ChildrenOfRegisterCreate, ChildrenOfRegisterOut
+from src.core.models.admin import Admin, fallback_admin_id, reset_fallback_admin_id
+from src.core.models.stats import StatDimension
+from src.core.util import normalize_phone
 from src.objModel import RegisterCreateWithChildren
 
+logger = logging.getLogger(__name__)
+
+DUPLICATE_PHONE_DETAIL = "مددجو با این شماره تلفن قبلا ثبت نام کرده است"
+MAX_NEAREST = 200
+MAP_TABLES = ("admin", "register")
+
+
+def _is_duplicate_phone(error: IntegrityError) -> bool:
+    # Both SQLite and Postgres name the violated column/index in the message
+    return "PhoneNormalized" in str(error.orig)
+
 
 class MapPoint(BaseModel):
-    id: str
+    id: int
+    lat: float
+    lng: float
+    name: Optional[str] = None
+    group_name: Optional[str] = None
+    info: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class MapPointPage(BaseModel):
+    items: List[MapPoint]
+    next_cursor: Optional[str] = None
+
+
+class NearestNeedy(BaseModel):
+    id: int
     lat: float
     lng: float
     name: Optional[str] = None
     info: Optional[str] = None
+    phone: Optional[str] = None
+    is_disconnected: bool
+    distanceKm: float
+
+
+class NeedyOut(RegisterOut):
+    children: List[ChildrenOfRegisterOut] = Field(default=[], validation_alias="children_of_reg")
 
 
 def _normalize_digit_string(value: str):
@@ -29,74 +79,90 @@ def _normalize_digit_string(value: str):
     return value.translate(str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789'))
 
 
-@router.post("/signup-register", status_code=201)
+@router.post("/signup-register", status_code=201, response_model=RegisterOut)
 def signup_register(
         user_data: RegisterCreateWithChildren | None = Body(None),
         db: Session = Depends(create_session)
 ):
     if not user_data:
         raise HTTPException(status_code=400, detail="Payload required")
-    if user_data.Phone is not None and user_data.Phone != "":
-        normalized_user_phone = _normalize_digit_string(user_data.Phone)
-        all_registers = db.query(Register).all()
-        for register in all_registers:
-            if register.Phone:
-                normalized_db_phone = _normalize_digit_string(register.Phone)
-                if normalized_user_phone == normalized_db_phone:
-                    raise HTTPException(status_code=409, detail="مددجو با این شماره تلفن قبلا ثبت نام کرده است")
+    normalized_phone = normalize_phone(user_data.Phone)
+    if normalized_phone is not None:
+        # Point lookup on the unique PhoneNormalized index
+        duplicate = db.query(Register.RegisterID).filter(Register.PhoneNormalized == normalized_phone).first()
+        if duplicate is not None:
+            raise HTTPException(status_code=409, detail=DUPLICATE_PHONE_DETAIL)
 
     payload = user_data.dict()
     children_data = payload.pop("children_of_registre", None)
     goods_data = payload.pop("goods_of_registre", None)
 
-    # 1. Create parent first (use existing helper method for consistency)
+    # The whole household is written in one transaction: a failure leaves nothing behind
     register = Register(**payload)
-    register = register.create_register(db)  # assumes this commits & refreshes
+    db.add(register)
+    try:
+        db.flush()  # assigns RegisterID; CreatedDate comes back through eager defaults
+    except IntegrityError as e:
+        db.rollback()
+        if _is_duplicate_phone(e):
+            # A concurrent signup won the race on the unique phone index
+            raise HTTPException(status_code=409, detail=DUPLICATE_PHONE_DETAIL)
+        raise
 
-    # 2. Now persist children with correct FK
     if children_data:
         try:
-            for child in children_data:
-                # Remove any incoming incorrect keys
-                child.pop("ChildrenOfRegisterID", None)
-                child["RegisterID"] = register.RegisterID  # enforce FK
-                # Normalize Age (Persian digits -> int or None)
-                if "Age" in child:
-                    age_val = child.get("Age")
-                    if isinstance(age_val, str):
-                        norm = _normalize_digit_string(age_val).strip()
-                        if norm.isdigit():
-                            child["Age"] = int(norm)
-                        elif norm == "":
-                            child["Age"] = None
-                child_obj = ChildrenOfRegister(**child)
-                db.add(child_obj)
-            db.commit()
+            db.execute(insert(ChildrenOfRegister), child_rows(register.RegisterID, children_data))
         except Exception:
             db.rollback()
-            # Optional: could also delete the parent if atomicity across parent/children is required
             raise HTTPException(status_code=500, detail="خطا در ثبت فرزندان")
 
     if goods_data:
-        ## get an admin_id
-        admin_id = db.query(Admin.AdminID).first()[0]
+        given_by = register.UnderWhichAdmin or fallback_admin_id(db)
         try:
-            for good in goods_data:
-                good["GivenToWhome"] = register.RegisterID
-                good["UpdatedDate"] = datetime.now(timezone.utc)
-                good["GivenBy"] = register.UnderWhichAdmin if register.UnderWhichAdmin else admin_id
-                good_obj = Good(**good)
-                db.add(good_obj)
-            db.commit()
-
-        except Exception as e:
+            db.execute(insert(Good), good_rows(register.RegisterID, given_by, goods_data))
+        except Exception:
             db.rollback()
-            print(f"Error in goods registration: {str(e)}")  # Move print before raise
+            reset_fallback_admin_id()  # the cached admin may have been deleted by another worker
+            logger.exception("Error in goods registration")
             raise HTTPException(status_code=500, detail=  "خطا در ثبت کمک ها")
 
+    # Keep the flushed state for the response instead of re-selecting it after commit
+    db.expire_on_commit = False
+    db.commit()
     return register
 
 
+@router.post("/import-registers", response_model=ImportReport)
+async def import_registers(
+        request: Request,
+        format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+        chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+        db: Session = Depends(create_session)
+):
+    """
+    Bulk import households from a streamed CSV (header row) or JSONL body.
+    Rows are validated like /signup-register and written chunk by chunk,
+    each chunk in its own transaction; invalid rows are listed in the report.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "jsonl"
+    lines = iter_lines(request.stream())
+    records = iter_csv_records(lines) if format == "csv" else iter_jsonl_records(lines)
+
+    report = ImportReport()
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            await run_in_threadpool(import_chunk, db, chunk, report)
+            chunk = []
+    if chunk:
+        await run_in_threadpool(import_chunk, db, chunk, report)
+    report.errors.sort(key=lambda error: error.row)
+    return report
+
+
 @router.post("/signup-child-register", status_code= 201)
 def signup_child_register(
         user_data: ChildrenOfRegisterCreate | None = Body(None),
@@ -122,7 +188,7 @@ def signup_child_register(
     return register
 
 
-@router.post("/edit-needy/{register_id}")
+@router.post("/edit-needy/{register_id}", response_model=RegisterOut)
 def edit_register(
         register_id: int,
         user_data: RegisterCreateWithChildren | None = Body(None),
@@ -138,7 +204,13 @@ def edit_register(
     if not register:
         raise HTTPException(status_code=404, detail="مدد جو پیدا نشد")
     else:
-        return register.edit_register(db_session=db, user_data=user_data or RegisterCreate())
+        try:
+            return register.edit_register(db_session=db, user_data=user_data or RegisterCreate())
+        except IntegrityError as e:
+            db.rollback()
+            if _is_duplicate_phone(e):
+                raise HTTPException(status_code=409, detail=DUPLICATE_PHONE_DETAIL)
+            raise
 
 
 @router.delete("/delete-needy/{register_id}", status_code=200)
@@ -160,14 +232,7 @@ def delete_child_register(
         db.query(ChildrenOfRegister).filter(ChildrenOfRegister.ChildrenOfRegisterID == register_id).delete()
         db.commit()
 
-## find needy people with lat and lng
-@router.get("/find-needy")
-def find_needy(
-        db: Session = Depends(create_session)
-):
-    bind = db.get_bind()
-    is_pg = bind.dialect.name == "postgresql"
-
+def _needy_map_statement(disconnected: bool, bbox: BoundingBox, params: PageParams = PageParams()):
     needy_name_expr = func.nullif(
         func.trim(
             func.concat(
@@ -203,120 +268,131 @@ def find_needy(
         "",
     ).label("info")
 
-    lat_expr = cast(func.trim(Register.Latitude), Float).label("lat")
-    lng_expr = cast(func.trim(Register.Longitude), Float).label("lng")
-
+    # LatitudeValue/LongitudeValue are NULL unless the text columns hold a plain number
     query = (
-        db.query(
+        select(
             Register.RegisterID.label("id"),
-            lat_expr,
-            lng_expr,
+            Register.LatitudeValue.label("lat"),
+            Register.LongitudeValue.label("lng"),
             needy_name_expr,
             group_name_expr,
             info_expr,
             Register.Phone.label('phone')
         ).join(Admin, Admin.AdminID == Register.UnderWhichAdmin, isouter=True)
         .filter(
-            Register.Latitude.isnot(None),
-            Register.Latitude != "",
-            Register.Longitude.isnot(None),
-            Register.Longitude != "",
-            Register.is_disconnected == False
+            Register.is_disconnected == disconnected,
+            Register.LatitudeValue.isnot(None),
+            Register.LongitudeValue.isnot(None),
         )
     )
+    query = bbox.apply(query, Register.LatitudeValue, Register.LongitudeValue)
+    return paginate(query, Register.RegisterID, params)
 
-    if is_pg:
-        # Filter numeric values using Postgres regex to avoid cast errors
-        query = query.filter(
-            Register.Latitude.op("~")(r"^\s*[+-]?\d+(\.\d+)?\s*$"),
-            Register.Longitude.op("~")(r"^\s*[+-]?\d+(\.\d+)?\s*$"),
-        )
+def _needy_map_points(db: Session, disconnected: bool, bbox: BoundingBox, params: PageParams = PageParams()):
+    return db.execute(_needy_map_statement(disconnected, bbox, params)).mappings().all()
 
-    rows = db.execute(query.statement).mappings().all()
-    return rows
+async def _needy_map_points_async(db: AsyncSession, disconnected: bool, bbox: BoundingBox,
+                                  params: PageParams = PageParams()):
+    return (await db.execute(_needy_map_statement(disconnected, bbox, params))).mappings().all()
 
-@router.get("/find-disconnected-needy")
-def find_needy(
+## find needy people with lat and lng
+@router.get("/find-needy", response_model=Union[List[MapPoint], MapPointPage],
+            dependencies=[aconditional("register", "admin")])
+@response_cache.cached("register", "admin")
+async def find_needy(
+        request: Request,
+        bbox: BoundingBox = Depends(viewport),
+        params: PageParams = Depends(page_params),
+        ndjson: bool = Depends(wants_ndjson),
+        db: AsyncSession = Depends(create_async_session)
+):
+    if snapshot_store.enabled and bbox.is_unbounded and not params.paginated and not ndjson:
+        return await snapshot_store.aresponse(request, db, "needy", MAP_TABLES,
+                                              lambda: _needy_map_points_async(db, disconnected=False, bbox=bbox))
+    if ndjson:
+        return ndjson_response(_needy_map_statement(disconnected=False, bbox=bbox, params=params),
+                               replica=reads_replica(db), headers=request.state.conditional_headers,
+                               params=params)
+    rows = await _needy_map_points_async(db, disconnected=False, bbox=bbox, params=params)
+    return page(rows, "id", params) if params.paginated else rows
+
+@router.get("/find-disconnected-needy", response_model=Union[List[MapPoint], MapPointPage],
+            dependencies=[aconditional("register", "admin")])
+@response_cache.cached("register", "admin")
+async def find_disconnected_needy(
+        request: Request,
+        bbox: BoundingBox = Depends(viewport),
+        params: PageParams = Depends(page_params),
+        ndjson: bool = Depends(wants_ndjson),
+        db: AsyncSession = Depends(create_async_session)
+):
+    if snapshot_store.enabled and bbox.is_unbounded and not params.paginated and not ndjson:
+        return await snapshot_store.aresponse(request, db, "disconnected_needy", MAP_TABLES,
+                                              lambda: _needy_map_points_async(db, disconnected=True, bbox=bbox))
+    if ndjson:
+        return ndjson_response(_needy_map_statement(disconnected=True, bbox=bbox, params=params),
+                               replica=reads_replica(db), headers=request.state.conditional_headers,
+                               params=params)
+    rows = await _needy_map_points_async(db, disconnected=True, bbox=bbox, params=params)
+    return page(rows, "id", params) if params.paginated else rows
+
+def warm_map_snapshots(db: Session) -> None:
+    """Build the full-map snapshots served by /find-needy and /find-disconnected-needy."""
+    if not snapshot_store.enabled:
+        return
+    for name, disconnected in (("needy", False), ("disconnected_needy", True)):
+        snapshot_store.warm(db, name, MAP_TABLES,
+                            lambda: _needy_map_points(db, disconnected=disconnected, bbox=BoundingBox()))
+
+## clustered needy map: grid clusters below CLUSTER_MAX_ZOOM, individual points from there on
+@router.get("/find-needy-clusters")
+async def find_needy_clusters(
+        zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+        disconnected: bool = False,
+        bbox: BoundingBox = Depends(viewport),
+        params: PageParams = Depends(page_params),
+        db: AsyncSession = Depends(create_async_session)
+):
+    if zoom >= CLUSTER_MAX_ZOOM:
+        params = point_page_params(bbox, params)
+        rows = await _needy_map_points_async(db, disconnected=disconnected, bbox=bbox, params=params)
+        return points_page(zoom, rows, params)
+    # the cell grid helpers are sync; run_sync runs them on this session's async connection
+    return await db.run_sync(clusters, DISCONNECTED_NEEDY if disconnected else NEEDY, zoom, bbox)
+
+
+## k nearest needy people around an admin or a point
+@router.get("/nearest-needy", response_model=List[NearestNeedy])
+def nearest_needy(
+        admin_id: Optional[int] = None,
+        lat: Optional[float] = Query(None, ge=-90, le=90),
+        lng: Optional[float] = Query(None, ge=-180, le=180),
+        k: int = Query(10, ge=1, le=MAX_NEAREST),
+        include_disconnected: bool = False,
+        not_given_days: Optional[int] = Query(None, ge=1),
+        max_distance_km: Optional[float] = Query(None, gt=0),
         db: Session = Depends(create_session)
 ):
-    bind = db.get_bind()
-    is_pg = bind.dialect.name == "postgresql"
-
-    needy_name_expr = func.nullif(
-        func.trim(
-            func.concat(
-                func.coalesce(Register.FirstName, ""),
-                literal(" "),
-                func.coalesce(Register.LastName, ""),
-            )
-        ),
-        "",
-    ).label("name")
-
-    group_name_expr = func.nullif(
-        func.trim(
-            func.concat(
-                func.coalesce(Admin.FirstName, ""),
-                literal(" "),
-                func.coalesce(Admin.LastName, ""),
-                literal(" "),
-                func.coalesce(Admin.City, ""),
-            )
-        ),
-        "",
-    ).label("group_name")
-
-    info_expr = func.nullif(
-        func.trim(
-            func.concat(
-                func.coalesce(Register.Street, ""),
-                literal(" "),
-                func.coalesce(Register.City, ""),
-            )
-        ),
-        "",
-    ).label("info")
-
-    lat_expr = cast(func.trim(Register.Latitude), Float).label("lat")
-    lng_expr = cast(func.trim(Register.Longitude), Float).label("lng")
-
-    query = (
-        db.query(
-            Register.RegisterID.label("id"),
-            lat_expr,
-            lng_expr,
-            needy_name_expr,
-            group_name_expr,
-            info_expr,
-            Register.Phone.label('phone')
-        ).join(Admin, Admin.AdminID == Register.UnderWhichAdmin, isouter=True)
-        .filter(
-            Register.Latitude.isnot(None),
-            Register.Latitude != "",
-            Register.Longitude.isnot(None),
-            Register.Longitude != "",
-            Register.is_disconnected == True
-        )
-    )
-
-    if is_pg:
-        # Filter numeric values using Postgres regex to avoid cast errors
-        query = query.filter(
-            Register.Latitude.op("~")(r"^\s*[+-]?\d+(\.\d+)?\s*$"),
-            Register.Longitude.op("~")(r"^\s*[+-]?\d+(\.\d+)?\s*$"),
-        )
-
-    disconnected_rows = db.execute(query.statement).mappings().all()
-    return disconnected_rows
-
+    if admin_id is not None:
+        admin: Admin = db.query(Admin).filter(Admin.AdminID == admin_id).first()
+        if not admin:
+            raise HTTPException(status_code=404, detail="نماینده پیدا نشد")
+        if admin.LatitudeValue is None or admin.LongitudeValue is None:
+            raise HTTPException(status_code=400, detail="موقعیت نماینده ثبت نشده است")
+        lat, lng = admin.LatitudeValue, admin.LongitudeValue
+    elif lat is None or lng is None:
+        raise HTTPException(status_code=400, detail="نماینده یا موقعیت (lat, lng) را مشخص کنید")
+    return nearest_registers(db, lat, lng, k, include_disconnected=include_disconnected,
+                             not_given_days=not_given_days, max_distance_km=max_distance_km)
 
 # stattistic of needy people
 @router.get("/info-needy")
+@response_cache.cached("register", "good")
 def info_needy(
         db: Session = Depends(create_session)
 ):
-    # Get total count of registers
-    total_count = db.query(func.count(Register.RegisterID)).scalar() or 0
+    # Total count of registers, from the maintained counter
+    total_count = stats.read_total(db)
 
     # Get last created register
     last_register = (
@@ -344,32 +420,27 @@ def info_needy(
         "GoodId": last_good.GoodID if last_good else None,
     }
 
-@ router.get("/get-needy/{register_id}")
-def get_needy(
+@ router.get("/get-needy/{register_id}", response_model=NeedyOut)
+async def get_needy(
         register_id: int,
-        db: Session = Depends(create_session)
+        db: AsyncSession = Depends(create_async_session)
 ):
-    needy: Register = db.query(Register).filter(Register.RegisterID == register_id).first()
+    # children are loaded up front: serialization cannot lazy-load through an AsyncSession
+    needy: Register = await db.scalar(
+        select(Register).options(selectinload(Register.children_of_reg)).where(Register.RegisterID == register_id))
     if not needy:
         raise HTTPException(status_code=404, detail="مددجو یافت نشد")
-
-    childNeedy: List[ChildrenOfRegister] = db.query(ChildrenOfRegister).filter(ChildrenOfRegister.RegisterID == register_id).all()
-    children_list = [child.__dict__ for child in childNeedy]
-
-    for child in children_list:
-        child.pop('_sa_instance_state', None)
-
-    return {
-        **needy.__dict__,
-        'children': children_list
-        }
+    return needy
 
 @router.post("/signin-needy", status_code=201)
 def signin_needy(
         user_data: RegisterCreate | None = Body(None),
         db: Session = Depends(create_session)
 ):
-    needy: Register = db.query(Register).filter(Register.Phone == user_data.Phone).first()
+    normalized_phone = normalize_phone(user_data.Phone) if user_data else None
+    needy: Register = None
+    if normalized_phone is not None:
+        needy = db.query(Register).filter(Register.PhoneNormalized == normalized_phone).first()
     if not needy:
         raise HTTPException(status_code=404, detail="شماره تلفن پیدا نشد")
     name = f"{needy.FirstName or ''} {needy.LastName or ''}".strip() or None
@@ -378,153 +449,27 @@ def signin_needy(
         "name": name,
     }
 
-@router.get("/register-stats")
-def register_stats(
-        db: Session = Depends(create_session)
+@router.get("/register-stats", dependencies=[aconditional("register", "good", "admin", "children_of_register")])
+@response_cache.cached("register", "good", "admin", "children_of_register")
+async def register_stats(
+        db: AsyncSession = Depends(create_async_session)
 ):
-    def normalize_label(s):
-        if not s:
-            return ''
-        # نرمال‌سازی یونیکد
-        s = unicodedata.normalize('NFKC', s)
-        # تبدیل حروف عربی به معادل فارسی
-        s = s.replace('ي', 'ی').replace('ك', 'ک')
-        # تبدیل NBSP و سایر فضاهای نامرئی به فاصله معمولی
-        s = s.replace('\u00A0', ' ').replace('\u200c', ' ')
-        # جایگزینی کاماها و انواع خط‌کِش با یک فاصله
-        # شامل: , و کامای فارسی '،' و hyphen و en-dash و em-dash و دیگر Varianten
-        s = re.sub(r'[,،\-\u2010-\u2015]+', ' ', s)
-        # حذف سایر علائم نقطه‌گذاری اگر خواستی (اختیاری)
-        # s = re.sub(r'[.:;()«»"\']+', '', s)
-        # فشرده‌سازی فاصلهٔ داخلی و حذف فاصلهٔ اول/آخر
-        s = re.sub(r'\s+', ' ', s).strip()
-        return s
-
-    # گرفتن تمام رجیسترها از دیتابیس
-    registers = db.query(Register).all()
-
-    # شمارش تعداد رجیسترها بر اساس admin name (not ID)
-    admin_counts_query = (
-        db.query(
-            func.concat(
-                func.coalesce(Admin.FirstName, ""),
-                literal(" "),
-                func.coalesce(Admin.LastName, "")
-            ).label("admin_name"),
-            func.count(Register.RegisterID).label("count")
-        )
-        .join(Admin, Register.UnderWhichAdmin == Admin.AdminID)
-        .group_by(Admin.AdminID, Admin.FirstName, Admin.LastName)
-        .all()
+    # the counter helpers are sync; run_sync runs them on this session's async connection
+    counters = await db.run_sync(
+        stats.read_counters,
+        StatDimension.RegisterAdmin,
+        StatDimension.RegisterProvince,
+        StatDimension.RegisterEducation,
+        StatDimension.GoodType,
+        StatDimension.RegisterChildren,
     )
-    admin_counts = {row.admin_name.strip() or f"Admin {idx}": row.count for idx, row in enumerate(admin_counts_query, 1)}
-
-    # شمارش تعداد رجیسترها بر اساس استان
-    province_counts = Counter(normalize_label(r.Province) for r in registers if normalize_label(r.Province))
-    # شمارش تعداد رجیسترها بر اساس سطح تحصیلات
-    education_level_counts = Counter(register.EducationLevel for register in registers)
-
-    # تعداد رجیسترها بر اساس TypeGood
-    type_good_counts = dict(
-        db.query(Good.TypeGood, func.count(Register.RegisterID))
-        .join(Register, Good.GivenToWhome == Register.RegisterID)
-        .group_by(Good.TypeGood)
-        .all()
+    admin_counts = {int(admin_id): count for admin_id, count in counters[StatDimension.RegisterAdmin].items()}
+    children_counts = {0: 0}
+    children_counts.update((int(k), v) for k, v in counters[StatDimension.RegisterChildren].items())
+    return register_stats_queries.chart_data(
+        admin_counts=await db.run_sync(register_stats_queries.admin_labels, admin_counts),
+        province_counts=counters[StatDimension.RegisterProvince],
+        education_level_counts=counters[StatDimension.RegisterEducation],
+        type_good_counts=counters[StatDimension.GoodType],
+        children_counts=dict(sorted(children_counts.items())),
     )
-
-    normalized_counts = Counter()
-    for typegood, cnt in type_good_counts.items():
-        norm = normalize_label(typegood)
-        if norm:  # یا شرطِ دیگری برای فیلتر کردن مقدارهای خالی
-            normalized_counts[norm] += cnt
-
-    ## x  number of children counts unique until max children we have for a registerID 0,1,2,3,4
-    ##  y number of register with that number of children
-
-    # Subquery: count children per register
-    children_per_register = (
-        db.query(
-            ChildrenOfRegister.RegisterID,
-            func.count(ChildrenOfRegister.ChildrenOfRegisterID).label('child_count')
-        )
-        .group_by(ChildrenOfRegister.RegisterID)
-        .subquery()
-    )
-
-    # Count how many registers have each number of children (including 0)
-    # First get registers with children
-    registers_with_children = dict(
-        db.query(
-            children_per_register.c.child_count,
-            func.count(children_per_register.c.RegisterID)
-        )
-        .group_by(children_per_register.c.child_count)
-        .all()
-    )
-
-    # Count registers with 0 children (not in children_of_register table)
-    total_registers = db.query(func.count(Register.RegisterID)).scalar() or 0
-    registers_with_children_count = db.query(func.count(func.distinct(ChildrenOfRegister.RegisterID))).scalar() or 0
-    registers_with_zero_children = total_registers - registers_with_children_count
-
-    # Combine: add 0 children count
-    number_of_children_counts = {0: registers_with_zero_children}
-    number_of_children_counts.update(registers_with_children)
-
-    education_levels = [
-        'Kindergarten',
-        'Primary',
-        'Secondary',
-        'High School',
-        'Diploma',
-        'Associate Degree',
-        'Bachelor',
-        'Master',
-        'PhD'
-    ]
-
-    # تبدیل به فرمت مناسب برای نمودار
-    chart_data = {
-        'adminStats': {
-            'labels': list(admin_counts.keys()),
-            'datasets': [{
-                'label': 'تعداد رجیسترها بر اساس نماینده',
-                'data': list(admin_counts.values()),
-                'backgroundColor': '#4CAF50'
-            }]
-        },
-        'provinceStats': {
-            'labels': list(province_counts.keys()),
-            'datasets': [{
-                'label': 'تعداد رجیسترها بر اساس استان',
-                'data': list(province_counts.values()),
-                'backgroundColor': '#2196F3'
-            }]
-        },
-        'educationLevelStats': {
-            'labels': education_levels,
-            'datasets': [{
-                'label': 'تعداد رجیسترها بر اساس سطح تحصیلات',
-                'data':  [education_level_counts.get(key, 0) for key in education_levels],
-                'backgroundColor': '#2196F3'
-            }]
-        },
-        'typeGoodStats': {
-            'labels': list(normalized_counts.keys()),
-            'datasets': [{
-                'label': 'تعداد رجیسترها بر اساس نوع کمک',
-                'data': list(normalized_counts.values()),
-                'backgroundColor': '#9C27B0'
-            }]
-        },
-        'childrenNumberStats': {
-            'labels': list(number_of_children_counts.keys()),
-            'datasets': [{
-                'label': 'تعداد رجیسترها بر اساس تعداد فرزندان',
-                'data': list(number_of_children_counts.values()),
-                'backgroundColor': '#9C27B0'
-            }]
-        }
-    }
-
-    return chart_data
@@ -0,0 +1,9 @@
+from src.api import router
+from src.core.cache import response_cache
+from src.core.snapshots import snapshot_store
+
+
+@router.get("/cache-stats")
+def cache_stats():
+    """Hit/miss counters of the in-process response cache and map snapshots (per worker)."""
+    return {**response_cache.stats(), "mapSnapshots": snapshot_store.stats()}
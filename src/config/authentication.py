@@ -1,14 +1,65 @@
-from fastapi import Header, HTTPException, status
-import os
+from fastapi import Header, HTTPException, Request, status
 
-basis_token = os.getenv("TOKEN")
+from sqlalchemy import select
 
+from src.config.base import BaseConfig
+from src.core.token_generator import InvalidToken, token_issuer
 
-def authenticate(x_api_token: str = Header(None)):
-    return
-    if x_api_token != basis_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-        )
-    return x_api_token
\ No newline at end of file
+# Routes reachable without a token: admin login, the needy's own signup and
+# sign-in (needy have no token), and the API docs. The docs are served by
+# the app, outside the API router, and are listed so this is the whole
+# unauthenticated surface
+PUBLIC_ROUTES = frozenset({
+    "/login",
+    "/signup-register",
+    "/signin-needy",
+    "/docs",
+    "/docs/oauth2-redirect",
+    "/redoc",
+    "/openapi.json",
+})
+
+# Bootstrap: a fresh deployment has no admin to log in as, so the first
+# admin is created without a token; once any admin exists this needs one
+BOOTSTRAP_ROUTES = frozenset({"/signup-admin"})
+
+auth_enabled = BaseConfig().AUTH_ENABLED
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def _no_admins() -> bool:
+    from src.config.database import AsyncSessionLocal
+    from src.core.models.admin import Admin
+
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Admin.AdminID).limit(1)) is None
+
+
+# async: the check is an in-process signature check (or LRU hit), cheaper than a threadpool hop
+async def authenticate(request: Request, authorization: str = Header(None)):
+    """
+    With AUTH_ENABLED, require `Authorization: Bearer <token from /login>`
+    and put its claims (TokenClaims) on request.state.auth, except on
+    PUBLIC_ROUTES and, while there is no admin yet, BOOTSTRAP_ROUTES.
+    """
+    path = getattr(request.scope.get("route"), "path", None)
+    if not auth_enabled or path in PUBLIC_ROUTES:
+        return None
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        if path in BOOTSTRAP_ROUTES and await _no_admins():
+            return None
+        raise _unauthorized()
+    try:
+        claims = token_issuer.verify(token)
+    except InvalidToken:
+        raise _unauthorized()
+    request.state.auth = claims
+    return claims
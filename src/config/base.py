@@ -1,14 +1,81 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Dict, List, Optional
 import os
 
 class BaseConfig(BaseSettings):
     HOST: str = Field(default="0.0.0.0")
     PORT: int = Field(default=8080)
     DEBUG: str = Field(default="True")
+    # Launch mode of `python src/main.py` (src/server.py): SERVER is "uvicorn" or "gunicorn" (uvicorn worker class);
+    # LOOP/HTTP "auto" use uvloop and httptools when installed
+    SERVER: str = Field(default="uvicorn")
+    WORKERS: int = Field(default=1)
+    LOOP: str = Field(default="auto")
+    HTTP: str = Field(default="auto")
+    GRACEFUL_TIMEOUT: int = Field(default=30)
+    # Opt-in warm-up (src/core/lifespan.py): open pool connections before a worker reports ready, then build the
+    # map snapshots and the cluster grids of WARM_CLUSTER_ZOOMS in the background. Every worker does it for itself
+    WARM_ON_STARTUP: bool = Field(default=False)
+    WARM_CLUSTER_ZOOMS: List[int] = Field(default_factory=lambda: [5, 6, 7])
     TOKEN: str = Field(default="your_token_here")
+    # Access tokens (JWT) issued by /login, see src.core.token_generator; AUTH_ENABLED makes the API router require
+    # one. JWT_KEYS maps key id -> secret (TOKEN under JWT_ACTIVE_KEY when empty); tokens are signed with
+    # JWT_ACTIVE_KEY and accepted with any listed key
+    AUTH_ENABLED: bool = Field(default=False)
+    JWT_KEYS: Dict[str, str] = Field(default_factory=dict)
+    JWT_ACTIVE_KEY: str = Field(default="default")
+    JWT_ALGORITHM: str = Field(default="HS256")
+    JWT_TTL_SECONDS: int = Field(default=12 * 3600)
+    AUTH_CACHE_SIZE: int = Field(default=4096)
+    # bcrypt cost of admin passwords (src.core.passwords); login rehashes passwords stored with another cost.
+    # Hashing runs on PASSWORD_HASH_WORKERS threads, with at most PASSWORD_HASH_QUEUE more calls waiting (then 503)
+    PASSWORD_HASH_ROUNDS: int = Field(default=12, ge=4, le=31)
+    PASSWORD_HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    PASSWORD_HASH_QUEUE: int = Field(default=64)
     # Use absolute path for database file
     DATABASE_URL: str = Field(default=f"sqlite:////{os.path.abspath(os.path.join(os.path.dirname(__file__), '../../database.db'))}")
+    # Optional read replica for GET/HEAD requests (src.config.database.create_session); unset reads the primary.
+    # For READ_YOUR_WRITES_SECONDS after a request that wrote, its client reads the primary again (cookie)
+    DATABASE_REPLICA_URL: Optional[str] = Field(default=None)
+    READ_YOUR_WRITES_SECONDS: float = Field(default=5)
+    # Connection pool of the sync and async engines; recycle -1 keeps connections forever
+    DB_POOL_SIZE: int = Field(default=5)
+    DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_TIMEOUT: float = Field(default=30)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    # PRAGMAs set on every new SQLite connection (src.config.database); SQLITE_PRAGMAS=false keeps SQLite's defaults
+    SQLITE_PRAGMAS: bool = Field(default=True)
+    SQLITE_JOURNAL_MODE: str = Field(default="WAL")
+    SQLITE_SYNCHRONOUS: str = Field(default="NORMAL")
+    SQLITE_MMAP_SIZE: int = Field(default=256 * 1024 * 1024)
+    SQLITE_CACHE_SIZE: int = Field(default=-65536)  # negative: KiB, i.e. 64 MiB per connection
+    SQLITE_TEMP_STORE: str = Field(default="MEMORY")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(default=5000)
+    # In-process response cache for the dashboard endpoints
+    CACHE_ENABLED: bool = Field(default=True)
+    CACHE_TTL_SECONDS: float = Field(default=30)
+    CACHE_STALE_SECONDS: float = Field(default=30)
+    CACHE_MAXSIZE: int = Field(default=256)
+    # How often a worker reads the shared table versions to see other workers' writes (src.core.cache)
+    CACHE_VERSION_CHECK_SECONDS: float = Field(default=1)
+    # Keyset pagination of list endpoints
+    PAGE_SIZE_DEFAULT: int = Field(default=100)
+    PAGE_SIZE_MAX: int = Field(default=1000)
+    # Precompressed full-map payloads (src.core.snapshots)
+    SNAPSHOTS_ENABLED: bool = Field(default=True)
+    # Access log (src.core.logging_middleware); sample rates are per route template, e.g. {"/find-needy": 0}
+    LOG_BODIES: bool = Field(default=False)
+    LOG_BODY_MAX_BYTES: int = Field(default=2048)
+    LOG_BODY_SAMPLE_RATE: float = Field(default=1.0)
+    LOG_BODY_SAMPLE_RATES: Dict[str, float] = Field(default_factory=dict)
+    # Server-Timing header with per-request database time and query count
+    SERVER_TIMING: bool = Field(default=True)
+    # Print every route and request schema at startup (also: `python -m src.manage api-info`)
+    PRINT_API_INFO: bool = Field(default=False)
+    # OpenAPI schema exported at build time by `python -m src.manage export-openapi`
+    OPENAPI_CACHE_PATH: str = Field(default=os.path.abspath(os.path.join(os.path.dirname(__file__), '../../openapi.json')))
 
     model_config = {
         "env_file": ".env",  # Enable .env file loading
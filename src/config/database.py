@@ -1,19 +1,251 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import URL, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import ORMExecuteState, sessionmaker, Session
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
+from starlette.requests import Request
 from src.config.base import BaseConfig
 
+# Session.info key of sessions that must not write (the replica's, see ReadSessionLocal)
+READ_ONLY = "read_only"
+
+# asyncio driver per backend, see async_url
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str) -> URL:
+    """`url` with its backend's asyncio driver in place of the sync one."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}") if backend in ASYNC_DRIVERS else url
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, settings: BaseConfig) -> Dict[str, Any]:
+    """Pool settings for create_engine/create_async_engine from the DB_POOL_* settings."""
+    if _is_memory_sqlite(make_url(url)):
+        return {}  # one connection per thread (SingletonThreadPool); it cannot be sized
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def sqlite_pragmas(settings: BaseConfig) -> List[str]:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+
+
+def use_sqlite_pragmas(engine, settings: BaseConfig) -> None:
+    """
+    Set the SQLITE_* PRAGMAs on each new connection of a SQLite engine.
+    WAL lets readers proceed while one writer commits, and with it
+    synchronous=NORMAL only syncs at checkpoints instead of on every commit.
+    """
+    if engine.dialect.name != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    pragmas = sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+_settings = BaseConfig()
+
+
+def _create_engines(url: str):
+    """A sync engine and an asyncio engine (for `async def` endpoints) on the same database."""
+    sync_engine = create_engine(url, **engine_options(url, _settings))
+    # the async one lets endpoints wait on queries without holding a threadpool slot
+    asyncio_engine = create_async_engine(async_url(url), **engine_options(url, _settings))
+    for _engine in (sync_engine, asyncio_engine.sync_engine):
+        use_sqlite_pragmas(_engine, _settings)
+    return sync_engine, asyncio_engine
+
+
 # Create SQLite engine - adjust the path as needed
-SQLALCHEMY_DATABASE_URL = BaseConfig().DATABASE_URL
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-)
+SQLALCHEMY_DATABASE_URL = _settings.DATABASE_URL
+engine, async_engine = _create_engines(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Reads of GET/HEAD requests go to DATABASE_REPLICA_URL when it is set; without one these are the primary's engines
+REPLICA_DATABASE_URL = _settings.DATABASE_REPLICA_URL
+if REPLICA_DATABASE_URL:
+    replica_engine, async_replica_engine = _create_engines(REPLICA_DATABASE_URL)
+else:
+    replica_engine, async_replica_engine = engine, async_engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine, info={READ_ONLY: True})
+AsyncReadSessionLocal = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False,
+                                           info={READ_ONLY: True})
+
+# Every distinct sync engine, including the ones behind the async engines
+ENGINES = list({id(e): e for e in (engine, async_engine.sync_engine,
+                                   replica_engine, async_replica_engine.sync_engine)}.values())
+
+
+def _forget_inherited_connections() -> None:
+    # A forked worker (e.g. gunicorn with preload_app) must neither use nor close the parent's connections
+    for _engine in ENGINES:
+        _engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_forget_inherited_connections)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Totals of the current request; sync endpoints run in a copy of the request's context and share the object
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def track_queries() -> QueryStats:
+    """Count the queries run from the current context (e.g. one request) into a fresh QueryStats."""
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - conn.info.pop("query_start")
 
-def create_session() -> Generator[Session, None, None]:
-    """Creates a SQLite database session and ensures it's closed after use"""
-    db = SessionLocal()
+
+for _engine in ENGINES:
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ReadOnlySessionError(InvalidRequestError):
+    """A read session (ReadSessionLocal) was asked to write."""
+
+
+def reads_replica(db) -> bool:
+    """Whether `db` (a Session or AsyncSession) reads from a replica: a read session while one is configured."""
+    return REPLICA_DATABASE_URL is not None and bool(db.info.get(READ_ONLY))
+
+
+def _refuse_writes(session: Session) -> None:
+    if session.info.get(READ_ONLY):
+        raise ReadOnlySessionError("This session reads from the replica and cannot write; use SessionLocal")
+
+
+# insert=True: runs before the cache and stats hooks, which would otherwise count the write
+@event.listens_for(Session, "before_flush", insert=True)
+def _read_only_flush(session: Session, flush_context, instances) -> None:
+    _refuse_writes(session)
+
+
+@event.listens_for(Session, "do_orm_execute", insert=True)
+def _read_only_statement(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _refuse_writes(state.session)
+
+
+@dataclass
+class RequestWrites:
+    wrote: bool = False
+
+
+# Set per request by ReadYourWritesMiddleware, shared with sync endpoints the same way as _query_stats
+_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("request_writes", default=None)
+_WROTE = "wrote"
+
+
+def track_writes() -> RequestWrites:
+    """Record in a fresh RequestWrites whether a commit from the current context (e.g. one request) wrote."""
+    writes = RequestWrites()
+    _request_writes.set(writes)
+    return writes
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session: Session, flush_context) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _committed(session: Session) -> None:
+    writes = _request_writes.get()
+    if session.info.pop(_WROTE, False) and writes is not None:
+        writes.wrote = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session: Session) -> None:
+    session.info.pop(_WROTE, None)
+
+
+# Requests that only read; others always get a session on the primary
+READ_METHODS = frozenset({"GET", "HEAD"})
+# Send either to read from the primary: the header on demand, the cookie (set by ReadYourWritesMiddleware,
+# holding a unix time) until that time has passed
+READ_PRIMARY_HEADER = "x-read-primary"
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def reads_from_replica(request: Request) -> bool:
+    """Whether `request` is served from the replica: a GET/HEAD request with no recent write by its client."""
+    if REPLICA_DATABASE_URL is None or request.method not in READ_METHODS:
+        return False
+    if request.headers.get(READ_PRIMARY_HEADER):
+        return False
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) < time.time()
+    except ValueError:
+        return True
+
+
+def create_session(request: Request) -> Generator[Session, None, None]:
+    """
+    Creates a SQLite database session and ensures it's closed after use.
+    GET/HEAD requests get a read session on the replica, see reads_from_replica.
+    """
+    db = (ReadSessionLocal if reads_from_replica(request) else SessionLocal)()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def create_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """AsyncSession for `async def` endpoints; closed after use and routed like create_session's"""
+    async with (AsyncReadSessionLocal if reads_from_replica(request) else AsyncSessionLocal)() as db:
+        yield db
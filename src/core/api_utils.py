@@ -2,10 +2,16 @@
 Utility functions for API path generation and inspection
 """
 from fastapi import FastAPI
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import hashlib
 import inspect
+import json
+import os
 from pydantic import BaseModel
 
+# Key in the exported schema identifying the routes it was generated from
+FINGERPRINT_KEY = "x-routes-fingerprint"
+
 
 def get_all_api_paths(app: FastAPI) -> Dict[str, Any]:
     """
@@ -130,3 +136,49 @@ def print_all_api_info(app: FastAPI) -> None:
                     print(f"    Schema: {payload_info['schema']}")
 
         print(f"{'-' * 60}")
+
+
+def routes_fingerprint(app: FastAPI) -> str:
+    """Hash of every route's path, methods and endpoint; cheap compared to generating the schema."""
+    routes = sorted(
+        f"{getattr(route, 'path', '')} {sorted(getattr(route, 'methods', None) or [])} "
+        f"{getattr(getattr(route, 'endpoint', None), '__qualname__', '')}"
+        for route in app.routes
+    )
+    return hashlib.sha256("\n".join([app.title, app.version, *routes]).encode()).hexdigest()
+
+
+def export_openapi(app: FastAPI, path: str) -> None:
+    """Write the app's OpenAPI schema to `path`, stamped with the routes it describes."""
+    schema = {**app.openapi(), FINGERPRINT_KEY: routes_fingerprint(app)}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _load_openapi(app: FastAPI, path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if schema.pop(FINGERPRINT_KEY, None) != routes_fingerprint(app):
+        return None  # exported from other code; generate instead of serving a wrong schema
+    return schema
+
+
+def use_cached_openapi(app: FastAPI, path: str) -> None:
+    """
+    Serve the schema exported to `path` (see export_openapi) instead of
+    generating it, as long as it matches the app's routes. Like FastAPI's
+    own, the lookup happens on the first /openapi.json request.
+    """
+    generate = app.openapi
+
+    def openapi() -> Dict[str, Any]:
+        if app.openapi_schema is None:
+            app.openapi_schema = _load_openapi(app, path) or generate()
+        return app.openapi_schema
+
+    app.openapi = openapi
@@ -0,0 +1,186 @@
+"""
+Streaming CSV / JSONL import of registers with their children and goods
+"""
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src.core.households import CHILDREN_KEY, GOODS_KEY, insert_households
+from src.core.models.admin import fallback_admin_id
+from src.core.models.register import Register
+from src.core.util import normalize_phone
+from src.objModel import RegisterCreateWithChildren
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+
+# (row number, parsed record or parse error message)
+Record = Tuple[int, Dict[str, Any] | str]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+    def add_error(self, row: int, *messages: str) -> None:
+        self.failed += 1
+        self.errors.append(ImportRowError(row=row, errors=list(messages)))
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines (newline kept), tolerating a UTF-8 BOM."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        if "\n" not in buffer:
+            continue
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def iter_jsonl_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, "each line must be a JSON object"
+            continue
+        yield row_number, record
+
+
+def _csv_cells(lines: List[str]) -> Optional[List[str]]:
+    """Cells of the CSV record in `lines`, or None while a quoted cell continues past them."""
+    starved = False
+
+    def feed():
+        nonlocal starved
+        yield from lines
+        # csv.reader only asks past the line that ends a record when a quoted cell is still open
+        starved = True
+
+    cells = next(csv.reader(feed()), [])
+    return None if starved else cells
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    Parse CSV with a header row. Empty cells become None; the children and
+    goods columns hold JSON arrays.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    row_number = 0
+    async for line in lines:
+        pending.append(line)
+        # A quoted cell may span several lines; csv.reader tells when the record is complete
+        cells = _csv_cells(pending)
+        if cells is None:
+            continue
+        text, pending = "".join(pending), []
+        if not text.strip():
+            continue
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        row_number += 1
+        if len(cells) > len(header):
+            yield row_number, f"expected {len(header)} columns, got {len(cells)}"
+            continue
+        record = {key: (value if value.strip() else None) for key, value in zip(header, cells)}
+        try:
+            for key in (CHILDREN_KEY, GOODS_KEY):
+                if record.get(key) is not None:
+                    record[key] = json.loads(record[key])
+        except json.JSONDecodeError as e:
+            yield row_number, f"invalid JSON in {key}: {e.msg}"
+            continue
+        yield row_number, record
+    if pending:
+        yield row_number + 1, "unterminated quoted field"
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+
+def _insert_batch(db: Session, batch: List[Tuple[int, Dict[str, Any]]], admin_id: Optional[int],
+                  report: ImportReport) -> None:
+    try:
+        insert_households(db, [household for _, household in batch], admin_id)
+        db.commit()
+        report.imported += len(batch)
+        return
+    except SQLAlchemyError as e:
+        db.rollback()
+        if len(batch) == 1:
+            report.add_error(batch[0][0], f"database error: {getattr(e, 'orig', None) or e.__class__.__name__}")
+            return
+    # Retry row by row so a single bad household does not fail its whole chunk
+    for item in batch:
+        _insert_batch(db, [item], admin_id, report)
+
+
+def import_chunk(db: Session, records: List[Record], report: ImportReport) -> None:
+    """Validate one chunk of parsed records and insert the valid ones in a single transaction."""
+    valid: List[Tuple[int, Dict[str, Any]]] = []
+    phones: Dict[str, int] = {}
+    for row_number, record in records:
+        if isinstance(record, str):
+            report.add_error(row_number, record)
+            continue
+        try:
+            household = RegisterCreateWithChildren.model_validate(record).model_dump()
+        except ValidationError as e:
+            report.add_error(row_number, *_validation_messages(e))
+            continue
+        phone = normalize_phone(household.get("Phone"))
+        if phone is not None:
+            if phone in phones:
+                report.add_error(row_number, f"duplicate phone, same as row {phones[phone]}")
+                continue
+            phones[phone] = row_number
+        valid.append((row_number, household))
+
+    if phones:
+        existing = set(db.execute(
+            select(Register.PhoneNormalized).where(Register.PhoneNormalized.in_(list(phones)))
+        ).scalars())
+        if existing:
+            kept = []
+            for row_number, household in valid:
+                if normalize_phone(household.get("Phone")) in existing:
+                    report.add_error(row_number, "مددجو با این شماره تلفن قبلا ثبت نام کرده است")
+                else:
+                    kept.append((row_number, household))
+            valid = kept
+
+    if not valid:
+        return
+    admin_id = None
+    if any(h.get(GOODS_KEY) and not h.get("UnderWhichAdmin") for _, h in valid):
+        admin_id = fallback_admin_id(db)
+    _insert_batch(db, valid, admin_id, report)
@@ -0,0 +1,497 @@
+"""
+In-process response cache for the read-mostly dashboard endpoints.
+
+Entries live in a size-bounded LRU store and are fresh for `ttl` seconds.
+For another `stale_ttl` seconds they are still served while one background
+refresh recomputes them (stale-while-revalidate).
+
+Every cached function names the tables it reads. Session hooks collect the
+tables written in a transaction and, after commit, bump a generation counter
+per table. Entries computed against an older generation are treated as
+misses.
+
+Those generations are per process. To see writes made by other workers,
+a cached endpoint reads the shared change counters of its tables
+(StatDimension.TableVersion, one primary-key lookup), at most once per
+`version_check_interval` seconds per table, and invalidates the tables
+whose counter moved further than this process's own commits moved it.
+A tag from watch_columns is checked through its table's counter, so in
+other workers it is dropped on any write to that table.
+"""
+import asyncio
+import functools
+import inspect as pyinspect
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from starlette.requests import Request
+from starlette.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, ORMExecuteState
+
+from src.config.base import BaseConfig
+
+logger = logging.getLogger(__name__)
+
+_CHANGED_TABLES = "cache_changed_tables"
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    created: float
+    generations: Tuple[int, ...]
+
+
+class CacheStore(ABC):
+    """Storage behind ResponseCache; subclass to keep entries elsewhere."""
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, entry: CacheEntry) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class LRUStore(CacheStore):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    def __init__(self, store: CacheStore, ttl: float, stale_ttl: float, enabled: bool = True,
+                 version_check_interval: float = 1.0):
+        self.store = store
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.enabled = enabled
+        self.version_check_interval = version_check_interval
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._generations: Dict[str, int] = {}
+        self._seen_versions: Dict[str, int] = {}  # table -> shared version last seen, see sync_versions
+        self._checked: Dict[str, float] = {}  # table -> monotonic time of the last version check
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, threading.Lock] = {}
+        self._async_inflight: Dict[Hashable, asyncio.Lock] = {}
+        self._async_refreshes: set = set()  # running refresh tasks, referenced until done
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    # --- invalidation ------------------------------------------------------
+
+    def generations(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(table, 0) for table in tables)
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def sync_versions(self, versions: Dict[str, int]) -> None:
+        """
+        Invalidate the tables (and their tags) whose shared version
+        (stats.read_table_versions) differs from the one this process
+        expects: another worker wrote them.
+        """
+        now = time.monotonic()
+        with self._lock:
+            changed = [table for table, version in versions.items() if self._seen_versions.get(table) != version]
+            self._seen_versions.update((table, versions[table]) for table in changed)
+            self._checked.update((table, now) for table in versions)
+        if changed:
+            self.invalidate([*changed, *(tag for tag, table in _tag_tables.items() if table in changed)])
+
+    def record_commit(self, tables: Iterable[str]) -> None:
+        """
+        A commit of this process wrote `tables` and bumped each shared version
+        by one; expect that, so sync_versions does not take it for a foreign write.
+        """
+        with self._lock:
+            for table in tables:
+                if table in self._seen_versions:
+                    self._seen_versions[table] += 1
+
+    def _due(self, tables: Iterable[str]) -> List[str]:
+        # tables behind `tables` (a tag stands for its table) not checked within version_check_interval
+        now = time.monotonic()
+        with self._lock:
+            due = sorted(table for table in {_tag_tables.get(t, t) for t in tables}
+                         if now - self._checked.get(table, float("-inf")) >= self.version_check_interval)
+            self._checked.update((table, now) for table in due)
+        return due
+
+    def check_versions(self, db: Session, tables: Iterable[str]) -> None:
+        """sync_versions for `tables`, read with `db`, unless they were checked within version_check_interval."""
+        due = self._due(tables) if self.enabled else ()
+        if due:
+            self.sync_versions(_shared_versions(db, due))
+
+    async def acheck_versions(self, db: AsyncSession, tables: Iterable[str]) -> None:
+        """check_versions for async sessions."""
+        due = self._due(tables) if self.enabled else ()
+        if due:
+            self.sync_versions(await db.run_sync(_shared_versions, due))
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    # --- lookup ------------------------------------------------------------
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._inflight.setdefault(key, threading.Lock())
+
+    def _release_key_lock(self, key: Hashable, lock: threading.Lock) -> None:
+        lock.release()
+        with self._lock:
+            if not lock.locked() and self._inflight.get(key) is lock:
+                del self._inflight[key]
+
+    def _store(self, key: Hashable, generations: Tuple[int, ...], value: Any) -> Any:
+        if not isinstance(value, Response):  # e.g. a streaming body; it can only be sent once
+            self.store.set(key, CacheEntry(value, time.monotonic(), generations))
+        return value
+
+    def _compute(self, key: Hashable, tables: Tuple[str, ...], compute: Callable[[], Any]) -> Any:
+        # read generations first so a commit racing with the computation makes the entry stale
+        generations = self.generations(tables)
+        return self._store(key, generations, compute())
+
+    def _fresh(self, entry: Optional[CacheEntry], tables: Tuple[str, ...], ttl: float) -> bool:
+        return entry is not None and entry.generations == self.generations(tables) \
+            and time.monotonic() - entry.created < ttl
+
+    def _stale(self, entry: Optional[CacheEntry], tables: Tuple[str, ...], ttl: float) -> bool:
+        # still servable while a refresh runs
+        return entry is not None and entry.generations == self.generations(tables) \
+            and time.monotonic() - entry.created < ttl + self.stale_ttl
+
+    def _refresh(self, key: Hashable, tables: Tuple[str, ...], compute: Callable[[], Any]) -> None:
+        lock = self._key_lock(key)
+        if not lock.acquire(blocking=False):
+            return  # someone is already recomputing this entry
+        try:
+            self.refreshes += 1
+            self._compute(key, tables, compute)
+        except Exception:
+            logger.exception("Background refresh of %r failed", key)
+        finally:
+            self._release_key_lock(key, lock)
+
+    def get_or_compute(self, key: Hashable, tables: Tuple[str, ...], compute: Callable[[], Any],
+                       refresh: Optional[Callable[[], Any]] = None, ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value for `key`, computing it with `compute` on a miss.
+        `refresh` recomputes a stale entry off the request thread; it must not
+        depend on request-scoped resources such as the request's DB session.
+        """
+        if not self.enabled:
+            return compute()
+        ttl = self.ttl if ttl is None else ttl
+        entry = self.store.get(key)
+        if self._fresh(entry, tables, ttl):
+            self.hits += 1
+            return entry.value
+        if refresh is not None and self._stale(entry, tables, ttl):
+            self.stale_hits += 1
+            self._refresher.submit(self._refresh, key, tables, refresh)
+            return entry.value
+
+        # Only one request computes a missing entry; concurrent ones wait for it
+        lock = self._key_lock(key)
+        lock.acquire()
+        try:
+            entry = self.store.get(key)
+            if self._fresh(entry, tables, ttl):
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return self._compute(key, tables, compute)
+        finally:
+            self._release_key_lock(key, lock)
+
+    # --- lookup from async endpoints ---------------------------------------
+
+    def _async_key_lock(self, key: Hashable) -> asyncio.Lock:
+        return self._async_inflight.setdefault(key, asyncio.Lock())
+
+    def _release_async_key_lock(self, key: Hashable, lock: asyncio.Lock) -> None:
+        lock.release()
+        if not lock.locked() and self._async_inflight.get(key) is lock:
+            del self._async_inflight[key]
+
+    async def _acompute(self, key: Hashable, tables: Tuple[str, ...], compute: Callable[[], Awaitable[Any]]) -> Any:
+        generations = self.generations(tables)
+        return self._store(key, generations, await compute())
+
+    async def _arefresh(self, key: Hashable, tables: Tuple[str, ...], compute: Callable[[], Awaitable[Any]]) -> None:
+        lock = self._async_key_lock(key)
+        if lock.locked():
+            return
+        await lock.acquire()
+        try:
+            self.refreshes += 1
+            await self._acompute(key, tables, compute)
+        except Exception:
+            logger.exception("Background refresh of %r failed", key)
+        finally:
+            self._release_async_key_lock(key, lock)
+
+    async def aget_or_compute(self, key: Hashable, tables: Tuple[str, ...], compute: Callable[[], Awaitable[Any]],
+                              refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+                              ttl: Optional[float] = None) -> Any:
+        """
+        get_or_compute for coroutines, run on the event loop. Stale entries
+        are refreshed by a task on the same loop.
+        """
+        if not self.enabled:
+            return await compute()
+        ttl = self.ttl if ttl is None else ttl
+        entry = self.store.get(key)
+        if self._fresh(entry, tables, ttl):
+            self.hits += 1
+            return entry.value
+        if refresh is not None and self._stale(entry, tables, ttl):
+            self.stale_hits += 1
+            task = asyncio.get_running_loop().create_task(self._arefresh(key, tables, refresh))
+            self._async_refreshes.add(task)
+            task.add_done_callback(self._async_refreshes.discard)
+            return entry.value
+
+        lock = self._async_key_lock(key)
+        await lock.acquire()
+        try:
+            entry = self.store.get(key)
+            if self._fresh(entry, tables, ttl):
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return await self._acompute(key, tables, compute)
+        finally:
+            self._release_async_key_lock(key, lock)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self.store),
+            "maxsize": getattr(self.store, "maxsize", None),
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "evictions": getattr(self.store, "evictions", 0),
+            "hitRatio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+    # --- endpoint decorator ------------------------------------------------
+
+    def cached(self, *tables: str, ttl: Optional[float] = None):
+        """
+        Cache an endpoint's return value per distinct query/path parameters.
+        Session and Request arguments are left out of the key; background
+        refreshes run with a fresh session from SessionLocal, or from
+        AsyncSessionLocal for `async def` endpoints. Calls with a read
+        session (the replica's) and calls on the primary are cached apart,
+        so a client reading its own write never gets a body built from a
+        lagging replica; refreshes use the same kind of session. Before the
+        lookup, the endpoint's session reads the shared versions of `tables`
+        when they are due (see check_versions).
+        """
+        tables = tuple(sorted(tables))
+
+        def decorator(fn):
+            name = f"{fn.__module__}.{fn.__qualname__}"
+
+            if pyinspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    key = (name, args, _params_key(kwargs), _reads_replica(kwargs))
+                    db = _session(kwargs)
+                    if db is not None:
+                        await self.acheck_versions(db, tables)
+
+                    async def refresh():
+                        from src.config.database import AsyncReadSessionLocal, AsyncSessionLocal
+                        factory = AsyncReadSessionLocal if _reads_replica(kwargs) else AsyncSessionLocal
+                        async with factory() as db:
+                            return await fn(*args, **{k: db if isinstance(v, AsyncSession) else v
+                                                      for k, v in kwargs.items()})
+
+                    return await self.aget_or_compute(key, tables, lambda: fn(*args, **kwargs), refresh, ttl)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = (name, args, _params_key(kwargs), _reads_replica(kwargs))
+                db = _session(kwargs)
+                if db is not None:
+                    self.check_versions(db, tables)
+
+                def refresh():
+                    from src.config.database import ReadSessionLocal, SessionLocal
+                    db = (ReadSessionLocal if _reads_replica(kwargs) else SessionLocal)()
+                    try:
+                        return fn(*args, **{k: db if isinstance(v, Session) else v for k, v in kwargs.items()})
+                    finally:
+                        db.close()
+
+                return self.get_or_compute(key, tables, lambda: fn(*args, **kwargs), refresh, ttl)
+
+            return wrapper
+
+        return decorator
+
+
+def _session(kwargs: Dict[str, Any]):
+    return next((v for v in kwargs.values() if isinstance(v, (Session, AsyncSession))), None)
+
+
+def _shared_versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    from src.core import stats
+    from src.core.models import Base
+    tables = [table for table in tables if table in Base.metadata.tables]
+    if not tables:
+        return {}
+    return {table: version for table, (version, _) in stats.read_table_versions(db, tables).items()}
+
+
+def _reads_replica(kwargs: Dict[str, Any]) -> bool:
+    from src.config.database import reads_replica
+    return any(reads_replica(v) for v in kwargs.values() if isinstance(v, (Session, AsyncSession)))
+
+
+def _params_key(kwargs: Dict[str, Any]) -> Tuple:
+    items = []
+    for name, value in sorted(kwargs.items()):
+        if isinstance(value, (Session, AsyncSession, Request)):
+            continue
+        try:
+            hash(value)
+        except TypeError:
+            value = repr(value)
+        items.append((name, value))
+    return tuple(items)
+
+
+settings = BaseConfig()
+response_cache = ResponseCache(
+    LRUStore(settings.CACHE_MAXSIZE),
+    ttl=settings.CACHE_TTL_SECONDS,
+    stale_ttl=settings.CACHE_STALE_SECONDS,
+    enabled=settings.CACHE_ENABLED,
+    version_check_interval=settings.CACHE_VERSION_CHECK_SECONDS,
+)
+
+
+# --- write tracking ------------------------------------------------------------
+
+# model -> [(columns, tag)] and tag -> table of the model; see watch_columns
+_watched_columns: Dict[type, List[Tuple[Tuple[str, ...], str]]] = {}
+_tag_tables: Dict[str, str] = {}
+
+
+def watch_columns(model: type, columns: Iterable[str], tag: str) -> None:
+    """
+    Invalidate `tag` (usable like a table name in `cached`) when rows of
+    `model` are inserted or deleted, or when one of `columns` changes.
+    Bulk statements on the model always invalidate it. Other workers have
+    no version for the tag and go by the version of the model's table.
+    """
+    _watched_columns.setdefault(model, []).append((tuple(columns), tag))
+    _tag_tables[tag] = model.__table__.name
+
+
+def _changed_tables(session: Session) -> set:
+    return session.info.setdefault(_CHANGED_TABLES, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session: Session, flush_context) -> None:
+    changed = _changed_tables(session)
+    for obj in list(session.new) + list(session.deleted):
+        mapper = inspect(obj).mapper
+        changed.add(mapper.local_table.name)
+        changed.update(tag for _, tag in _watched_columns.get(mapper.class_, ()))
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue  # same test as the stats hooks, so record_commit matches the version bumps
+        state = inspect(obj)
+        changed.add(state.mapper.local_table.name)
+        for columns, tag in _watched_columns.get(state.mapper.class_, ()):
+            if any(state.attrs[column].history.has_changes() for column in columns):
+                changed.add(tag)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_tables(state: ORMExecuteState) -> None:
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        changed = _changed_tables(state.session)
+        changed.add(state.bind_mapper.local_table.name)
+        changed.update(tag for _, tag in _watched_columns.get(state.bind_mapper.class_, ()))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tables(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_TABLES, None)
+    if changed:
+        response_cache.invalidate(changed)
+        response_cache.record_commit(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tables(session: Session) -> None:
+    session.info.pop(_CHANGED_TABLES, None)
@@ -0,0 +1,182 @@
+"""
+Grid clustering for the map endpoints.
+
+At zoom z the map is cut into square cells of 90 / 2**z degrees, i.e. four
+cells across a 256px web-map tile. For every zoom below CLUSTER_MAX_ZOOM the
+per-cell counts and centroids of the whole layer are computed with one
+GROUP BY and cached. A request only picks the cells in its viewport out of
+that list. Entries are invalidated when coordinates of the layer change.
+
+From CLUSTER_MAX_ZOOM on the endpoints return the individual points
+instead, only for a closed viewport and a page at a time (points_page),
+so no zoom level hands out the whole layer in one response.
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.orm import Session
+
+from src.config.base import BaseConfig
+from src.config.database import reads_replica
+from src.core.cache import response_cache, watch_columns
+from src.core.geo import BoundingBox
+from src.core.pagination import PageParams, page
+from src.core.models.admin import Admin
+from src.core.models.register import Register
+
+settings = BaseConfig()
+
+# From this zoom on individual points are returned instead of clusters
+CLUSTER_MAX_ZOOM = 16
+MAX_ZOOM = 22
+CELLS_PER_TILE = 4
+
+REGISTER_COORDINATES = "register_coordinates"
+ADMIN_COORDINATES = "admin_coordinates"
+
+watch_columns(Register, ("LatitudeValue", "LongitudeValue", "is_disconnected"), REGISTER_COORDINATES)
+watch_columns(Admin, ("LatitudeValue", "LongitudeValue"), ADMIN_COORDINATES)
+
+
+@dataclass(frozen=True, eq=False)
+class Layer:
+    name: str
+    tag: str
+    id_column: object
+    lat_column: object
+    lng_column: object
+    conditions: tuple = ()
+
+
+NEEDY = Layer("needy", REGISTER_COORDINATES, Register.RegisterID, Register.LatitudeValue, Register.LongitudeValue,
+              (Register.is_disconnected == False,))  # noqa: E712
+DISCONNECTED_NEEDY = Layer("disconnected-needy", REGISTER_COORDINATES, Register.RegisterID, Register.LatitudeValue,
+                           Register.LongitudeValue, (Register.is_disconnected == True,))  # noqa: E712
+ADMINS = Layer("admins", ADMIN_COORDINATES, Admin.AdminID, Admin.LatitudeValue, Admin.LongitudeValue)
+
+
+@dataclass(frozen=True)
+class CellGrid:
+    cells: List["Cell"]
+    # cells[i].row, for bisecting on the latitude range
+    rows: List[int]
+
+
+@dataclass(frozen=True)
+class Cell:
+    row: int
+    column: int
+    count: int
+    lat: float
+    lng: float
+    # set when the cell holds a single point
+    id: Optional[int]
+
+
+def cell_size(zoom: int) -> float:
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def _cell_index(db: Session, expr, size: float):
+    # expr is never negative, so truncation is floor on SQLite; Postgres casts round
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.floor(expr / size), Integer)
+    return cast(expr / size, Integer)
+
+
+def compute_cells(db: Session, layer: Layer, zoom: int) -> CellGrid:
+    """Counts and centroids of all cells of the layer at this zoom, sorted by (row, column)."""
+    size = cell_size(zoom)
+    row = _cell_index(db, layer.lat_column + 90, size).label("row")
+    column = _cell_index(db, layer.lng_column + 180, size).label("column")
+    query = (
+        select(
+            row,
+            column,
+            func.count().label("count"),
+            func.avg(layer.lat_column).label("lat"),
+            func.avg(layer.lng_column).label("lng"),
+            func.min(layer.id_column).label("id"),
+        )
+        .where(layer.lat_column.isnot(None), layer.lng_column.isnot(None), *layer.conditions)
+        .group_by(row, column)
+        .order_by(row, column)
+    )
+    cells = [
+        Cell(r.row, r.column, r.count, r.lat, r.lng, r.id if r.count == 1 else None)
+        for r in db.execute(query)
+    ]
+    return CellGrid(cells, [cell.row for cell in cells])
+
+
+def cached_cells(db: Session, layer: Layer, zoom: int) -> CellGrid:
+    def refresh():
+        from src.config.database import ReadSessionLocal, SessionLocal
+        refresh_db = (ReadSessionLocal if reads_replica(db) else SessionLocal)()
+        try:
+            return compute_cells(refresh_db, layer, zoom)
+        finally:
+            refresh_db.close()
+
+    response_cache.check_versions(db, (layer.tag,))
+    return response_cache.get_or_compute(
+        ("clusters", layer.name, zoom, reads_replica(db)), (layer.tag,), lambda: compute_cells(db, layer, zoom),
+        refresh
+    )
+
+
+def warm(db: Session, layer: Layer, zooms=range(CLUSTER_MAX_ZOOM)) -> None:
+    """Precompute the cached cells of a layer, e.g. at startup."""
+    for zoom in zooms:
+        cached_cells(db, layer, zoom)
+
+
+def cells_in_viewport(grid: CellGrid, zoom: int, bbox: BoundingBox) -> List[Cell]:
+    size = cell_size(zoom)
+
+    def bounds(low: Optional[float], high: Optional[float], offset: float) -> Tuple[float, float]:
+        return (
+            float("-inf") if low is None else int((low + offset) // size),
+            float("inf") if high is None else int((high + offset) // size),
+        )
+
+    min_row, max_row = bounds(bbox.min_lat, bbox.max_lat, 90)
+    min_column, max_column = bounds(bbox.min_lng, bbox.max_lng, 180)
+    start = 0 if min_row == float("-inf") else bisect_left(grid.rows, min_row)
+    end = len(grid.cells) if max_row == float("inf") else bisect_right(grid.rows, max_row)
+    return [cell for cell in grid.cells[start:end] if min_column <= cell.column <= max_column]
+
+
+def clusters(db: Session, layer: Layer, zoom: int, bbox: BoundingBox) -> Dict[str, object]:
+    cells = cells_in_viewport(cached_cells(db, layer, zoom), zoom, bbox)
+    return {
+        "zoom": zoom,
+        "cellSize": cell_size(zoom),
+        "clusters": [
+            {"lat": cell.lat, "lng": cell.lng, "count": cell.count, "id": cell.id}
+            for cell in cells
+        ],
+        "points": [],
+        "next_cursor": None,
+    }
+
+
+def point_page_params(bbox: BoundingBox, params: PageParams) -> PageParams:
+    """
+    Page of individual points to fetch at zoom >= CLUSTER_MAX_ZOOM: the
+    viewport must be closed, and without `limit` a page is PAGE_SIZE_MAX.
+    """
+    if not bbox.is_bounded:
+        raise HTTPException(status_code=400,
+                            detail="برای نمایش نقاط، محدوده نقشه (min_lat, max_lat, min_lng, max_lng) الزامی است")
+    return PageParams(params.limit or settings.PAGE_SIZE_MAX, params.after)
+
+
+def points_page(zoom: int, rows, params: PageParams) -> Dict[str, object]:
+    """Response of a cluster endpoint at zoom >= CLUSTER_MAX_ZOOM; `rows` were fetched with `params`."""
+    points = page(rows, "id", params)
+    return {"zoom": zoom, "cellSize": None, "clusters": [], "points": points["items"],
+            "next_cursor": points["next_cursor"]}
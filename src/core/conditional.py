@@ -0,0 +1,92 @@
+"""
+Conditional GET (ETag / If-None-Match) for read endpoints.
+
+The validator is derived from the change counters the stats hooks keep per
+table (StatDimension.TableVersion), so checking it costs one primary-key
+lookup on stat_counter. A matching If-None-Match is answered with 304
+before the endpoint runs its query or serializes anything.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.database import create_async_session, create_session
+from src.core import stats
+from src.core.cache import response_cache
+
+
+def make_etag(request: Request, versions: Dict[str, Tuple[int, Optional[datetime]]]) -> str:
+    # Weak: the same data may be sent gzip-encoded or not
+    parts = [
+        request.url.path,
+        str(sorted(request.query_params.multi_items())),
+        request.headers.get("accept", ""),
+        *(f"{table}={version}" for table, (version, _) in sorted(versions.items())),
+    ]
+    return f'W/"{hashlib.blake2b(chr(0).join(parts).encode(), digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _last_modified(versions: Dict[str, Tuple[int, Optional[datetime]]]) -> Optional[str]:
+    changed = [updated for _, updated in versions.values() if updated is not None]
+    if not changed:
+        return None
+    latest = max(d if d.tzinfo else d.replace(tzinfo=timezone.utc) for d in changed)
+    return format_datetime(latest.astimezone(timezone.utc), usegmt=True)
+
+
+def _check_not_modified(request: Request, response: Response,
+                        versions: Dict[str, Tuple[int, Optional[datetime]]]) -> None:
+    # drop cached bodies older than these versions, or one would be sent under the new ETag
+    response_cache.sync_versions({table: version for table, (version, _) in versions.items()})
+    headers = {"ETag": make_etag(request, versions), "Cache-Control": "no-cache"}
+    last_modified = _last_modified(versions)
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    # FastAPI drops these for endpoints returning a Response themselves (snapshots, NDJSON streams);
+    # they pass conditional_headers on
+    request.state.table_versions = versions
+    request.state.conditional_headers = headers
+
+
+def conditional(*tables: str):
+    """
+    Route dependency adding ETag/Last-Modified to a sync GET endpoint whose
+    response depends only on `tables` and the request's path and query.
+    The version row is read with the endpoint's own session (create_session).
+
+        @router.get("/x", dependencies=[conditional("register")])
+    """
+    tables = tuple(sorted(tables))
+
+    def check_not_modified(request: Request, response: Response, db: Session = Depends(create_session)) -> None:
+        _check_not_modified(request, response, stats.read_table_versions(db, tables))
+
+    return Depends(check_not_modified)
+
+
+def aconditional(*tables: str):
+    """conditional() for async endpoints, reading through their create_async_session session."""
+    tables = tuple(sorted(tables))
+
+    async def check_not_modified(request: Request, response: Response,
+                                 db: AsyncSession = Depends(create_async_session)) -> None:
+        _check_not_modified(request, response, await db.run_sync(stats.read_table_versions, tables))
+
+    return Depends(check_not_modified)
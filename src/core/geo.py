@@ -0,0 +1,76 @@
+"""
+Helpers for the map endpoints
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    """Optional viewport; a missing bound leaves that side open."""
+    min_lat: Optional[float] = None
+    max_lat: Optional[float] = None
+    min_lng: Optional[float] = None
+    max_lng: Optional[float] = None
+
+    @property
+    def is_unbounded(self) -> bool:
+        return self.min_lat is None and self.max_lat is None and self.min_lng is None and self.max_lng is None
+
+    @property
+    def is_bounded(self) -> bool:
+        """All four sides given."""
+        return None not in (self.min_lat, self.max_lat, self.min_lng, self.max_lng)
+
+    def apply(self, query, lat_column, lng_column):
+        """Restrict a select/Query to rows inside the box, as range filters the position index can use."""
+        if self.min_lat is not None:
+            query = query.filter(lat_column >= self.min_lat)
+        if self.max_lat is not None:
+            query = query.filter(lat_column <= self.max_lat)
+        if self.min_lng is not None:
+            query = query.filter(lng_column >= self.min_lng)
+        if self.max_lng is not None:
+            query = query.filter(lng_column <= self.max_lng)
+        return query
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def box_around(lat: float, lng: float, radius_km: float) -> BoundingBox:
+    """Smallest lat/lng box containing the circle of radius_km around a point."""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    # near the poles the circle spans every longitude
+    d_lng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return BoundingBox(
+        max(-90.0, lat - d_lat), min(90.0, lat + d_lat),
+        max(-180.0, lng - d_lng), min(180.0, lng + d_lng),
+    )
+
+
+def viewport(
+        min_lat: Optional[float] = Query(None, ge=-90, le=90),
+        max_lat: Optional[float] = Query(None, ge=-90, le=90),
+        min_lng: Optional[float] = Query(None, ge=-180, le=180),
+        max_lng: Optional[float] = Query(None, ge=-180, le=180),
+) -> BoundingBox:
+    """FastAPI dependency reading the optional min_lat/max_lat/min_lng/max_lng query parameters."""
+    if (min_lat is not None and max_lat is not None and min_lat > max_lat) or \
+            (min_lng is not None and max_lng is not None and min_lng > max_lng):
+        raise HTTPException(status_code=400, detail="محدوده نقشه نامعتبر است")
+    return BoundingBox(min_lat, max_lat, min_lng, max_lng)
@@ -0,0 +1,97 @@
+"""
+Batched write path for registers together with their children and goods
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.core.models.good import Good
+from src.core.models.register import Register, ChildrenOfRegister, _normalize_digit_string
+from src.core.util import normalize_phone, normalize_label, parse_coordinate
+
+CHILDREN_KEY = "children_of_registre"
+GOODS_KEY = "goods_of_registre"
+
+
+def register_row(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Column values for a multi-row INSERT into register, from a validated
+    RegisterCreateWithChildren dump (children and goods already popped).
+    """
+    row = dict(payload)
+    usa = row.get("UnderSecondAdminID")
+    if isinstance(usa, str):
+        row["UnderSecondAdminID"] = int(usa.strip()) if usa.strip() else None
+    row["is_disconnected"] = bool(row.get("is_disconnected"))
+    row["PhoneNormalized"] = normalize_phone(row.get("Phone"))
+    row["ProvinceNormalized"] = normalize_label(row.get("Province"))
+    row["LatitudeValue"] = parse_coordinate(row.get("Latitude"))
+    row["LongitudeValue"] = parse_coordinate(row.get("Longitude"))
+    return row
+
+
+def child_rows(register_id: int, children: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    rows = []
+    for child in children or []:
+        child = dict(child)
+        # Remove any incoming incorrect keys
+        child.pop("ChildrenOfRegisterID", None)
+        child["RegisterID"] = register_id  # enforce FK
+        # Normalize Age (Persian digits -> int or None)
+        age_val = child.get("Age")
+        if isinstance(age_val, str):
+            norm = _normalize_digit_string(age_val).strip()
+            child["Age"] = int(norm) if norm.isdigit() else None
+        rows.append(child)
+    return rows
+
+
+def good_rows(register_id: int, given_by: Optional[int], goods: Optional[List[Dict[str, Any]]],
+              now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
+    rows = []
+    for good in goods or []:
+        good = dict(good)
+        good["GivenToWhome"] = register_id
+        good["UpdatedDate"] = now
+        good["GivenBy"] = given_by
+        good["Verified"] = bool(good.get("Verified"))
+        good["TypeGoodNormalized"] = normalize_label(good.get("TypeGood"))
+        rows.append(good)
+    return rows
+
+
+def insert_households(db_session: Session, households: List[Dict[str, Any]],
+                      fallback_admin_id: Optional[int] = None) -> List[int]:
+    """
+    Insert registers with their children and goods using one multi-row INSERT
+    per table. Does not commit; the caller owns the transaction.
+    Returns the new RegisterIDs in the order of `households`.
+    """
+    if not households:
+        return []
+    payloads = [dict(h) for h in households]
+    children = [p.pop(CHILDREN_KEY, None) for p in payloads]
+    goods = [p.pop(GOODS_KEY, None) for p in payloads]
+    registers = [register_row(p) for p in payloads]
+
+    register_ids = list(db_session.execute(
+        insert(Register).returning(Register.RegisterID, sort_by_parameter_order=True),
+        registers,
+    ).scalars())
+
+    now = datetime.now(timezone.utc)
+    all_children = []
+    all_goods = []
+    for register_id, register, register_children, register_goods in zip(register_ids, registers, children, goods):
+        all_children.extend(child_rows(register_id, register_children))
+        given_by = register.get("UnderWhichAdmin") or fallback_admin_id
+        all_goods.extend(good_rows(register_id, given_by, register_goods, now))
+
+    if all_children:
+        db_session.execute(insert(ChildrenOfRegister), all_children)
+    if all_goods:
+        db_session.execute(insert(Good), all_goods)
+    return register_ids
@@ -0,0 +1,122 @@
+"""
+Startup and shutdown of a worker process (FastAPI lifespan).
+
+With WARM_ON_STARTUP a worker opens its pool connections before it
+reports ready, then builds the caches whose first computation is slow
+(the full-map snapshots and the cluster grids of WARM_CLUSTER_ZOOMS) in
+a background task, reading from the replica when there is one. Requests
+are served meanwhile; they fill whatever is still cold themselves. Each
+worker process does this for itself, as the caches are per process, so
+it is off by default to keep cold starts short. On shutdown all engines
+close their connections and the password hashing threads stop.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from src.config.base import BaseConfig
+from src.config.database import ReadSessionLocal, async_engine, async_replica_engine, engine, replica_engine
+from src.core.passwords import password_hasher
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_count(pool) -> int:
+    size = getattr(pool, "size", None)  # not every pool class is sized
+    return size() if callable(size) else 1
+
+
+def warm_pool(engine=engine) -> None:
+    """Open a sync engine's pool connections up front (they are returned to the pool)."""
+    connections = []
+    try:
+        for _ in range(_warm_count(engine.pool)):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def warm_async_pool(async_engine=async_engine) -> None:
+    """Open an async engine's pool connections up front, giving up after DB_POOL_TIMEOUT."""
+    async def ping():
+        try:
+            async with async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                await barrier.wait()  # hold the connection until all are open
+        except BaseException:
+            # wake the others (BrokenBarrierError) so every task lets go of its connection
+            await barrier.abort()
+            raise
+
+    count = _warm_count(async_engine.pool)
+    barrier = asyncio.Barrier(count)
+    async with asyncio.timeout(BaseConfig().DB_POOL_TIMEOUT):
+        results = await asyncio.gather(*(ping() for _ in range(count)), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException) and not isinstance(r, asyncio.BrokenBarrierError)]
+    if errors:
+        raise errors[0]
+
+
+def warm_caches(zooms) -> None:
+    from src.api.register import warm_map_snapshots
+    from src.core import clusters
+
+    db = ReadSessionLocal()
+    try:
+        warm_map_snapshots(db)
+        for layer in (clusters.NEEDY, clusters.DISCONNECTED_NEEDY, clusters.ADMINS):
+            clusters.warm(db, layer, [zoom for zoom in zooms if zoom < clusters.CLUSTER_MAX_ZOOM])
+    finally:
+        db.close()
+
+
+async def warm_pools() -> None:
+    await warm_async_pool()
+    await run_in_threadpool(warm_pool)
+    if replica_engine is not engine:
+        await warm_async_pool(async_replica_engine)
+        await run_in_threadpool(warm_pool, replica_engine)
+
+
+async def warm_in_background(zooms) -> None:
+    start = time.perf_counter()
+    try:
+        await run_in_threadpool(warm_caches, zooms)
+        logger.info("Warmed caches in %.0fms", (time.perf_counter() - start) * 1000)
+    except Exception:
+        # the caches fill on first use instead
+        logger.exception("Cache warm-up failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = BaseConfig()
+    warming = None
+    if settings.WARM_ON_STARTUP:
+        start = time.perf_counter()
+        try:
+            await warm_pools()
+            logger.info("Warmed pools in %.0fms", (time.perf_counter() - start) * 1000)
+        except Exception:
+            # a cold worker still serves
+            logger.exception("Pool warm-up failed")
+        warming = asyncio.create_task(warm_in_background(settings.WARM_CLUSTER_ZOOMS))
+    yield
+    if warming is not None:
+        warming.cancel()  # the thread running warm_caches finishes its current query on its own
+        with suppress(asyncio.CancelledError):
+            await warming
+    await async_engine.dispose()
+    engine.dispose()
+    if replica_engine is not engine:
+        await async_replica_engine.dispose()
+        replica_engine.dispose()
+    password_hasher.shutdown()
@@ -1,28 +1,75 @@
 """
-Logging middleware for FastAPI to log request and response payloads
+Access log middleware: one compact JSON line per request, and a
+Server-Timing header with the request's database time and query count
+(see src.config.database.track_queries).
+
+Records are handed to a QueueHandler and written by a QueueListener
+thread, so formatting and I/O stay off the event loop. Request and
+response bodies are only looked at when LOG_BODIES is on, for a sampled
+share of requests per route (LOG_BODY_SAMPLE_RATE, overridden per route
+template by LOG_BODY_SAMPLE_RATES), and then only the first
+LOG_BODY_MAX_BYTES of each are kept.
 """
+import atexit
 import json
-import time
 import logging
-from typing import Callable
-from fastapi import Request, Response
-from fastapi.responses import StreamingResponse
-import asyncio
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from src.config.base import BaseConfig
+from src.config.database import QueryStats, track_queries
+
+settings = BaseConfig()
+
+
+class AccessFormatter(logging.Formatter):
+    """Renders the `access` fields of a record as one JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "access", None)
+        if fields is None:
+            return super().format(record)
+        return json.dumps({"time": self.formatTime(record), **fields}, ensure_ascii=False, separators=(",", ":"),
+                          default=str)
+
 
-# Configure logger
 logger = logging.getLogger("api_logger")
-handler = logging.StreamHandler()
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 logger.setLevel(logging.INFO)
+handler = logging.StreamHandler()
+handler.setFormatter(AccessFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_records))
+listener = QueueListener(_records, handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+
+def _route_path(scope) -> str | None:
+    route = scope.get("route")
+    return getattr(route, "path", None)
+
+
+def _sampled(route_path: str | None) -> bool:
+    rate = settings.LOG_BODY_SAMPLE_RATES.get(route_path, settings.LOG_BODY_SAMPLE_RATE)
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def server_timing(queries: QueryStats, app_seconds: float) -> bytes:
+    return (f'db;dur={queries.seconds * 1000:.1f}, db-count;desc="{queries.count}", '
+            f'app;dur={app_seconds * 1000:.1f}').encode()
+
+
+def _text(body: bytearray, truncated: bool) -> str:
+    text = body.decode("utf-8", errors="replace")
+    return text + "…" if truncated else text
 
 
 class LoggingMiddleware:
     """
-    Middleware to log API requests and responses
+    Pure ASGI middleware; bodies pass through untouched and, unless body
+    logging is on and sampled, are not copied.
     """
 
     def __init__(self, app):
@@ -33,115 +80,72 @@ class LoggingMiddleware:
             await self.app(scope, receive, send)
             return
 
-        request = Request(scope, receive)
-
-        # Get request details
-        start_time = time.time()
-        method = request.method
-        url = str(request.url)
-        path = request.url.path
-        query_params = dict(request.query_params)
-        headers = dict(request.headers)
-
-        # Get request body
-        body = b""
+        start = time.perf_counter()
+        queries = track_queries()
+        log = logger.isEnabledFor(logging.INFO)
+        status = 500
+        sent = 0
+        # body capture is decided once the route is known, i.e. on the first receive/send
+        capture = None
+        request_body = bytearray()
+        response_body = bytearray()
+        truncated = {"request": False, "response": False}
+        limit = settings.LOG_BODY_MAX_BYTES
+
+        def capturing() -> bool:
+            nonlocal capture
+            if capture is None:
+                capture = settings.LOG_BODIES and _sampled(_route_path(scope))
+            return capture
+
+        def keep(buffer: bytearray, chunk: bytes, side: str) -> None:
+            room = limit - len(buffer)
+            if len(chunk) > room:
+                truncated[side] = True
+            if room > 0:
+                buffer += chunk[:room]
 
         async def receive_wrapper():
-            nonlocal body
             message = await receive()
-            if message["type"] == "http.request":
-                body += message.get("body", b"")
+            if log and message["type"] == "http.request" and capturing():
+                keep(request_body, message.get("body", b""), "request")
             return message
 
-        # Parse request body
-        request_payload = None
-        try:
-            if body:
-                request_payload = json.loads(body.decode())
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            request_payload = body.decode() if body else None
-
-        # Log request
-        logger.info(f"REQUEST | {method} {path}")
-        logger.info(f"REQUEST URL | {url}")
-        if query_params:
-            logger.info(f"REQUEST QUERY | {json.dumps(query_params, indent=2)}")
-        if request_payload:
-            logger.info(f"REQUEST PAYLOAD | {json.dumps(request_payload, indent=2, default=str)}")
-
-        # Capture response
-        response_body = b""
-        response_status = None
-
         async def send_wrapper(message):
-            nonlocal response_body, response_status
+            nonlocal status, sent, capture
             if message["type"] == "http.response.start":
-                response_status = message["status"]
+                status = message["status"]
+                if settings.SERVER_TIMING:
+                    timing = server_timing(queries, time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing)]}
+                if log and capturing():
+                    # only readable bodies: no streams, nothing compressed
+                    headers = dict(message.get("headers", []))
+                    capture = not headers.get(b"content-type", b"").startswith(b"application/x-ndjson") \
+                        and b"content-encoding" not in headers
             elif message["type"] == "http.response.body":
-                response_body += message.get("body", b"")
+                body = message.get("body", b"")
+                sent += len(body)
+                if log and capture:
+                    keep(response_body, body, "response")
             await send(message)
 
-        # Process request
-        await self.app(scope, receive_wrapper, send_wrapper)
-
-        # Calculate processing time
-        process_time = time.time() - start_time
-
-        # Parse response body
-        response_payload = None
         try:
-            if response_body:
-                response_payload = json.loads(response_body.decode())
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            response_payload = response_body.decode() if response_body else None
-
-        # Log response
-        logger.info(f"RESPONSE | {method} {path} | Status: {response_status} | Time: {process_time:.3f}s")
-        logger.info("=" * 80)
-
-
-async def log_request_response_middleware(request: Request, call_next: Callable):
-    """
-    Alternative middleware implementation using FastAPI's middleware decorator
-    """
-    start_time = time.time()
-
-    # Log request
-    method = request.method
-    url = str(request.url)
-    path = request.url.path
-    query_params = dict(request.query_params)
-
-    # Get request body
-    body = await request.body()
-    request_payload = None
-
-    try:
-        if body:
-            request_payload = json.loads(body.decode())
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        request_payload = body.decode() if body else None
-
-    # Log request details
-    logger.info(f"REQUEST | {method} {path}")
-    logger.info(f"REQUEST URL | {url}")
-    if query_params:
-        logger.info(f"REQUEST QUERY | {json.dumps(query_params, indent=2)}")
-    if request_payload:
-        logger.info(f"REQUEST PAYLOAD | {json.dumps(request_payload, indent=2, default=str)}")
-
-    # Process request
-    response = await call_next(request)
-
-    # Calculate processing time
-    process_time = time.time() - start_time
-
-    # Log response (for non-streaming responses)
-    logger.info(f"RESPONSE | {method} {path} | Status: {response.status_code} | Time: {process_time:.3f}s")
-
-    # Note: For detailed response payload logging, we'd need to read the response body
-    # which can be complex with streaming responses. The ASGI middleware above handles this better.
-
-    logger.info("=" * 80)
-
-    return response
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            if log:
+                fields = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": _route_path(scope),
+                    "query": scope["query_string"].decode("latin-1") or None,
+                    "status": status,
+                    "durationMs": round((time.perf_counter() - start) * 1000, 2),
+                    "bytes": sent,
+                    "dbMs": round(queries.seconds * 1000, 2),
+                    "dbQueries": queries.count,
+                }
+                if capture:
+                    fields["requestBody"] = _text(request_body, truncated["request"]) if request_body else None
+                    fields["responseBody"] = _text(response_body, truncated["response"]) if response_body else None
+                logger.info("access", extra={"access": fields})
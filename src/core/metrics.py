@@ -0,0 +1,235 @@
+"""
+Minimal Prometheus metrics registry and the middleware feeding it.
+
+Metrics are kept per process and rendered in the Prometheus text format
+at /metrics. Requests are labelled by route template, never by raw path,
+and every metric caps its number of label sets (MAX_SERIES); further
+combinations are folded into one `other` series. Recording a request
+costs a few dictionary lookups under a lock.
+"""
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+MAX_SERIES = 500
+OVERFLOW = "other"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _series_key(self, series: dict, labels: Labels) -> Labels:
+        # called with the lock held
+        if labels in series or len(series) < MAX_SERIES:
+            return labels
+        return (OVERFLOW,) * len(self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Sample lines of the text format, one per series."""
+
+    def render(self) -> str:
+        return "\n".join([f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}",
+                          *self.samples()])
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            key = self._series_key(self._values, labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge(Metric):
+    """
+    A gauge set directly, or read from `callback` at scrape time. With
+    `labelnames` the callback returns a value (or None) per label tuple.
+    """
+    type = "gauge"
+
+    def __init__(self, name, documentation, callback: Optional[Callable[[], Any]] = None,
+                 labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def samples(self):
+        value = self.callback() if self.callback is not None else self._value
+        if self.labelnames:
+            return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+                    for labels, v in sorted(value.items()) if v is not None]
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (last one is +Inf, not cumulative), sum]
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._series_key(self._series, labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start until the response body was sent.",
+    ("method", "route")))
+RESPONSES = registry.register(Counter(
+    "http_responses_total", "Responses sent, by status code.", ("method", "route", "status")))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size.", ("method", "route"), buckets=SIZE_BUCKETS))
+IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "Requests being handled."))
+
+
+def _engines() -> Dict[str, Any]:
+    from src.config import database
+    engines = {"sync": database.engine, "async": database.async_engine.sync_engine}
+    if database.replica_engine is not database.engine:
+        engines.update(replica_sync=database.replica_engine, replica_async=database.async_replica_engine.sync_engine)
+    return engines
+
+
+def _pool_gauge(name: str, documentation: str, method: str) -> Gauge:
+    def read():
+        values = {}
+        for label, engine in _engines().items():
+            reader = getattr(engine.pool, method, None)  # not every pool class tracks checkouts/overflow
+            values[(label,)] = reader() if reader is not None else None
+        return values
+    return registry.register(Gauge(name, documentation, read, labelnames=("engine",)))
+
+
+# engine: sync/async engines on the primary, replica_sync/replica_async with DATABASE_REPLICA_URL
+_pool_gauge("db_pool_size", "Configured size of each engine's connection pool.", "size")
+_pool_gauge("db_pool_checked_out", "Pool connections currently checked out.", "checkedout")
+_pool_gauge("db_pool_overflow", "Connections opened beyond the pool size (negative while below it).", "overflow")
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and size per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            method = scope["method"] if scope["method"] in _METHODS else "OTHER"
+            route = _route_label(scope)
+            REQUEST_DURATION.observe(time.perf_counter() - start, method, route)
+            RESPONSE_SIZE.observe(size, method, route)
+            RESPONSES.inc(method, route, str(status))
@@ -1,10 +1,11 @@
 from datetime import datetime
 from enum import StrEnum
 
-from sqlalchemy import String, DateTime, Enum, Text, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, Enum, Text, ForeignKey, Float, Index
+from sqlalchemy.orm import Mapped, mapped_column, validates
 from sqlalchemy.sql import func
 from src.core.models import Base, sqlalchemy_model_to_pydantic, sqlalchemy_model_to_pydantic_named
+from src.core.util import parse_coordinate
 from typing import Optional
 
 
@@ -16,6 +17,9 @@ class UserRoleEnum(StrEnum):
 
 class Admin(Base):
     __tablename__ = "admin"
+    __table_args__ = (
+        Index("ix_admin_map_position", "LatitudeValue", "LongitudeValue"),
+    )
     AdminID: Mapped[int] = mapped_column(primary_key=True, index=True)
     CreatedBy: Mapped[Optional[int]] = mapped_column(ForeignKey("admin.AdminID"), nullable=True)
     FirstName: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -33,6 +37,9 @@ class Admin(Base):
     UpdatedDate: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     Latitude: Mapped[Optional[str]] = mapped_column(Text)
     Longitude: Mapped[Optional[str]] = mapped_column(Text)
+    # Latitude/Longitude parsed to numbers (see parse_coordinate) for map and viewport queries
+    LatitudeValue: Mapped[Optional[float]] = mapped_column(Float)
+    LongitudeValue: Mapped[Optional[float]] = mapped_column(Float)
 
     def __init__(self, FirstName: Optional[str] = None, LastName: Optional[str] = None, Phone: Optional[str] = None, Email: Optional[str] = None, City: Optional[str] = None, Province: Optional[str] = None, Street: Optional[str] = None, NationalID: Optional[str] = None, UserRole: Optional[UserRoleEnum] = None, Password: Optional[str] = None, PostCode: Optional[str] = None, Latitude: Optional[str] = None, Longitude: Optional[str] = None, CreatedBy: Optional[int] = None):
         self.PostCode = PostCode
@@ -50,6 +57,11 @@ class Admin(Base):
         self.Longitude = Longitude
         self.CreatedBy = CreatedBy
 
+    @validates('Latitude', 'Longitude')
+    def _sync_coordinate_value(self, key, value):
+        setattr(self, f"{key}Value", parse_coordinate(value))
+        return value
+
     def create_admin(self, db_session):
         db_session.add(self)
         db_session.commit()
@@ -57,8 +69,11 @@ class Admin(Base):
         return self
 
     def delete_admin(self, db_session):
+        admin_id = self.AdminID
         db_session.delete(self)
         db_session.commit()
+        if admin_id == _fallback_admin_id:
+            reset_fallback_admin_id()
         return self
 
     def edit_admin(self, db_session, user_data: 'AdminCreate'):
@@ -94,5 +109,24 @@ class Admin(Base):
         db_session.refresh(self)
         return self
 
-AdminCreate = sqlalchemy_model_to_pydantic(Admin, exclude=['AdminID', 'CreatedDate', 'UpdatedDate'])
-AdminOut = sqlalchemy_model_to_pydantic_named(Admin, "AdminOut", exclude=["Password"])
+_fallback_admin_id: Optional[int] = None
+
+
+def fallback_admin_id(db_session) -> Optional[int]:
+    """
+    Admin credited with goods of registers that have no UnderWhichAdmin.
+    Looked up once per process; reset when that admin is deleted.
+    """
+    global _fallback_admin_id
+    if _fallback_admin_id is None:
+        row = db_session.query(Admin.AdminID).order_by(Admin.AdminID).first()
+        _fallback_admin_id = row[0] if row else None
+    return _fallback_admin_id
+
+
+def reset_fallback_admin_id():
+    global _fallback_admin_id
+    _fallback_admin_id = None
+
+AdminCreate = sqlalchemy_model_to_pydantic(Admin, exclude=['AdminID', 'CreatedDate', 'UpdatedDate', 'LatitudeValue', 'LongitudeValue'])
+AdminOut = sqlalchemy_model_to_pydantic_named(Admin, "AdminOut", exclude=["Password", "LatitudeValue", "LongitudeValue"])
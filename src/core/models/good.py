@@ -1,5 +1,5 @@
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from src.core.models import Base, sqlalchemy_model_to_pydantic, sqlalchemy_model_to_pydantic_named
 from datetime import datetime
@@ -8,21 +8,30 @@ from pydantic import field_validator
 
 from src.core.models.admin import Admin
 from src.core.models.register import Register
+from src.core.util import normalize_label
 
 class Good(Base):
     __tablename__ = "good"
+    __table_args__ = (
+        # "received something since ..." checks per register
+        Index("ix_good_GivenToWhome_CreatedDate", "GivenToWhome", "CreatedDate"),
+        # keyset pages of /get-goods/{register_id}
+        Index("ix_good_GivenToWhome_GoodID", "GivenToWhome", "GoodID"),
+    )
     GoodID: Mapped[int] = mapped_column(primary_key=True, index=True)
     TypeGood: Mapped[str] = mapped_column(String, index=True)
     NumberGood: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     GivenToWhome: Mapped[int] = mapped_column(ForeignKey("register.RegisterID"))
     GivenBy: Mapped[int] = mapped_column(ForeignKey("admin.AdminID"))
-    CreatedDate: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    CreatedDate: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
     UpdatedDate: Mapped[datetime] = mapped_column(DateTime(timezone=True),  server_default=func.now(),onupdate=func.now())
     # Relationships (optional, for ORM navigation)
     admin: Mapped[Admin] = relationship("Admin")
     register: Mapped[Register] = relationship("Register")
     SmsCode : Mapped[Optional[str]] = mapped_column(String, index=True)
     Verified: Mapped[Optional[bool]] = mapped_column(Boolean, index=True, default=False)
+    # TypeGood passed through normalize_label, grouped on by /register-stats
+    TypeGoodNormalized: Mapped[Optional[str]] = mapped_column(String, index=True)
 
     ### create __init__ method to create an good
     def __init__(self, TypeGood: Optional[str] = None, NumberGood: Optional[int] = None, GivenToWhome: Optional[int] = None, GivenBy: Optional[int] = None, UpdatedDate: Optional[datetime] = None, SmsCode: Optional[str] = None, Verified: Optional[bool] = None):
@@ -51,6 +60,11 @@ class Good(Base):
         if Verified:
             self.Verified = Verified
 
+    @validates('TypeGood')
+    def _sync_type_good_normalized(self, key, value):
+        self.TypeGoodNormalized = normalize_label(value)
+        return value
+
     def edit_good(self, db_session, user_data):
         if user_data.TypeGood is not None:
             self.TypeGood = user_data.TypeGood
@@ -68,8 +82,9 @@ class Good(Base):
         db_session.refresh(self)
         return self
 
-GoodCreate = sqlalchemy_model_to_pydantic(Good, exclude=['GoodID', 'CreatedDate'])
-GoodUpsert = sqlalchemy_model_to_pydantic_named(Good, "GoodUpsert", exclude=['CreatedDate'])
+GoodCreate = sqlalchemy_model_to_pydantic(Good, exclude=['GoodID', 'CreatedDate', 'TypeGoodNormalized'])
+GoodUpsert = sqlalchemy_model_to_pydantic_named(Good, "GoodUpsert", exclude=['CreatedDate', 'TypeGoodNormalized'])
+GoodOut = sqlalchemy_model_to_pydantic_named(Good, "GoodOut", exclude=['TypeGoodNormalized'])
 
 class GoodCreateFlexible(GoodCreate):
     NumberGood: int | str | None = None
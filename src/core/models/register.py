@@ -1,10 +1,11 @@
 from datetime import datetime, date
 from typing import Optional, List
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, Text, DateTime, Date, Boolean
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+from sqlalchemy import ForeignKey, Text, DateTime, Date, Boolean, Float, Index
 from sqlalchemy.sql import func
-from src.core.models import sqlalchemy_model_to_pydantic
+from src.core.models import sqlalchemy_model_to_pydantic, sqlalchemy_model_to_pydantic_named
 from src.core.models import Base
+from src.core.util import normalize_phone, normalize_label, parse_coordinate
 from pydantic import field_validator
 
 
@@ -22,6 +23,14 @@ def info_register(db_session):
 
 class Register(Base):
     __tablename__ = "register"
+    # Fetch server defaults (CreatedDate) on flush so callers need no refresh round trip
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # viewport queries: equality on is_disconnected, then a latitude range
+        Index("ix_register_map_position", "is_disconnected", "LatitudeValue", "LongitudeValue"),
+        # keyset pages of the needy map lists
+        Index("ix_register_is_disconnected_RegisterID", "is_disconnected", "RegisterID"),
+    )
     RegisterID: Mapped[int] = mapped_column(primary_key=True, index=True)
     FirstName: Mapped[str] = mapped_column(nullable=False)
     LastName: Mapped[str] = mapped_column(nullable=False)
@@ -34,7 +43,7 @@ class Register(Base):
     NationalID: Mapped[Optional[str]] = mapped_column()
     CreatedBy: Mapped[Optional[int]] = mapped_column(ForeignKey("admin.AdminID"))
     BirthDate: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
-    UnderWhichAdmin: Mapped[Optional[int]] = mapped_column(ForeignKey("admin.AdminID"), nullable=True)
+    UnderWhichAdmin: Mapped[Optional[int]] = mapped_column(ForeignKey("admin.AdminID"), nullable=True, index=True)
     UnderSecondAdminID: Mapped[Optional[int]] = mapped_column(ForeignKey("admin.AdminID"), nullable=True)
     Region: Mapped[Optional[str]] = mapped_column()
     Gender: Mapped[Optional[str]] = mapped_column()
@@ -42,14 +51,21 @@ class Register(Base):
     HusbandLastName: Mapped[Optional[str]] = mapped_column()
     ReasonMissingHusband: Mapped[Optional[str]] = mapped_column()
     UnderOrganizationName: Mapped[Optional[str]] = mapped_column()
-    EducationLevel: Mapped[Optional[str]] = mapped_column()
-    CreatedDate: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    EducationLevel: Mapped[Optional[str]] = mapped_column(index=True)
+    CreatedDate: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
     UpdatedDate: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     IncomeForm: Mapped[Optional[str]] = mapped_column(Text)
     children_of_reg: Mapped[List["ChildrenOfRegister"]] = relationship("ChildrenOfRegister", back_populates="register")
     Latitude: Mapped[Optional[str]] = mapped_column(Text)
     Longitude: Mapped[Optional[str]] = mapped_column(Text)
     is_disconnected: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Canonical phone (see normalize_phone), kept in sync with Phone for indexed duplicate checks
+    PhoneNormalized: Mapped[Optional[str]] = mapped_column(index=True, unique=True)
+    # Province passed through normalize_label, grouped on by /register-stats
+    ProvinceNormalized: Mapped[Optional[str]] = mapped_column(index=True)
+    # Latitude/Longitude parsed to numbers (see parse_coordinate) for map and viewport queries
+    LatitudeValue: Mapped[Optional[float]] = mapped_column(Float)
+    LongitudeValue: Mapped[Optional[float]] = mapped_column(Float)
 
     def __init__(self, FirstName: Optional[str] = None, LastName: Optional[str] = None, Phone: Optional[str] = None, Email: Optional[str] = None, City: Optional[str] = None, Province: Optional[str] = None, Street: Optional[str] = None,
                  NameFather: Optional[str] = None, NationalID: Optional[str] = None, CreatedBy: Optional[int] = None, BirthDate: Optional[date] = None, UnderWhichAdmin: Optional[int] = None, Region: Optional[str] = None, Gender: Optional[str] = None,
@@ -94,6 +110,25 @@ class Register(Base):
         self.NameFather = NameFather
         self.is_disconnected = is_disconnected
 
+    @validates('Phone')
+    def _sync_phone_normalized(self, key, value):
+        # Only when the number itself changes: legacy duplicate households keep PhoneNormalized NULL (see the
+        # migration adding it) and re-assigning their unchanged phone must not hit the unique index
+        normalized = normalize_phone(value)
+        if normalized != normalize_phone(self.Phone):
+            self.PhoneNormalized = normalized
+        return value
+
+    @validates('Province')
+    def _sync_province_normalized(self, key, value):
+        self.ProvinceNormalized = normalize_label(value)
+        return value
+
+    @validates('Latitude', 'Longitude')
+    def _sync_coordinate_value(self, key, value):
+        setattr(self, f"{key}Value", parse_coordinate(value))
+        return value
+
     def create_register(self, db_session):
         db_session.add(self)
         db_session.commit()
@@ -185,7 +220,7 @@ class Register(Base):
 class ChildrenOfRegister(Base):
     __tablename__ = "children_of_register"
     ChildrenOfRegisterID: Mapped[int] = mapped_column(primary_key=True, index=True)
-    RegisterID: Mapped[int] = mapped_column(ForeignKey("register.RegisterID"))
+    RegisterID: Mapped[int] = mapped_column(ForeignKey("register.RegisterID"), index=True)
     Age: Mapped[Optional[int]] = mapped_column()
     Gender: Mapped[Optional[str]] = mapped_column()
     NationalID: Mapped[Optional[str]] = mapped_column()
@@ -223,8 +258,12 @@ def _normalize_digit_string(value: str) -> str:
     return value.translate(trans)
 
 ## create RegisterCreate pydantic model with sqlalchemy_model_to_pydantic
-RegisterCreate = sqlalchemy_model_to_pydantic(Register, exclude=['RegisterID', 'CreatedDate', 'UpdatedDate'])
+RegisterCreate = sqlalchemy_model_to_pydantic(Register, exclude=['RegisterID', 'CreatedDate', 'UpdatedDate', 'PhoneNormalized', 'ProvinceNormalized',
+                                                                  'LatitudeValue', 'LongitudeValue'])
 ChildrenOfRegisterCreate = sqlalchemy_model_to_pydantic(ChildrenOfRegister, exclude=['CreatedDate', 'UpdatedDate'])
+RegisterOut = sqlalchemy_model_to_pydantic_named(Register, "RegisterOut", exclude=['PhoneNormalized', 'ProvinceNormalized',
+                                                                                   'LatitudeValue', 'LongitudeValue'])
+ChildrenOfRegisterOut = sqlalchemy_model_to_pydantic_named(ChildrenOfRegister, "ChildrenOfRegisterOut")
 
 # Patched child model to sanitize Age
 class ChildrenOfRegisterCreatePatched(ChildrenOfRegisterCreate):
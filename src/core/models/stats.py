@@ -0,0 +1,32 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from src.core.models import Base
+
+
+class StatDimension(StrEnum):
+    RegisterTotal = "register_total"
+    RegisterProvince = "register_province"
+    RegisterAdmin = "register_admin"
+    RegisterEducation = "register_education"
+    RegisterChildren = "register_children"
+    GoodType = "good_type"
+    AdminRole = "admin_role"
+    # Key is a table name, Count how many transactions have changed it
+    TableVersion = "table_version"
+
+
+class StatCounter(Base):
+    """
+    One counter per (dimension, key), e.g. ("register_province", "تهران").
+    Maintained incrementally by src.core.stats; rebuilt with `rebuild-stats`.
+    """
+    __tablename__ = "stat_counter"
+    Dimension: Mapped[str] = mapped_column(String(50), primary_key=True)
+    Key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    Count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    UpdatedDate: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,85 @@
+"""
+k-nearest registers around a point.
+
+Candidates come from a lat/lng range query on ix_register_map_position,
+refined with the haversine distance. The search radius doubles until k
+registers lie within it (everything inside the circle is then known), so
+only the neighbourhood of the point is read, not the whole table.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from src.core.geo import box_around, haversine_km
+from src.core.models.good import Good
+from src.core.models.register import Register
+
+INITIAL_RADIUS_KM = 2.0
+# Half the Earth's circumference: the circle covers every point
+MAX_RADIUS_KM = 20037.5
+
+
+def _candidates_query(lat: float, lng: float, radius_km: float, include_disconnected: bool,
+                      not_given_since: Optional[datetime]):
+    query = select(
+        Register.RegisterID,
+        Register.LatitudeValue,
+        Register.LongitudeValue,
+        Register.FirstName,
+        Register.LastName,
+        Register.Phone,
+        Register.Street,
+        Register.City,
+        Register.is_disconnected,
+    ).where(
+        Register.is_disconnected.in_([False, True] if include_disconnected else [False]),
+        Register.LatitudeValue.isnot(None),
+        Register.LongitudeValue.isnot(None),
+    )
+    query = box_around(lat, lng, radius_km).apply(query, Register.LatitudeValue, Register.LongitudeValue)
+    if not_given_since is not None:
+        query = query.where(~exists().where(
+            Good.GivenToWhome == Register.RegisterID,
+            Good.CreatedDate >= not_given_since,
+        ))
+    return query
+
+
+def nearest_registers(db: Session, lat: float, lng: float, k: int, include_disconnected: bool = False,
+                      not_given_days: Optional[int] = None, max_distance_km: Optional[float] = None) -> List[dict]:
+    """
+    The k registers closest to (lat, lng), nearest first. `not_given_days`
+    skips registers that received a good in that many past days.
+    """
+    not_given_since = None
+    if not_given_days is not None:
+        not_given_since = datetime.now(timezone.utc) - timedelta(days=not_given_days)
+    limit_km = min(max_distance_km, MAX_RADIUS_KM) if max_distance_km is not None else MAX_RADIUS_KM
+
+    radius = min(INITIAL_RADIUS_KM, limit_km)
+    while True:
+        rows = db.execute(_candidates_query(lat, lng, radius, include_disconnected, not_given_since)).all()
+        within = sorted(
+            ((distance, row) for row in rows
+             if (distance := haversine_km(lat, lng, row.LatitudeValue, row.LongitudeValue)) <= radius),
+            key=lambda item: (item[0], item[1].RegisterID),
+        )
+        if len(within) >= k or radius >= limit_km:
+            break
+        radius = min(radius * 2, limit_km)
+
+    return [
+        {
+            "id": row.RegisterID,
+            "lat": row.LatitudeValue,
+            "lng": row.LongitudeValue,
+            "name": f"{row.FirstName or ''} {row.LastName or ''}".strip() or None,
+            "info": f"{row.Street or ''} {row.City or ''}".strip() or None,
+            "phone": row.Phone,
+            "is_disconnected": row.is_disconnected,
+            "distanceKm": round(distance, 3),
+        }
+        for distance, row in within[:k]
+    ]
@@ -0,0 +1,78 @@
+"""
+Keyset pagination for list endpoints.
+
+A page is requested with `limit` and/or `cursor`; without either the
+endpoints keep returning the full list. Rows are ordered by an indexed
+unique key and the cursor is an opaque token holding the last key of the
+previous page, so every page is an index range scan (`key > last LIMIT n`)
+however deep it is, and inserts between requests do not shift pages.
+"""
+import base64
+import binascii
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Query
+
+from src.config.base import BaseConfig
+
+settings = BaseConfig()
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: Optional[int] = None
+    after: Optional[int] = None
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.after is not None
+
+    @property
+    def size(self) -> int:
+        return min(self.limit or settings.PAGE_SIZE_DEFAULT, settings.PAGE_SIZE_MAX)
+
+
+def encode_cursor(key: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"k": key}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))["k"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="cursor نامعتبر است")
+    if not isinstance(key, int):
+        raise HTTPException(status_code=400, detail="cursor نامعتبر است")
+    return key
+
+
+def page_params(
+        limit: Optional[int] = Query(None, ge=1, description="Page size, capped at PAGE_SIZE_MAX"),
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+) -> PageParams:
+    """FastAPI dependency reading the optional `limit` and `cursor` query parameters."""
+    return PageParams(limit, decode_cursor(cursor) if cursor else None)
+
+
+def paginate(query, key_column, params: PageParams):
+    """Apply keyset ordering to a select/Query; fetches one extra row to detect a next page."""
+    query = query.order_by(key_column)
+    if not params.paginated:
+        return query
+    if params.after is not None:
+        query = query.filter(key_column > params.after)
+    return query.limit(params.size + 1)
+
+
+def page(rows: List[Any], key: str, params: PageParams) -> dict:
+    """Envelope for rows fetched with `paginate`; `key` names the key column on each row."""
+    items = rows[:params.size]
+    next_cursor = None
+    if len(rows) > params.size:
+        last = items[-1]
+        next_cursor = encode_cursor(last[key] if isinstance(last, Mapping) else getattr(last, key))
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,111 @@
+"""
+bcrypt password hashing off the request path.
+
+Hashing and checking run in a dedicated thread pool of
+PASSWORD_HASH_WORKERS threads (bcrypt releases the GIL while it works,
+so they run in parallel), and endpoints await them without holding the
+event loop or a slot of the shared threadpool. At most
+PASSWORD_HASH_QUEUE calls wait for a free thread; beyond that
+PasswordPoolFull is raised so a burst of logins fails fast instead of
+queueing without bound.
+
+The cost factor is PASSWORD_HASH_ROUNDS. Stored hashes with another
+cost, and passwords stored in plain text before hashing was wired in,
+are reported by needs_rehash so login can replace them.
+"""
+import asyncio
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+import bcrypt
+
+from src.config.base import BaseConfig
+
+T = TypeVar("T")
+
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+# bcrypt only reads the first 72 bytes; newer releases raise instead of ignoring the rest
+_MAX_BYTES = 72
+
+
+class PasswordPoolFull(Exception):
+    """More than PASSWORD_HASH_QUEUE password hashes are waiting for the pool."""
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:_MAX_BYTES]
+
+
+def is_hashed(stored: Optional[str]) -> bool:
+    return bool(stored) and stored.startswith(_BCRYPT_PREFIXES)
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """bcrypt hash of `password` with `rounds` (default PASSWORD_HASH_ROUNDS); blocks for the whole hash."""
+    rounds = rounds or BaseConfig().PASSWORD_HASH_ROUNDS
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    """Whether `password` matches `stored`, a bcrypt hash or a legacy plain-text password."""
+    if not password or not stored:
+        return False
+    if is_hashed(stored):
+        try:
+            return bcrypt.checkpw(_encode(password), stored.encode("utf-8"))
+        except ValueError:  # malformed hash
+            return False
+    return hmac.compare_digest(_encode(password), _encode(stored))
+
+
+def needs_rehash(stored: Optional[str], rounds: Optional[int] = None) -> bool:
+    """True for plain-text passwords and hashes whose cost is not `rounds` (default PASSWORD_HASH_ROUNDS)."""
+    if not is_hashed(stored):
+        return True
+    rounds = rounds or BaseConfig().PASSWORD_HASH_ROUNDS
+    try:
+        return int(stored.split("$")[2]) != rounds
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue: int):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # created on first use, so importing the app starts no threads
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolFull()
+        try:
+            return await asyncio.wrap_future(self._pool().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, stored: Optional[str]) -> bool:
+        return await self._run(verify_password, password, stored)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_settings = BaseConfig()
+password_hasher = PasswordHasher(_settings.PASSWORD_HASH_WORKERS, _settings.PASSWORD_HASH_QUEUE)
@@ -0,0 +1,36 @@
+"""
+Read-your-writes for deployments with a read replica (DATABASE_REPLICA_URL).
+
+GET/HEAD requests read from the replica, which may trail the primary by
+its replication lag. When a request commits a write, its response sets
+the read_primary_until cookie, and create_session sends that client's
+reads to the primary until then (READ_YOUR_WRITES_SECONDS). Clients that
+do not keep cookies (e.g. cross-origin ones, as CORS runs without
+credentials) send the X-Read-Primary header instead.
+"""
+import math
+import time
+
+from src.config.database import READ_PRIMARY_COOKIE, track_writes
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app, seconds: float):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes = track_writes()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writes.wrote:
+                cookie = (f"{READ_PRIMARY_COOKIE}={time.time() + self.seconds:.3f}; "
+                          f"Max-Age={math.ceil(self.seconds)}; Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
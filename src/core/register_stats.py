@@ -0,0 +1,161 @@
+"""
+GROUP BY queries behind /register-stats. Memory use depends on the number
+of distinct labels, not on the number of registers.
+"""
+from typing import Dict, Tuple
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from src.core.models.admin import Admin
+from src.core.models.good import Good
+from src.core.models.register import Register, ChildrenOfRegister
+
+EDUCATION_LEVELS = [
+    'Kindergarten',
+    'Primary',
+    'Secondary',
+    'High School',
+    'Diploma',
+    'Associate Degree',
+    'Bachelor',
+    'Master',
+    'PhD'
+]
+
+
+def province_counts(db: Session) -> Dict[str, int]:
+    rows = db.execute(
+        select(Register.ProvinceNormalized, func.count(Register.RegisterID))
+        .where(Register.ProvinceNormalized.isnot(None))
+        .group_by(Register.ProvinceNormalized)
+        # first-seen order, as the chart showed it before
+        .order_by(func.min(Register.RegisterID))
+    ).all()
+    return dict(rows)
+
+
+def education_level_counts(db: Session) -> Dict[str, int]:
+    rows = db.execute(
+        select(Register.EducationLevel, func.count(Register.RegisterID))
+        .where(Register.EducationLevel.isnot(None), Register.EducationLevel != '')
+        .group_by(Register.EducationLevel)
+    ).all()
+    return dict(rows)
+
+
+def type_good_counts(db: Session) -> Dict[str, int]:
+    rows = db.execute(
+        select(Good.TypeGoodNormalized, func.count(Good.GoodID))
+        .join(Register, Good.GivenToWhome == Register.RegisterID)
+        .where(Good.TypeGoodNormalized.isnot(None))
+        .group_by(Good.TypeGoodNormalized)
+        .order_by(Good.TypeGoodNormalized)
+    ).all()
+    return dict(rows)
+
+
+def admin_and_children_counts(db: Session) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Registers per admin id and the children-per-register histogram, from one
+    query over a CTE holding each register's admin and child count.
+    """
+    register_children = (
+        select(
+            Register.RegisterID,
+            Register.UnderWhichAdmin,
+            func.count(ChildrenOfRegister.ChildrenOfRegisterID).label("child_count"),
+        )
+        .outerjoin(ChildrenOfRegister, ChildrenOfRegister.RegisterID == Register.RegisterID)
+        .group_by(Register.RegisterID, Register.UnderWhichAdmin)
+        .cte("register_children")
+    )
+    per_admin = (
+        select(
+            literal("admin").label("kind"),
+            register_children.c.UnderWhichAdmin.label("bucket"),
+            func.count(register_children.c.RegisterID).label("count"),
+        )
+        .where(register_children.c.UnderWhichAdmin.isnot(None))
+        .group_by(register_children.c.UnderWhichAdmin)
+    )
+    per_child_count = (
+        select(
+            literal("children").label("kind"),
+            register_children.c.child_count.label("bucket"),
+            func.count(register_children.c.RegisterID).label("count"),
+        )
+        .group_by(register_children.c.child_count)
+    )
+    query = union_all(per_admin, per_child_count).order_by("kind", "bucket")
+
+    admin_counts: Dict[int, int] = {}
+    children_counts: Dict[int, int] = {}
+    for row in db.execute(query):
+        if row.kind == "admin":
+            admin_counts[row.bucket] = row.count
+        else:
+            children_counts[row.bucket] = row.count
+    return admin_counts, children_counts
+
+
+def admin_labels(db: Session, admin_counts: Dict[int, int]) -> Dict[str, int]:
+    """Re-key registers-per-admin counts by admin name, in admin id order; unknown admins are dropped."""
+    admins = db.execute(
+        select(Admin.AdminID, Admin.FirstName, Admin.LastName)
+        .where(Admin.AdminID.in_(list(admin_counts)))
+        .order_by(Admin.AdminID)
+    ).all()
+    labelled: Dict[str, int] = {}
+    for index, admin in enumerate(admins, start=1):
+        name = f"{admin.FirstName or ''} {admin.LastName or ''}".strip()
+        labelled[name or f"Admin {index}"] = admin_counts[admin.AdminID]
+    return labelled
+
+
+def chart_data(admin_counts: Dict[str, int], province_counts: Dict[str, int],
+               education_level_counts: Dict[str, int], type_good_counts: Dict[str, int],
+               children_counts: Dict[int, int]) -> dict:
+    # تبدیل به فرمت مناسب برای نمودار
+    return {
+        'adminStats': {
+            'labels': list(admin_counts.keys()),
+            'datasets': [{
+                'label': 'تعداد رجیسترها بر اساس نماینده',
+                'data': list(admin_counts.values()),
+                'backgroundColor': '#4CAF50'
+            }]
+        },
+        'provinceStats': {
+            'labels': list(province_counts.keys()),
+            'datasets': [{
+                'label': 'تعداد رجیسترها بر اساس استان',
+                'data': list(province_counts.values()),
+                'backgroundColor': '#2196F3'
+            }]
+        },
+        'educationLevelStats': {
+            'labels': EDUCATION_LEVELS,
+            'datasets': [{
+                'label': 'تعداد رجیسترها بر اساس سطح تحصیلات',
+                'data': [education_level_counts.get(key, 0) for key in EDUCATION_LEVELS],
+                'backgroundColor': '#2196F3'
+            }]
+        },
+        'typeGoodStats': {
+            'labels': list(type_good_counts.keys()),
+            'datasets': [{
+                'label': 'تعداد رجیسترها بر اساس نوع کمک',
+                'data': list(type_good_counts.values()),
+                'backgroundColor': '#9C27B0'
+            }]
+        },
+        'childrenNumberStats': {
+            'labels': list(children_counts.keys()),
+            'datasets': [{
+                'label': 'تعداد رجیسترها بر اساس تعداد فرزندان',
+                'data': list(children_counts.values()),
+                'backgroundColor': '#9C27B0'
+            }]
+        }
+    }
@@ -0,0 +1,157 @@
+"""
+Precompressed snapshots of the full-map payloads.
+
+The unfiltered /find-needy and /find-disconnected-needy responses are the
+same for every user. They are serialized once per table version (see
+src.core.conditional) and kept in memory as identity and gzip bodies. A
+request is then answered with the stored bytes for its Accept-Encoding:
+no query, no JSON encoding and no per-request compression. The first request after a write rebuilds
+the snapshot; concurrent ones wait for it.
+"""
+import asyncio
+import gzip
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.base import BaseConfig
+from src.core import stats
+
+GZIP_LEVEL = 9
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    versions: Tuple[Tuple[str, int], ...]
+    bodies: Dict[str, bytes]  # content coding -> body; "identity" is uncompressed
+    built: float
+
+
+def encode_json(value: Any) -> bytes:
+    # Same output as the router's ORJSONResponse; rows are plain mappings of JSON-native values
+    return orjson.dumps([dict(row) for row in value] if isinstance(value, list) else value,
+                        option=orjson.OPT_NON_STR_KEYS)
+
+
+def compress(body: bytes) -> Dict[str, bytes]:
+    return {"identity": body, "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """gzip if it is available and the client accepts it, else identity."""
+    weights: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    if "gzip" in available and weights.get("gzip", weights.get("*", 0.0)) > 0:
+        return "gzip"
+    return "identity"
+
+
+def _version_key(versions, tables: Tuple[str, ...]) -> Tuple[Tuple[str, int], ...]:
+    return tuple(sorted((table, versions[table][0]) for table in tables))
+
+
+class SnapshotStore:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.hits = 0
+        self.builds = 0
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._async_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _current(self, name: str, versions: Tuple[Tuple[str, int], ...]) -> Optional[Snapshot]:
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None and snapshot.versions == versions:
+            self.hits += 1
+            return snapshot
+        return None
+
+    def get(self, name: str, versions: Tuple[Tuple[str, int], ...],
+            build: Callable[[], Any]) -> Snapshot:
+        """The snapshot `name` at `versions`, built from build()'s return value if missing or outdated."""
+        snapshot = self._current(name, versions)
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            return self._current(name, versions) or self._save(name, versions, compress(encode_json(build())))
+
+    async def aget(self, name: str, versions: Tuple[Tuple[str, int], ...],
+                   build: Callable[[], Awaitable[Any]]) -> Snapshot:
+        """get() for async endpoints; encoding and compression run in the threadpool, off the event loop."""
+        snapshot = self._current(name, versions)
+        if snapshot is not None:
+            return snapshot
+        async with self._async_locks.setdefault(name, asyncio.Lock()):
+            snapshot = self._current(name, versions)
+            if snapshot is not None:
+                return snapshot
+            value = await build()
+            return self._save(name, versions, await run_in_threadpool(lambda: compress(encode_json(value))))
+
+    def _save(self, name: str, versions: Tuple[Tuple[str, int], ...], bodies: Dict[str, bytes]) -> Snapshot:
+        snapshot = self._snapshots[name] = Snapshot(versions, bodies, time.time())
+        self.builds += 1
+        return snapshot
+
+    def response(self, request: Request, db: Session, name: str, tables: Tuple[str, ...],
+                 build: Callable[[], Any]) -> Response:
+        """
+        Serve snapshot `name` of data read from `tables`. Validators set by
+        the `conditional` dependency on the request are passed on.
+        """
+        versions = getattr(request.state, "table_versions", None) or stats.read_table_versions(db, tables)
+        return self._respond(request, self.get(name, _version_key(versions, tables), build))
+
+    async def aresponse(self, request: Request, db: AsyncSession, name: str, tables: Tuple[str, ...],
+                        build: Callable[[], Awaitable[Any]]) -> Response:
+        """response() for async endpoints."""
+        versions = getattr(request.state, "table_versions", None) \
+            or await db.run_sync(stats.read_table_versions, tables)
+        return self._respond(request, await self.aget(name, _version_key(versions, tables), build))
+
+    def warm(self, db: Session, name: str, tables: Tuple[str, ...], build: Callable[[], Any]) -> None:
+        """Build snapshot `name` ahead of the first request for it, e.g. at startup."""
+        self.get(name, _version_key(stats.read_table_versions(db, tables), tables), build)
+
+    @staticmethod
+    def _respond(request: Request, snapshot: Snapshot) -> Response:
+        coding = choose_encoding(request.headers.get("accept-encoding"), snapshot.bodies)
+        headers = {"Vary": "Accept-Encoding", **getattr(request.state, "conditional_headers", {})}
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(snapshot.bodies[coding], media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "builds": self.builds,
+            "snapshots": {
+                name: {coding: len(body) for coding, body in snapshot.bodies.items()}
+                for name, snapshot in self._snapshots.items()
+            },
+        }
+
+
+snapshot_store = SnapshotStore(enabled=BaseConfig().SNAPSHOTS_ENABLED)
@@ -0,0 +1,403 @@
+"""
+Incrementally maintained dashboard counters (see StatCounter).
+
+Rather than having every endpoint adjust counters by hand, session hooks
+read the contribution of each affected register, good and admin row before
+and after a write and collect the difference in session.info. This covers
+ORM flushes as well as bulk INSERT / UPDATE / DELETE statements issued
+through a Session. `rebuild` recomputes everything from scratch.
+
+The same hooks note every written table; its change counter (TableVersion)
+is what conditional GETs use as a cheap validator.
+
+Nothing is written to stat_counter until the transaction commits: then
+one upsert per counter row, in sorted key order, so every transaction
+locks those rows in the same order and only for the end of the
+transaction. The register total, which every register write touches, is
+split over TOTAL_SHARDS rows ("all:<n>", plus the seeded "all") and a
+transaction adds to a random one; read_total sums them.
+"""
+import itertools
+import logging
+import random
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect, select, update, insert, delete
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, ORMExecuteState
+
+from src.core import register_stats
+from src.core.models import Base
+from src.core.models.admin import Admin
+from src.core.models.good import Good
+from src.core.models.register import Register, ChildrenOfRegister
+from src.core.models.stats import StatCounter, StatDimension
+from src.core.util import normalize_label
+
+logger = logging.getLogger(__name__)
+
+TOTAL_KEY = "all"
+TOTAL_SHARDS = 16
+_KEY_LENGTH = StatCounter.__table__.c.Key.type.length
+_IN_CHUNK_SIZE = 500
+_PENDING_SNAPSHOT = "stats_pending_snapshot"
+_PENDING_DELTAS = "stats_pending_deltas"
+_PENDING_TABLES = "stats_pending_tables"
+
+# (dimension, key) -> count
+Counts = Counter
+Targets = Dict[type, Set[int]]
+
+_PRIMARY_KEYS = {Register: "RegisterID", Good: "GoodID", Admin: "AdminID"}
+
+
+def _key(value) -> str:
+    return str(value)[:_KEY_LENGTH]
+
+
+def register_keys(province: Optional[str], admin_id: Optional[int], education: Optional[str],
+                  child_count: int) -> List[Tuple[str, str]]:
+    keys = [(StatDimension.RegisterTotal, TOTAL_KEY), (StatDimension.RegisterChildren, _key(child_count))]
+    if province:
+        keys.append((StatDimension.RegisterProvince, _key(province)))
+    if admin_id is not None:
+        keys.append((StatDimension.RegisterAdmin, _key(admin_id)))
+    if education:
+        keys.append((StatDimension.RegisterEducation, _key(education)))
+    return keys
+
+
+def _chunks(ids: Iterable[int]):
+    ids = sorted(ids)
+    for start in range(0, len(ids), _IN_CHUNK_SIZE):
+        yield ids[start:start + _IN_CHUNK_SIZE]
+
+
+def _snapshot(conn: Connection, targets: Targets) -> Counts:
+    """Counter contributions of the given rows as they are in the database right now."""
+    counts = Counter()
+    child_count = (
+        select(func.count(ChildrenOfRegister.ChildrenOfRegisterID))
+        .where(ChildrenOfRegister.RegisterID == Register.RegisterID)
+        .scalar_subquery()
+    )
+    for chunk in _chunks(targets.get(Register, ())):
+        rows = conn.execute(
+            select(Register.ProvinceNormalized, Register.UnderWhichAdmin, Register.EducationLevel,
+                   child_count.label("child_count"))
+            .where(Register.RegisterID.in_(chunk))
+        )
+        for row in rows:
+            counts.update(register_keys(row.ProvinceNormalized, row.UnderWhichAdmin, row.EducationLevel, row.child_count))
+    for chunk in _chunks(targets.get(Good, ())):
+        rows = conn.execute(
+            select(Good.TypeGoodNormalized)
+            .where(Good.GoodID.in_(chunk), Good.GivenToWhome.isnot(None), Good.TypeGoodNormalized.isnot(None))
+        )
+        counts.update((StatDimension.GoodType, _key(type_good)) for type_good in rows.scalars())
+    for chunk in _chunks(targets.get(Admin, ())):
+        rows = conn.execute(select(Admin.UserRole).where(Admin.AdminID.in_(chunk)))
+        counts.update((StatDimension.AdminRole, _key(role)) for role in rows.scalars())
+    return counts
+
+
+def _inserted_contributions(model: type, rows: List[dict]) -> Counts:
+    """Contributions of rows about to be bulk inserted, read from the statement parameters."""
+    counts = Counter()
+    for row in rows:
+        if model is Register:
+            province = row.get("ProvinceNormalized") or normalize_label(row.get("Province"))
+            counts.update(register_keys(province, row.get("UnderWhichAdmin"), row.get("EducationLevel"), 0))
+        elif model is Good:
+            type_good = row.get("TypeGoodNormalized") or normalize_label(row.get("TypeGood"))
+            if row.get("GivenToWhome") is not None and type_good:
+                counts[(StatDimension.GoodType, _key(type_good))] += 1
+        elif model is Admin:
+            counts[(StatDimension.AdminRole, _key(row.get("UserRole") or "Admin"))] += 1
+    return counts
+
+
+def apply_deltas(conn: Connection, deltas: Counts) -> None:
+    """Add deltas to the counter rows, creating missing ones."""
+    rows = [
+        {"Dimension": str(dimension), "Key": key, "Count": delta}
+        for (dimension, key), delta in sorted(deltas.items())  # fixed lock order across transactions
+        if delta
+    ]
+    if not rows:
+        return
+    table = StatCounter.__table__
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.Dimension, table.c.Key],
+            set_={"Count": table.c.Count + stmt.excluded.Count, "UpdatedDate": func.now()},
+        )
+        conn.execute(stmt, rows)
+        return
+    for row in rows:
+        result = conn.execute(
+            update(table)
+            .where(table.c.Dimension == row["Dimension"], table.c.Key == row["Key"])
+            .values(Count=table.c.Count + row["Count"], UpdatedDate=func.now())
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def _diff(before: Counts, after: Counts) -> Counts:
+    deltas = Counter()
+    for key in before.keys() | after.keys():
+        deltas[key] = after.get(key, 0) - before.get(key, 0)
+    return deltas
+
+
+def _collect_deltas(session: Session, deltas: Counts) -> None:
+    session.info.setdefault(_PENDING_DELTAS, Counter()).update(deltas)
+
+
+def _shard_total(deltas: Counts) -> Counts:
+    """Move the register total delta to one of the TOTAL_SHARDS rows."""
+    total = deltas.pop((StatDimension.RegisterTotal, TOTAL_KEY), 0)
+    if total:
+        deltas[(StatDimension.RegisterTotal, f"{TOTAL_KEY}:{random.randrange(TOTAL_SHARDS)}")] += total
+    return deltas
+
+
+# --- ORM flushes -------------------------------------------------------------
+
+def _flush_targets(session: Session) -> Targets:
+    targets: Targets = {Register: set(), Good: set(), Admin: set()}
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in itertools.chain(session.new, dirty, session.deleted):
+        state = inspect(obj)
+        if isinstance(obj, ChildrenOfRegister):
+            # A child changes the children bucket of its (old and new) register
+            history = state.attrs.RegisterID.history
+            targets[Register].update(v for v in itertools.chain(history.added, history.unchanged, history.deleted)
+                                     if v is not None)
+            continue
+        for model, pk in _PRIMARY_KEYS.items():
+            if isinstance(obj, model) and state.dict.get(pk) is not None:
+                targets[model].add(state.dict[pk])
+    return targets
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session: Session, flush_context, instances) -> None:
+    targets = _flush_targets(session)
+    if not any(targets.values()):
+        return
+    session.info[_PENDING_SNAPSHOT] = _snapshot(session.connection(), targets)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context) -> None:
+    # new objects have their primary keys by now
+    targets = _flush_targets(session)
+    before = session.info.pop(_PENDING_SNAPSHOT, Counter())
+    if not any(targets.values()):
+        return
+    _collect_deltas(session, _diff(before, _snapshot(session.connection(), targets)))
+
+
+# --- bulk statements ---------------------------------------------------------
+
+def _statement_rows(state: ORMExecuteState) -> List[dict]:
+    params = state.parameters
+    if params is None:
+        return []
+    return [params] if isinstance(params, dict) else list(params)
+
+
+def _statement_targets(conn: Connection, model: type, state: ORMExecuteState) -> Targets:
+    """Rows whose contributions a bulk statement can change; children map to their registers."""
+    targets: Targets = {Register: set(), Good: set(), Admin: set()}
+    if model is ChildrenOfRegister:
+        # registers children are inserted into or moved to
+        targets[Register].update(r["RegisterID"] for r in _statement_rows(state) if r.get("RegisterID") is not None)
+        if state.is_update:
+            moved_to = state.statement.compile().params.get("RegisterID")
+            if moved_to is not None:
+                targets[Register].add(moved_to)
+        if state.is_insert:
+            return targets
+
+    whereclause = state.statement.whereclause
+    if whereclause is None and _statement_rows(state):
+        # bulk UPDATE by primary key
+        pk = "ChildrenOfRegisterID" if model is ChildrenOfRegister else _PRIMARY_KEYS[model]
+        ids = {r[pk] for r in _statement_rows(state) if r.get(pk) is not None}
+        whereclause = getattr(model, pk).in_(ids)
+    if model is ChildrenOfRegister:
+        query = select(ChildrenOfRegister.RegisterID).where(ChildrenOfRegister.RegisterID.isnot(None))
+        if whereclause is not None:
+            query = query.where(whereclause)
+        targets[Register].update(conn.execute(query).scalars())
+    else:
+        query = select(getattr(model, _PRIMARY_KEYS[model]))
+        if whereclause is not None:
+            query = query.where(whereclause)
+        targets[model].update(conn.execute(query).scalars())
+    return targets
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(state: ORMExecuteState):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return None
+    mapper = state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in (Register, ChildrenOfRegister, Good, Admin):
+        return None
+    conn = state.session.connection()
+
+    if state.is_insert and model is not ChildrenOfRegister:
+        rows = _statement_rows(state)
+        if not rows:
+            logger.warning("stat counters not updated for %s insert without parameters", model.__name__)
+        _collect_deltas(state.session, _inserted_contributions(model, rows))
+        return None
+
+    targets = _statement_targets(conn, model, state)
+    before = _snapshot(conn, targets)
+    result = state.invoke_statement()
+    after = _snapshot(conn, targets)
+    _collect_deltas(state.session, _diff(before, after))
+    return result
+
+
+# --- table versions ------------------------------------------------------------
+
+def _versioned_table(mapper) -> Optional[str]:
+    if mapper is None or mapper.class_ is StatCounter:
+        return None
+    return mapper.local_table.name
+
+
+def bump_table_versions(conn: Connection, tables: Iterable[str]) -> None:
+    apply_deltas(conn, Counter({(StatDimension.TableVersion, _key(table)): 1 for table in tables}))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session: Session, flush_context) -> None:
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    tables = {_versioned_table(inspect(obj).mapper) for obj in itertools.chain(session.new, dirty, session.deleted)}
+    tables.discard(None)
+    if tables:
+        session.info.setdefault(_PENDING_TABLES, set()).update(tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_table(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        table = _versioned_table(state.bind_mapper)
+        if table is not None:
+            state.session.info.setdefault(_PENDING_TABLES, set()).add(table)
+
+
+# --- commit ----------------------------------------------------------------------
+
+@event.listens_for(Session, "before_commit")
+def _apply_pending(session: Session) -> None:
+    # commit flushes after before_commit; flush first so those changes are counted too
+    session.flush()
+    deltas = _shard_total(session.info.pop(_PENDING_DELTAS, Counter()))
+    deltas.update({(StatDimension.TableVersion, _key(table)): 1 for table in session.info.pop(_PENDING_TABLES, ())})
+    if any(deltas.values()):
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session: Session, transaction) -> None:
+    # rolled back or closed without a commit
+    if transaction.parent is None:
+        session.info.pop(_PENDING_DELTAS, None)
+        session.info.pop(_PENDING_TABLES, None)
+
+
+def read_table_versions(db: Session, tables: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    """table -> (version, time of the last change); (0, None) for tables never written through a Session."""
+    versions = {table: (0, None) for table in tables}
+    rows = db.execute(
+        select(StatCounter.Key, StatCounter.Count, StatCounter.UpdatedDate)
+        .where(StatCounter.Dimension == str(StatDimension.TableVersion), StatCounter.Key.in_(list(versions)))
+    )
+    for table, count, updated in rows:
+        versions[table] = (count, updated)
+    return versions
+
+
+# --- reading and rebuilding ----------------------------------------------------
+
+def read_total(db: Session) -> int:
+    """Number of registers: the sum of the register total shards."""
+    return db.scalar(
+        select(func.coalesce(func.sum(StatCounter.Count), 0))
+        .where(StatCounter.Dimension == str(StatDimension.RegisterTotal))
+    )
+
+
+def read_counters(db: Session, *dimensions: StatDimension) -> Dict[str, Dict[str, int]]:
+    """Non-zero counters of the given dimensions, largest first; use read_total for RegisterTotal."""
+    counters: Dict[str, Dict[str, int]] = {str(d): {} for d in dimensions}
+    rows = db.execute(
+        select(StatCounter.Dimension, StatCounter.Key, StatCounter.Count)
+        .where(StatCounter.Dimension.in_([str(d) for d in dimensions]), StatCounter.Count > 0)
+        .order_by(StatCounter.Dimension, StatCounter.Count.desc(), StatCounter.Key)
+    )
+    for dimension, key, count in rows:
+        counters[dimension][key] = count
+    return counters
+
+
+def compute_counters(db: Session) -> Counts:
+    """All counters computed from scratch with GROUP BY queries."""
+    counts = Counter()
+    counts[(StatDimension.RegisterTotal, TOTAL_KEY)] = db.scalar(select(func.count(Register.RegisterID))) or 0
+    for province, count in register_stats.province_counts(db).items():
+        counts[(StatDimension.RegisterProvince, _key(province))] += count
+    for education, count in register_stats.education_level_counts(db).items():
+        counts[(StatDimension.RegisterEducation, _key(education))] += count
+    for type_good, count in register_stats.type_good_counts(db).items():
+        counts[(StatDimension.GoodType, _key(type_good))] += count
+    admin_counts, children_counts = register_stats.admin_and_children_counts(db)
+    for admin_id, count in admin_counts.items():
+        counts[(StatDimension.RegisterAdmin, _key(admin_id))] += count
+    for child_count, count in children_counts.items():
+        counts[(StatDimension.RegisterChildren, _key(child_count))] += count
+    for role, count in db.execute(select(Admin.UserRole, func.count(Admin.AdminID)).group_by(Admin.UserRole)):
+        counts[(StatDimension.AdminRole, _key(role))] += count
+    return Counter({key: count for key, count in counts.items() if count})
+
+
+def rebuild(db: Session) -> int:
+    """
+    Replace all counters with freshly computed ones; returns how many had drifted.
+    Table versions are kept and bumped, since the rebuild usually follows
+    writes that bypassed the Session hooks.
+    """
+    fresh = compute_counters(db)
+    counters = StatCounter.Dimension != str(StatDimension.TableVersion)
+    current = Counter()
+    for dimension, key, count in db.execute(
+            select(StatCounter.Dimension, StatCounter.Key, StatCounter.Count).where(counters)):
+        # the total shards compare as one counter
+        current[(dimension, TOTAL_KEY if dimension == StatDimension.RegisterTotal else key)] += count
+    drifted = sum(1 for key in fresh.keys() | current.keys() if fresh.get(key, 0) != current.get(key, 0))
+    db.execute(delete(StatCounter).where(counters))
+    if fresh:
+        db.execute(insert(StatCounter), [
+            {"Dimension": str(dimension), "Key": key, "Count": count} for (dimension, key), count in sorted(fresh.items())
+        ])
+    bump_table_versions(db.connection(), [table.name for table in Base.metadata.sorted_tables
+                                          if table is not StatCounter.__table__])
+    db.commit()
+    return drifted
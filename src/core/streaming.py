@@ -0,0 +1,107 @@
+"""
+NDJSON (one JSON object per line) streaming of large query results.
+
+Rows are fetched in batches with yield_per and written out as they
+arrive, so worker memory stays bounded by the batch size and the first
+bytes go out before the query has been fully read.
+
+A paginated stream (`limit`/`cursor` set) ends with one more line,
+`{"next_cursor": ...}`, which is null on the last page; it is the only
+line without the row fields, so a client reads rows until it sees it.
+"""
+from decimal import Decimal
+from typing import Dict, Iterator, Optional
+
+import anyio
+import orjson
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from src.core.pagination import PageParams, encode_cursor
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+
+
+def wants_ndjson(
+        request: Request,
+        stream: Optional[bool] = Query(None, description="Stream rows as NDJSON; same as Accept: application/x-ndjson"),
+) -> bool:
+    """FastAPI dependency: True when the client asked for NDJSON by query flag or Accept header."""
+    if stream is not None:
+        return stream
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _json_default(value):
+    # orjson handles datetimes itself
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value) -> bytes:
+    return orjson.dumps(value, default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _ndjson_lines(statement, batch_size: int, replica: bool, params: PageParams, key: str) -> Iterator[bytes]:
+    # The request's session is closed before a streaming body is sent, so
+    # the generator owns its own session for the lifetime of the stream
+    from src.config.database import ReadSessionLocal, SessionLocal
+
+    db = (ReadSessionLocal if replica else SessionLocal)()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size, stream_results=True))
+        # a paginated statement fetches one row past the page (see `paginate`)
+        size = params.size if params.paginated else None
+        sent, last, more = 0, None, False
+        for rows in result.mappings().partitions():
+            if size is not None and sent + len(rows) > size:
+                rows, more = rows[:size - sent], True
+            if rows:
+                sent += len(rows)
+                last = rows[-1]
+                yield b"".join(_dumps(dict(row)) for row in rows)
+            if more:
+                break
+        if params.paginated:
+            yield _dumps({"next_cursor": encode_cursor(last[key]) if more else None})
+    finally:
+        db.close()
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its line generator, and so the session
+    the generator holds, however the response ends. Starlette stops
+    iterating a body on client disconnect but leaves closing it to the
+    garbage collector, which would keep the connection checked out.
+    """
+
+    def __init__(self, lines: Iterator[bytes], headers: Optional[Dict[str, str]] = None):
+        super().__init__(lines, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+        self._lines = lines
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # the stream may end by cancellation; closing rolls back and
+            # returns the connection, which blocks, hence the thread
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(self._lines.close)
+
+
+def ndjson_response(statement, batch_size: int = STREAM_BATCH_SIZE, replica: bool = False,
+                    headers: Optional[Dict[str, str]] = None, params: PageParams = PageParams(),
+                    key: str = "id") -> NDJSONResponse:
+    """
+    Stream the rows of a Core select as NDJSON, from the read replica if
+    `replica`. `headers` are sent with it, e.g. the validators set by the
+    `conditional` dependency (request.state.conditional_headers). For a
+    statement built with `paginate(..., params)` the stream holds one page
+    and ends with the next_cursor line; `key` names the key column.
+    """
+    return NDJSONResponse(_ndjson_lines(statement, batch_size, replica, params, key), headers=headers)
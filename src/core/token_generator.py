@@ -1 +1,105 @@
+"""
+Signed access tokens (JWT) issued by /login and checked by the API
+router's authenticate dependency without a database lookup.
 
+A token carries the admin's AdminID and UserRole, is signed with the
+key named by JWT_ACTIVE_KEY and names it in its `kid` header. It is
+accepted while any key in JWT_KEYS has that id, so keys rotate without
+logging anyone out:
+
+1. add the new key to JWT_KEYS and deploy;
+2. make it JWT_ACTIVE_KEY and deploy (new tokens use it);
+3. after JWT_TTL_SECONDS, drop the old key (its tokens have expired).
+
+With AUTH_ENABLED the app refuses to start while any key is TOKEN's
+public default or shorter than MIN_KEY_BYTES (see .env.example).
+
+Verified tokens are kept in a small LRU (AUTH_CACHE_SIZE) so a client
+sending the same token again skips the signature check; an entry is only
+used until the token's expiry and while its key is still configured.
+"""
+import functools
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import jwt
+
+from src.config.base import BaseConfig
+
+
+# RFC 7518 3.2: an HS256 key should be at least as long as the hash output
+MIN_KEY_BYTES = 32
+DEFAULT_TOKEN = BaseConfig.model_fields["TOKEN"].default
+
+
+class InvalidToken(Exception):
+    """The token is malformed, expired, or not signed by a configured key."""
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    admin_id: int
+    role: str
+    key_id: str
+    expires: float
+
+
+class TokenIssuer:
+    def __init__(self, keys: Dict[str, str], active_key: str, algorithm: str, ttl: float, cache_size: int):
+        if active_key not in keys:
+            raise ValueError(f"JWT_ACTIVE_KEY {active_key!r} is not in JWT_KEYS")
+        self.keys = dict(keys)
+        self.active_key = active_key
+        self.algorithm = algorithm
+        self.ttl = ttl
+        # keyed on the token; a failed check raises and is not cached
+        self._verified = functools.lru_cache(maxsize=cache_size)(self._decode)
+
+    def issue(self, admin_id: int, role: str) -> str:
+        now = int(time.time())
+        claims = {"AdminID": admin_id, "UserRole": str(role), "iat": now, "exp": now + int(self.ttl)}
+        return jwt.encode(claims, self.keys[self.active_key], algorithm=self.algorithm,
+                          headers={"kid": self.active_key})
+
+    def verify(self, token: str) -> TokenClaims:
+        claims = self._verified(token)
+        if claims.expires > time.time() and claims.key_id in self.keys:
+            return claims
+        # verified before it expired or its key was dropped; checked again, this raises
+        return self._decode(token)
+
+    def _decode(self, token: str) -> TokenClaims:
+        try:
+            key_id = jwt.get_unverified_header(token).get("kid")
+            if key_id not in self.keys:
+                raise InvalidToken("unknown signing key")
+            payload = jwt.decode(token, self.keys[key_id], algorithms=[self.algorithm],
+                                 options={"require": ["exp", "AdminID", "UserRole"]})
+            return TokenClaims(int(payload["AdminID"]), payload["UserRole"], key_id, float(payload["exp"]))
+        except (jwt.InvalidTokenError, TypeError, ValueError) as exc:
+            raise InvalidToken(str(exc)) from exc
+
+
+def check_keys(keys: Dict[str, str]) -> None:
+    """Refuse signing keys anyone could know or guess: TOKEN's default and keys under MIN_KEY_BYTES."""
+    for key_id, secret in keys.items():
+        if secret == DEFAULT_TOKEN:
+            raise ValueError(f"JWT key {key_id!r} is the default TOKEN, which is public; "
+                             "set JWT_KEYS or TOKEN to a random secret (see .env.example)")
+        if len(secret.encode("utf-8")) < MIN_KEY_BYTES:
+            raise ValueError(f"JWT key {key_id!r} is shorter than {MIN_KEY_BYTES} bytes; "
+                             "set JWT_KEYS or TOKEN to a longer random secret (see .env.example)")
+
+
+def issuer_from_settings(settings: Optional[BaseConfig] = None) -> TokenIssuer:
+    settings = settings or BaseConfig()
+    # without JWT_KEYS, TOKEN is the one key
+    keys = settings.JWT_KEYS or {settings.JWT_ACTIVE_KEY: settings.TOKEN}
+    if settings.AUTH_ENABLED:
+        check_keys(keys)
+    return TokenIssuer(keys, settings.JWT_ACTIVE_KEY, settings.JWT_ALGORITHM, settings.JWT_TTL_SECONDS,
+                       settings.AUTH_CACHE_SIZE)
+
+
+token_issuer = issuer_from_settings()
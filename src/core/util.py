@@ -1,3 +1,66 @@
-def set_password(password: str):
-    import bcrypt
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+import re
+import unicodedata
+from typing import Optional
+
+_DIGIT_TRANSLATION = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+_NON_DIGIT = re.compile(r'[^0-9]')
+_LABEL_SEPARATORS = re.compile(r'[,،\-\u2010-\u2015]+')
+_WHITESPACE = re.compile(r'\s+')
+_COORDINATE = re.compile(r'^[+-]?\d+(\.\d+)?$')
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Canonical form of a phone number, used for duplicate checks and lookups.
+    Persian/Arabic digits are folded to ASCII, separators and whitespace are
+    dropped and the Iranian country prefix (+98, 0098, 98) becomes a leading 0.
+    """
+    if not isinstance(phone, str):
+        return None
+    value = phone.translate(_DIGIT_TRANSLATION).strip()
+    has_plus = value.startswith('+')
+    digits = _NON_DIGIT.sub('', value)
+    if not digits:
+        return None
+    if digits.startswith('0098'):
+        return '0' + digits[4:]
+    if digits.startswith('98') and (has_plus or len(digits) == 12):
+        return '0' + digits[2:]
+    if has_plus:
+        return '+' + digits
+    if len(digits) == 10 and digits.startswith('9'):
+        return '0' + digits
+    return digits
+
+
+def normalize_label(s: Optional[str]) -> Optional[str]:
+    """
+    Canonical form of a free-text label (province, type of good) used to group
+    statistics; None when nothing is left after normalization.
+    """
+    if not s:
+        return None
+    # نرمال‌سازی یونیکد
+    s = unicodedata.normalize('NFKC', s)
+    # تبدیل حروف عربی به معادل فارسی
+    s = s.replace('ي', 'ی').replace('ك', 'ک')
+    # تبدیل NBSP و سایر فضاهای نامرئی به فاصله معمولی
+    s = s.replace('\u00A0', ' ').replace('\u200c', ' ')
+    # جایگزینی کاماها و انواع خط‌کِش با یک فاصله
+    s = _LABEL_SEPARATORS.sub(' ', s)
+    # فشرده‌سازی فاصلهٔ داخلی و حذف فاصلهٔ اول/آخر
+    s = _WHITESPACE.sub(' ', s).strip()
+    return s or None
+
+
+def parse_coordinate(value: Optional[str]) -> Optional[float]:
+    """
+    Numeric value of a Latitude/Longitude text column, or None when it is not
+    a plain decimal number (the same rule the map queries used to apply in SQL).
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.translate(_DIGIT_TRANSLATION).strip()
+    if not _COORDINATE.match(value):
+        return None
+    return float(value)
@@ -1,24 +1,25 @@
-import os
-import importlib
-
-import typer
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.config.base import BaseConfig
 
 from src.api import router
-from src.core.api_utils import print_all_api_info
+from src.core.api_utils import print_all_api_info, use_cached_openapi
+from src.core.lifespan import lifespan
 from src.core.logging_middleware import LoggingMiddleware
-from sqlalchemy_utils.functions import database_exists, create_database, drop_database
+from src.core.read_your_writes import ReadYourWritesMiddleware
+from src.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
 from src.config.database import engine
 from src.core.models import Base  # Ensure all models are imported
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 settings = BaseConfig()
 
 
 
 # Add logging middleware first (order matters)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if settings.DATABASE_REPLICA_URL:
+    app.add_middleware(ReadYourWritesMiddleware, seconds=settings.READ_YOUR_WRITES_SECONDS)
 
 # Optionally enable CORS for frontend integration
 # Allow all origins for development/testing
@@ -34,27 +35,34 @@ app.add_middleware(
 def index():
     return 'Hello'
 
+# Prometheus scrape target; outside the API router and its authentication
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 app.include_router(router)
 
+use_cached_openapi(app, settings.OPENAPI_CACHE_PATH)
+
 # Generate and print all API paths and request payloads
-print_all_api_info(app)
+if settings.PRINT_API_INFO:
+    print_all_api_info(app)
 
 def init_db():
     """Initialize the database."""
+    # sqlalchemy_utils is slow to import and only needed here, not by the app
+    from sqlalchemy_utils.functions import database_exists, create_database
+
     if not database_exists(engine.url):
+        print("Creating database")
         create_database(engine.url)
 
         Base.metadata.create_all(engine)
 
 ## start the app
 if __name__ == "__main__":
-    if not database_exists(engine.url):
-        print("Creating database")
-        init_db()
-
-    typer.echo("Starting the app")
-    import uvicorn
-    uvicorn.run("src.main:app",
-                host=settings.HOST,
-                port=settings.PORT,
-                reload=False)
+    init_db()
+
+    print("Starting the app")
+    from src.server import run
+    run(settings)
@@ -0,0 +1,47 @@
+"""
+Maintenance commands, e.g. `python -m src.manage rebuild-stats`
+"""
+from typing import Optional
+
+import typer
+
+app = typer.Typer()
+
+
+@app.command("rebuild-stats")
+def rebuild_stats():
+    """Recompute the dashboard counters from the register, good and admin tables."""
+    from src.config.database import SessionLocal
+    from src.core import stats
+
+    db = SessionLocal()
+    try:
+        drifted = stats.rebuild(db)
+    finally:
+        db.close()
+    typer.echo(f"Rebuilt stat counters ({drifted} had drifted)")
+
+
+@app.command("export-openapi")
+def export_openapi(output: Optional[str] = typer.Option(None, help="Defaults to OPENAPI_CACHE_PATH")):
+    """Write the OpenAPI schema to disk; the app serves it instead of generating it (run at build time)."""
+    from src.config.base import BaseConfig
+    from src.core.api_utils import export_openapi as export
+    from src.main import app as api
+
+    path = output or BaseConfig().OPENAPI_CACHE_PATH
+    export(api, path)
+    typer.echo(f"Wrote OpenAPI schema to {path}")
+
+
+@app.command("api-info")
+def api_info():
+    """Print every route with its parameters and request body schemas."""
+    from src.core.api_utils import print_all_api_info
+    from src.main import app as api
+
+    print_all_api_info(api)
+
+
+if __name__ == "__main__":
+    app()
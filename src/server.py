@@ -0,0 +1,69 @@
+"""
+Production launch of the app, used by `python src/main.py` (entrypoint.sh).
+
+SERVER=uvicorn runs WORKERS uvicorn worker processes. SERVER=gunicorn
+runs gunicorn with uvicorn's worker class; gunicorn also restarts
+crashed workers and replaces them gracefully on HUP. Either way each
+worker is a separate process with its own event loop, pool and caches,
+so one CPU-heavy request only holds up its own worker.
+"""
+from src.config.base import BaseConfig
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn not installed; SERVER=uvicorn only
+    UvicornWorker = None
+
+APP = "src.main:app"
+
+
+def run(settings: BaseConfig) -> None:
+    if settings.SERVER == "gunicorn":
+        run_gunicorn(settings)
+    elif settings.SERVER == "uvicorn":
+        run_uvicorn(settings)
+    else:
+        raise SystemExit(f"Unknown SERVER {settings.SERVER!r}; use 'uvicorn' or 'gunicorn'")
+
+
+def run_uvicorn(settings: BaseConfig) -> None:
+    import uvicorn
+
+    uvicorn.run(APP,
+                host=settings.HOST,
+                port=settings.PORT,
+                workers=settings.WORKERS,
+                loop=settings.LOOP,
+                http=settings.HTTP,
+                access_log=False,  # LoggingMiddleware writes the access log
+                reload=False)
+
+
+if UvicornWorker is not None:
+    class Worker(UvicornWorker):
+        """uvicorn worker for gunicorn with the LOOP/HTTP settings."""
+        CONFIG_KWARGS = {"loop": BaseConfig().LOOP, "http": BaseConfig().HTTP, "access_log": False}
+
+
+def run_gunicorn(settings: BaseConfig) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.WORKERS,
+        "worker_class": "src.server.Worker",
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "accesslog": None,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # runs in each worker after the fork, so no app state is shared with the arbiter
+            from src.main import app
+            return app
+
+    Application().run()
@@ -0,0 +1,75 @@
+"""
+The tests run the app against a throwaway SQLite database. Settings are
+read when src is imported, so the environment is set up first.
+"""
+import os
+import sqlite3
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='tests-'), 'test.db')}"
+os.environ["AUTH_ENABLED"] = "false"
+os.environ["WARM_ON_STARTUP"] = "false"
+os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config.database import SessionLocal, engine
+from src.core.cache import response_cache
+from src.core.models import Base
+from src.core.models.admin import reset_fallback_admin_id
+from src.main import app
+
+
+@pytest.fixture
+def client():
+    """A client on an empty database and an empty response cache."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    response_cache.clear()
+    reset_fallback_admin_id()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def signup_admin(client):
+    """Sign up an admin through /signup-admin and return the response body."""
+    def signup_admin(phone: str, **fields) -> dict:
+        response = client.post("/signup-admin", json={"FirstName": "نماینده", "LastName": "تست", "Phone": phone,
+                                                      "Password": "رمز", "UserRole": "Admin", **fields})
+        assert response.status_code == 201, response.text
+        return response.json()
+    return signup_admin
+
+
+@pytest.fixture
+def admin_id(signup_admin) -> int:
+    return signup_admin("09350000000")["AdminID"]
+
+
+@pytest.fixture
+def signup(client):
+    """Sign up a register through /signup-register and return the response body."""
+    def signup(phone: str, **fields) -> dict:
+        response = client.post("/signup-register",
+                               json={"FirstName": "مددجو", "LastName": "تست", "Phone": phone, **fields})
+        assert response.status_code == 201, response.text
+        return response.json()
+    return signup
+
+
+@pytest.fixture
+def needs_concat():
+    """Skip on SQLite before 3.44: the map endpoints build labels with concat()."""
+    if engine.dialect.name == "sqlite" and sqlite3.sqlite_version_info < (3, 44):
+        pytest.skip("SQLite before 3.44 has no concat()")
@@ -0,0 +1,68 @@
+"""
+The read endpoints ported to the async stack query through the async
+engine only, and their queries still reach the Server-Timing header.
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from src.config.database import async_engine, engine
+
+VIEWPORT = "min_lat=35&max_lat=36&min_lng=51&max_lng=52"
+
+
+@contextmanager
+def statements(target):
+    sent = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        sent.append(statement)
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield sent
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+def db_count(response) -> int:
+    return int(re.search(r'db-count;desc="(\d+)"', response.headers["server-timing"]).group(1))
+
+
+@pytest.fixture
+def mapped(client, admin_id, signup):
+    for i, disconnected in enumerate((False, True)):
+        signup(f"0912000000{i}", Latitude="35.7", Longitude="51.4", UnderWhichAdmin=admin_id,
+               is_disconnected=disconnected)
+    return admin_id
+
+
+def paths(admin_id: int, concat: bool):
+    yield f"/get-admin/{admin_id}"
+    yield "/find-admin-clusters?zoom=3"
+    yield "/find-needy-clusters?zoom=3&disconnected=true"
+    if concat:
+        yield "/find-admin"
+        yield f"/find-admin-clusters?zoom=18&{VIEWPORT}"
+        yield "/find-disconnected-needy"
+        yield f"/find-needy-clusters?zoom=18&{VIEWPORT}"
+
+
+def ported(client, admin_id: int, concat: bool):
+    for path in paths(admin_id, concat):
+        with statements(engine) as sync_sent, statements(async_engine.sync_engine) as async_sent:
+            response = client.get(path)
+        assert response.status_code == 200, response.text
+        assert sync_sent == [], path
+        # the queries run in the async engine's greenlet and are counted for the request
+        assert async_sent and db_count(response) == len(async_sent), path
+
+
+def test_async_endpoints(mapped, client):
+    ported(client, mapped, concat=False)
+
+
+def test_async_map_endpoints(mapped, client, needs_concat):
+    ported(client, mapped, concat=True)
@@ -0,0 +1,109 @@
+"""
+Access tokens: issuing and verifying, key rotation through `kid`, the
+refusal of weak keys at startup, and which routes need a token.
+"""
+import jwt
+import pytest
+
+from src.config import authentication
+from src.config.base import BaseConfig
+from src.core.token_generator import DEFAULT_TOKEN, InvalidToken, TokenIssuer, check_keys, issuer_from_settings
+
+OLD_KEY = "o" * 32
+NEW_KEY = "n" * 32
+
+
+def issuer(keys, active_key, ttl=3600, cache_size=16) -> TokenIssuer:
+    return TokenIssuer(keys, active_key, "HS256", ttl, cache_size)
+
+
+@pytest.mark.parametrize("cache_size", [0, 16])
+def test_issue_and_verify(cache_size):
+    tokens = issuer({"old": OLD_KEY}, "old", cache_size=cache_size)
+    token = tokens.issue(7, "Admin")
+    assert jwt.get_unverified_header(token)["kid"] == "old"
+    for _ in range(2):  # the second check is an LRU hit when cached
+        claims = tokens.verify(token)
+        assert (claims.admin_id, claims.role, claims.key_id) == (7, "Admin", "old")
+
+
+@pytest.mark.parametrize("token", [
+    "not-a-token",
+    issuer({"old": OLD_KEY}, "old", ttl=-60).issue(7, "Admin"),
+    issuer({"old": NEW_KEY}, "old").issue(7, "Admin"),
+    jwt.encode({"AdminID": 7, "UserRole": "Admin", "exp": 2 ** 40}, OLD_KEY, algorithm="HS256"),
+])
+def test_rejected(token):
+    # garbage, expired, signed with another secret, no kid
+    with pytest.raises(InvalidToken):
+        issuer({"old": OLD_KEY}, "old").verify(token)
+
+
+def test_key_rotation():
+    old_token = issuer({"old": OLD_KEY}, "old").issue(7, "Admin")
+    # step 1 and 2: the new key is added and made active; old tokens still work
+    rotating = issuer({"old": OLD_KEY, "new": NEW_KEY}, "new")
+    new_token = rotating.issue(8, "GroupAdmin")
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert rotating.verify(old_token).admin_id == 7
+    # step 3: the old key is dropped, also for tokens verified while it was configured
+    del rotating.keys["old"]
+    with pytest.raises(InvalidToken):
+        rotating.verify(old_token)
+    assert rotating.verify(new_token).admin_id == 8
+    with pytest.raises(InvalidToken):
+        issuer({"new": NEW_KEY}, "new").verify(old_token)
+
+
+def test_active_key_must_be_configured():
+    with pytest.raises(ValueError):
+        issuer({"old": OLD_KEY}, "new")
+
+
+@pytest.mark.parametrize("secret", [DEFAULT_TOKEN, "too-short"])
+def test_startup_refuses_weak_keys(secret):
+    with pytest.raises(ValueError):
+        check_keys({"old": OLD_KEY, "new": secret})
+    with pytest.raises(ValueError):
+        issuer_from_settings(BaseConfig(AUTH_ENABLED=True, TOKEN=secret, JWT_KEYS={}))
+    # without authentication the key is not checked
+    assert issuer_from_settings(BaseConfig(AUTH_ENABLED=False, TOKEN=secret, JWT_KEYS={}))
+
+
+def test_startup_accepts_strong_keys():
+    tokens = issuer_from_settings(BaseConfig(AUTH_ENABLED=True, JWT_KEYS={"old": OLD_KEY, "new": NEW_KEY},
+                                             JWT_ACTIVE_KEY="new"))
+    assert jwt.get_unverified_header(tokens.issue(7, "Admin"))["kid"] == "new"
+
+
+@pytest.fixture
+def auth_on(client, monkeypatch):
+    monkeypatch.setattr(authentication, "auth_enabled", True)
+    return client
+
+
+ADMIN = {"FirstName": "نماینده", "LastName": "تست", "Password": "رمز", "UserRole": "Admin"}
+
+
+def test_token_required(auth_on):
+    assert auth_on.get("/admins").status_code == 401
+    assert auth_on.get("/admins", headers={"Authorization": "Bearer not-a-token"}).status_code == 401
+
+
+def test_first_admin_bootstrap(auth_on):
+    assert auth_on.post("/signup-admin", json={**ADMIN, "Phone": "09350000000"}).status_code == 201
+    # from now on admins are created by a logged in admin
+    assert auth_on.post("/signup-admin", json={**ADMIN, "Phone": "09350000001"}).status_code == 401
+    login = auth_on.post("/login", json={"Username": "09350000000", "Password": "رمز"})
+    assert login.status_code == 200, login.text
+    headers = {"Authorization": f"Bearer {login.json()['accessToken']}"}
+    assert auth_on.post("/signup-admin", json={**ADMIN, "Phone": "09350000001"}, headers=headers).status_code == 201
+    assert len(auth_on.get("/admins", headers=headers).json()) == 2
+
+
+def test_public_routes(auth_on):
+    needy = {"FirstName": "مددجو", "LastName": "تست", "Phone": "09120000001"}
+    assert auth_on.post("/signup-register", json=needy).status_code == 201
+    assert auth_on.post("/signin-needy", json=needy).status_code == 201
+    assert auth_on.get("/openapi.json").status_code == 200
+    assert auth_on.get("/docs").status_code == 200
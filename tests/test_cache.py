@@ -0,0 +1,84 @@
+"""
+The response cache across workers: another worker's write is simulated
+with statements on a plain Connection, which the Session hooks of this
+process do not see, plus the TableVersion bump its commit would make.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, insert, update
+
+from src.config.database import engine
+from src.core.cache import response_cache
+from src.core.models.register import Register
+from src.core.models.stats import StatCounter, StatDimension
+
+
+def bump_version(conn, table: str) -> None:
+    conn.execute(update(StatCounter).where(StatCounter.Dimension == str(StatDimension.TableVersion),
+                                           StatCounter.Key == table)
+                 .values(Count=StatCounter.Count + 1))
+
+
+def foreign_register(phone: str, lat: float, lng: float) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(Register.__table__).values(
+            FirstName="مددجو", LastName="دیگر", Phone=phone, PhoneNormalized=phone, Latitude=str(lat),
+            Longitude=str(lng), LatitudeValue=lat, LongitudeValue=lng, is_disconnected=False))
+        conn.execute(update(StatCounter).where(StatCounter.Dimension == str(StatDimension.RegisterTotal))
+                     .values(Count=StatCounter.Count + 1))
+        bump_version(conn, "register")
+
+
+@contextmanager
+def statements():
+    sent = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield sent
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def check_every_request(monkeypatch):
+    monkeypatch.setattr(response_cache, "version_check_interval", 0)
+
+
+def test_sees_writes_of_other_workers(client, signup, check_every_request):
+    signup("09120000001")
+    assert client.get("/info-needy").json()["numberNeedyPersons"] == 1
+    foreign_register("09120000002", 35.8, 51.4)
+    assert client.get("/info-needy").json()["numberNeedyPersons"] == 2
+
+
+def test_hit_within_the_check_interval_skips_the_database(client, signup, monkeypatch):
+    monkeypatch.setattr(response_cache, "version_check_interval", 3600)
+    signup("09120000001")
+    client.get("/info-needy")
+    with statements() as sent:
+        assert client.get("/info-needy").json()["numberNeedyPersons"] == 1
+    assert sent == []
+
+
+def test_own_commit_is_not_a_foreign_write(client, signup, check_every_request):
+    signup("09120000001")
+    client.get("/info-needy")
+    generations = response_cache.generations(("register",))
+    signup("09120000002")
+    assert client.get("/info-needy").json()["numberNeedyPersons"] == 2
+    # invalidated once, by the commit; the version check expects the bump it made
+    assert response_cache.generations(("register",))[0] == generations[0] + 1
+
+
+def test_column_tags_follow_their_table_version(client, signup, check_every_request):
+    signup("09120000001", Latitude="35.7", Longitude="51.4")
+    first = client.get("/find-needy-clusters", params={"zoom": 3}).json()
+    assert sum(cluster["count"] for cluster in first["clusters"]) == 1
+    foreign_register("09120000002", 35.8, 51.4)
+    second = client.get("/find-needy-clusters", params={"zoom": 3}).json()
+    assert sum(cluster["count"] for cluster in second["clusters"]) == 2
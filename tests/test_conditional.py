@@ -0,0 +1,88 @@
+"""
+Conditional GETs: 304 while nothing changed, and a fresh body (not a
+cached one) under a new ETag after a write.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from src.config.database import async_engine, engine
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+@contextmanager
+def checkouts():
+    """Connections checked out of the sync and the async engine's pools."""
+    counts = {"sync": 0, "async": 0}
+    listeners = [(engine.pool, lambda *args: counts.__setitem__("sync", counts["sync"] + 1)),
+                 (async_engine.sync_engine.pool, lambda *args: counts.__setitem__("async", counts["async"] + 1))]
+    for pool, listener in listeners:
+        event.listen(pool, "checkout", listener)
+    try:
+        yield counts
+    finally:
+        for pool, listener in listeners:
+            event.remove(pool, "checkout", listener)
+
+
+def province_labels(response) -> list:
+    return response.json()["provinceStats"]["labels"]
+
+
+def test_not_modified_until_a_write(client, signup):
+    signup("09120000001", Province="تهران")
+    first = client.get("/register-stats")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert client.get("/register-stats", headers={"If-None-Match": etag}).status_code == 304
+
+    signup("09120000002", Province="فارس")
+    second = client.get("/register-stats", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert "فارس" in province_labels(second)
+    assert client.get("/register-stats", headers={"If-None-Match": second.headers["etag"]}).status_code == 304
+
+
+def test_not_modified_until_goods_change(client, admin_id, signup):
+    register_id = signup("09120000001", UnderWhichAdmin=admin_id,
+                         goods_of_registre=[{"TypeGood": "غذا", "NumberGood": 1}])["RegisterID"]
+    first = client.get(f"/get-goods/{register_id}")
+    etag = first.headers["etag"]
+    assert client.get(f"/get-goods/{register_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    good_id = first.json()[0]["GoodID"]
+    response = client.post(f"/edit-good/{register_id}", json=[{"GoodID": good_id, "TypeGood": "دارو", "NumberGood": 2}])
+    assert response.status_code == 200, response.text
+    second = client.get(f"/get-goods/{register_id}", headers={"If-None-Match": etag})
+    assert second.status_code == 201  # the status the route declares
+    assert [good["TypeGood"] for good in second.json()] == ["دارو"]
+
+
+def test_sync_endpoint_reads_the_version_with_its_own_session(client, admin_id, signup):
+    register_id = signup("09120000001", UnderWhichAdmin=admin_id,
+                         goods_of_registre=[{"TypeGood": "غذا", "NumberGood": 1}])["RegisterID"]
+    with checkouts() as counts:
+        assert "etag" in client.get(f"/get-goods/{register_id}").headers
+    assert counts == {"sync": 1, "async": 0}
+
+
+@pytest.mark.parametrize("path", ["/find-needy", "/find-disconnected-needy"])
+def test_ndjson_stream_is_conditional(client, signup, needs_concat, path):
+    disconnected = path == "/find-disconnected-needy"
+    signup("09120000001", Latitude="35.7", Longitude="51.4", is_disconnected=disconnected)
+    first = client.get(path, headers=NDJSON)
+    assert first.headers["content-type"].startswith("application/x-ndjson")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+    assert client.get(path, headers={**NDJSON, "If-None-Match": etag}).status_code == 304
+    # the JSON body of the same URL is another representation with its own tag
+    assert client.get(path).headers["etag"] != etag
+
+    signup("09120000002", Latitude="35.8", Longitude="51.4", is_disconnected=disconnected)
+    second = client.get(path, headers={**NDJSON, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert len(second.text.splitlines()) == 2
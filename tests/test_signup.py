@@ -0,0 +1,72 @@
+"""
+/signup-register writes a household (register, children, goods) in one
+transaction, children and goods with one multi-row INSERT each.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event, func, select
+
+from src.config.database import SessionLocal, engine
+from src.core.models.good import Good
+from src.core.models.register import ChildrenOfRegister, Register
+
+HOUSEHOLD = {
+    "FirstName": "مددجو", "LastName": "تست", "Phone": "09120000001",
+    "children_of_registre": [{"FirstName": "فرزند", "Age": "۳"}, {"FirstName": "فرزند", "Age": "5"}],
+    "goods_of_registre": [{"TypeGood": "غذا", "NumberGood": 2}, {"TypeGood": "پوشاک", "NumberGood": 1}],
+}
+
+
+@contextmanager
+def recorded(target):
+    """Tables of the INSERT statements and the number of commits sent through `target`."""
+    log = {"inserts": [], "commits": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO"):
+            log["inserts"].append(statement.split()[2].strip('"'))
+
+    def commit(conn):
+        log["commits"] += 1
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    event.listen(target, "commit", commit)
+    try:
+        yield log
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+        event.remove(target, "commit", commit)
+
+
+def counts():
+    with SessionLocal() as db:
+        return tuple(db.scalar(select(func.count()).select_from(model)) for model in (Register, ChildrenOfRegister, Good))
+
+
+def test_household_in_one_transaction(client, admin_id):
+    with recorded(engine) as log:
+        response = client.post("/signup-register", json={**HOUSEHOLD, "UnderWhichAdmin": admin_id})
+    assert response.status_code == 201, response.text
+    assert response.json()["CreatedDate"] is not None
+    assert counts() == (1, 2, 2)
+    assert log["commits"] == 1
+    # one multi-row INSERT each for the children and the goods
+    assert [table for table in log["inserts"] if table != "stat_counter"] == \
+        ["register", "children_of_register", "good"]
+
+
+def test_children_ages_are_normalized(client):
+    register_id = client.post("/signup-register", json={**HOUSEHOLD, "goods_of_registre": None}).json()["RegisterID"]
+    with SessionLocal() as db:
+        ages = db.scalars(select(ChildrenOfRegister.Age).where(ChildrenOfRegister.RegisterID == register_id)
+                          .order_by(ChildrenOfRegister.Age))
+        assert list(ages) == [3, 5]
+
+
+def test_goods_failure_rolls_back_register_and_children(client):
+    # no admin exists, so the goods cannot be credited to anyone and their INSERT fails
+    response = client.post("/signup-register", json=HOUSEHOLD)
+    assert response.status_code == 500
+    assert counts() == (0, 0, 0)
+    # the number stays free for a retry
+    assert client.post("/signup-register", json={**HOUSEHOLD, "goods_of_registre": None}).status_code == 201
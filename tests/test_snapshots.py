@@ -0,0 +1,44 @@
+"""
+Precompressed full-map snapshots: the body is chosen by Accept-Encoding
+and decodes to what the query path returns.
+"""
+import gzip
+
+import orjson
+import pytest
+
+from src.core.snapshots import choose_encoding, compress
+
+CODINGS = ("identity", "gzip")
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, "identity"),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "gzip"),
+    ("br", "identity"),
+    ("gzip;q=0", "identity"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", "identity"),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, CODINGS) == expected
+
+
+def test_compress_round_trip():
+    body = orjson.dumps([{"id": i, "name": "مددجو"} for i in range(100)])
+    bodies = compress(body)
+    assert set(bodies) == set(CODINGS)
+    assert gzip.decompress(bodies["gzip"]) == body
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip", "br"])
+def test_find_needy_snapshot(client, signup, needs_concat, accept_encoding):
+    for i in range(3):
+        signup(f"0912000000{i}", Latitude=str(35 + i / 10), Longitude="51.4")
+    response = client.get("/find-needy", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    # br is not stored; a br-only client gets the identity body
+    assert response.headers.get("content-encoding", "identity") == ("gzip" if accept_encoding == "gzip" else "identity")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()) == 3
@@ -0,0 +1,129 @@
+"""
+The counters maintained by src.core.stats must match a full recount
+(compute_counters) after every write path.
+"""
+import json
+from collections import Counter
+
+import pytest
+from sqlalchemy import select
+
+from src.config.database import SessionLocal
+from src.core import stats
+from src.core.models.register import ChildrenOfRegister, Register
+from src.core.models.stats import StatCounter, StatDimension
+
+
+def stored_counters() -> Counter:
+    counts = Counter()
+    with SessionLocal() as db:
+        rows = db.execute(select(StatCounter.Dimension, StatCounter.Key, StatCounter.Count)
+                          .where(StatCounter.Dimension != str(StatDimension.TableVersion)))
+        for dimension, key, count in rows:
+            # the register total is spread over shards
+            counts[(dimension, stats.TOTAL_KEY if dimension == StatDimension.RegisterTotal else key)] += count
+    return Counter({key: count for key, count in counts.items() if count})
+
+
+def assert_consistent():
+    with SessionLocal() as db:
+        fresh = stats.compute_counters(db)
+    assert stored_counters() == Counter({(str(dimension), key): count for (dimension, key), count in fresh.items()})
+
+
+@pytest.fixture
+def household(client, admin_id, signup):
+    register = signup("09120000001", Province="تهران", EducationLevel="Primary", UnderWhichAdmin=admin_id,
+                      children_of_registre=[{"FirstName": "فرزند", "Age": "3"}, {"FirstName": "فرزند", "Age": "5"}],
+                      goods_of_registre=[{"TypeGood": "غذا", "NumberGood": 2}, {"TypeGood": "پوشاک"}])
+    return register["RegisterID"]
+
+
+def test_signup_register(household):
+    assert_consistent()
+
+
+def test_signup_admin(client, admin_id):
+    assert_consistent()
+    assert stored_counters()[(StatDimension.AdminRole, "Admin")] == 1
+
+
+def test_edit_admin_role(client, admin_id):
+    response = client.post(f"/edit-admin/{admin_id}", json={"UserRole": "GroupAdmin"})
+    assert response.status_code == 200, response.text
+    assert_consistent()
+
+
+def test_delete_admin(client, admin_id):
+    assert client.delete(f"/delete-admin/{admin_id}").status_code == 200
+    assert_consistent()
+
+
+def test_edit_needy(client, household, admin_id):
+    response = client.post(f"/edit-needy/{household}", json={"Phone": "09120000001", "Province": "اصفهان",
+                                                             "EducationLevel": "PhD"})
+    assert response.status_code == 200, response.text
+    assert_consistent()
+
+
+def test_delete_needy(client, household, signup):
+    signup("09120000002", Province="فارس")
+    assert client.delete(f"/delete-needy/{household}").status_code == 200
+    assert_consistent()
+    with SessionLocal() as db:
+        assert stats.read_total(db) == 1
+
+
+def test_children(client, household, db):
+    response = client.post("/signup-child-register", json={"RegisterID": household, "FirstName": "فرزند", "Age": "7"})
+    assert response.status_code == 201, response.text
+    assert_consistent()
+    child_id = db.scalar(select(ChildrenOfRegister.ChildrenOfRegisterID)
+                         .where(ChildrenOfRegister.RegisterID == household).limit(1))
+    assert client.delete(f"/delete-child-needy/{child_id}").status_code == 200
+    assert_consistent()
+
+
+def test_goods(client, household, admin_id):
+    goods = client.get(f"/get-goods/{household}").json()
+    # change one good's type, drop the other and add a new one
+    response = client.post(f"/edit-good/{household}", json=[
+        {"GoodID": goods[0]["GoodID"], "TypeGood": "دارو", "NumberGood": 1},
+        {"TypeGood": "غذا", "NumberGood": 3, "GivenBy": admin_id},
+    ])
+    assert response.status_code == 200, response.text
+    assert_consistent()
+
+
+def test_import_registers(client, admin_id):
+    body = "\n".join(json.dumps({"FirstName": "مددجو", "LastName": str(i), "Phone": f"0913{i:07d}", "Province": "فارس",
+                                 "UnderWhichAdmin": admin_id, "children_of_registre": [{"FirstName": "فرزند"}]})
+                     for i in range(5))
+    response = client.post("/import-registers?format=jsonl&chunk_size=2", content=body.encode())
+    assert response.json() == {"imported": 5, "failed": 0, "errors": []}
+    assert_consistent()
+
+
+def test_rolled_back_write_is_not_counted(client, household):
+    with SessionLocal() as db:
+        db.add(Register(FirstName="مددجو", LastName="تست", Phone="09120000009", Province="تهران"))
+        db.flush()
+        db.rollback()
+        # the next transaction of the session must not carry the rolled back deltas
+        db.add(Register(FirstName="مددجو", LastName="تست", Phone="09120000010", Province="فارس"))
+        db.commit()
+    assert_consistent()
+
+
+def test_table_versions_count_transactions(client, household, db):
+    versions = stats.read_table_versions(db, ["register", "children_of_register", "good"])
+    # the signup wrote all three tables in one transaction
+    assert {table: version for table, (version, _) in versions.items()} == \
+        {"register": 1, "children_of_register": 1, "good": 1}
+
+
+def test_rebuild_finds_no_drift(client, household, signup, db):
+    for i in range(3):
+        signup(f"0912100000{i}", Province="تهران")
+    assert stats.rebuild(db) == 0
+    assert_consistent()
@@ -0,0 +1,82 @@
+"""
+NDJSON streams: a paginated stream ends with its next_cursor line, and
+the session a stream holds is released however the stream ends.
+"""
+import asyncio
+
+import orjson
+import pytest
+from sqlalchemy import select
+from starlette.requests import ClientDisconnect
+
+from src.config.database import engine
+from src.core.models.register import Register
+from src.core.pagination import PageParams, decode_cursor, paginate
+from src.core.streaming import ndjson_response
+
+SCOPE = {"type": "http", "asgi": {"spec_version": "2.4"}, "method": "GET", "path": "/", "headers": []}
+
+
+def send_body(response, disconnect_after=None) -> list:
+    """Run `response` as ASGI; the client goes away after `disconnect_after` body chunks."""
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] != "http.response.body":
+            return
+        if disconnect_after is not None and len(chunks) == disconnect_after:
+            raise OSError("client disconnected")
+        chunks.append(message["body"])
+
+    asyncio.run(response(SCOPE, receive, send))
+    return [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def phones(params: PageParams):
+    query = select(Register.RegisterID.label("id"), Register.Phone.label("phone"))
+    return paginate(query, Register.RegisterID, params)
+
+
+@pytest.fixture
+def registers(client, signup):
+    return [signup(f"0912000000{i}")["RegisterID"] for i in range(7)]
+
+
+@pytest.mark.parametrize("limit, batch_size", [(3, 2), (3, 3), (3, 500), (7, 2), (10, 3)])
+def test_pages_end_with_the_cursor(registers, limit, batch_size):
+    ids, after = [], None
+    while True:
+        params = PageParams(limit, after)
+        *rows, last = send_body(ndjson_response(phones(params), batch_size=batch_size, params=params))
+        assert list(last) == ["next_cursor"] and len(rows) <= limit
+        ids.extend(row["id"] for row in rows)
+        if last["next_cursor"] is None:
+            break
+        after = decode_cursor(last["next_cursor"])
+    assert ids == registers
+
+
+def test_unpaginated_stream_has_no_cursor(registers):
+    rows = send_body(ndjson_response(phones(PageParams()), batch_size=2))
+    assert [row["id"] for row in rows] == registers
+
+
+@pytest.mark.parametrize("disconnect_after", [0, 1])
+def test_disconnect_releases_the_session(registers, disconnect_after):
+    response = ndjson_response(phones(PageParams()), batch_size=2)
+    with pytest.raises(ClientDisconnect):
+        send_body(response, disconnect_after)
+    assert engine.pool.checkedout() == 0
+
+
+def test_find_needy_pages(client, signup, needs_concat):
+    for i in range(5):
+        signup(f"0912000000{i}", Latitude=str(35 + i / 10), Longitude="51.4", is_disconnected=False)
+    everything = client.get("/find-needy").json()
+    response = client.get("/find-needy", params={"stream": True, "limit": 3})
+    *rows, last = [orjson.loads(line) for line in response.content.splitlines()]
+    assert rows == everything[:3]
+    assert decode_cursor(last["next_cursor"]) == everything[2]["id"]